@@ -0,0 +1,53 @@
+import os
+import threading
+from collections import deque
+
+# Show the local first-aid card if Gemini has not started answering by then
+FIRST_CHUNK_TIMEOUT_MS = int(os.environ.get("MEDBOOK_FIRST_CHUNK_TIMEOUT_MS", "1500"))
+# Hard limit for a whole streamed answer
+STREAM_TIMEOUT_SECONDS = float(os.environ.get("MEDBOOK_STREAM_TIMEOUT_S", "30"))
+
+FIRST_AID_FALLBACK = """
+**🩺 Immediate first aid while guidance loads:**
+- Call **102** (ambulance) or **112** right away if the person is unresponsive, not breathing, has chest pain, severe bleeding or signs of stroke
+- Check breathing; if absent and you are trained, start CPR (30 compressions, 2 breaths)
+- Press firmly on any bleeding wound with a clean cloth
+- Lay an unconscious but breathing person on their side (recovery position)
+- Do not give food, drink or medicines unless instructed by a medical professional
+- Stay with the person and keep them calm and warm
+"""
+
+
+# A streamed answer as shown to the user (see triage_queue.wait_for): the text,
+# when its first chunk and the end arrived, and "ok" or "timeout"
+class StreamResult:
+    __slots__ = ("text", "first_chunk_ms", "total_ms", "status")
+
+    def __init__(self, text, first_chunk_ms, total_ms, status):
+        self.text = text
+        self.first_chunk_ms = first_chunk_ms
+        self.total_ms = total_ms
+        self.status = status
+
+
+# Recent streaming latencies for display; bounded so memory stays flat
+class StreamStats:
+    def __init__(self, max_samples=500):
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, result):
+        with self._lock:
+            self._samples.append((result.first_chunk_ms, result.total_ms, result.status))
+
+    def summary(self):
+        with self._lock:
+            samples = list(self._samples)
+        first_chunk = sorted(s[0] for s in samples if s[0] is not None)
+        total = sorted(s[1] for s in samples)
+        return {
+            "count": len(samples),
+            "timeouts": sum(1 for s in samples if s[2] == "timeout"),
+            "first_chunk_p50_ms": first_chunk[len(first_chunk) // 2] if first_chunk else None,
+            "total_p50_ms": total[len(total) // 2] if total else None,
+        }
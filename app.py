@@ -1,11 +1,23 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
-import google.generativeai as genai
-import plotly.express as px
-import plotly.graph_objects as go
 from streamlit_option_menu import option_menu
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import time
+import os
+import json
+import cProfile
+from appointment_store import SlotUnavailableError, SORT_COLUMNS, STATUS_CANCELLED, STATUS_CONFIRMED, STATUS_NO_SHOW
+from slot_inventory import BOOKING_WINDOW_DAYS
+from booking_service import BULK_FORMATS, BookingError, BookingService
+from recommendation_cache import RecommendationCache, make_key, normalize_symptoms
+from ai_streaming import FIRST_AID_FALLBACK, StreamStats
+from gemini_pool import GeminiClientManager
+from triage_queue import PRIORITY_EMERGENCY, PRIORITY_ROUTINE, QueueFullError, TriageQueue, wait_for
+from hospital_map import HospitalMap
+from metrics import REGISTRY as metrics, METRICS_PORT, format_profile, start_http_server
+from page_assets import (BOOKED_TODAY_CARD, BOOKING_SUCCESS, CUSTOM_CSS, EMERGENCY_BANNER, FOOTER,
+                         HOME_METRIC_CARDS, MAIN_HEADER, doctor_card)
 
 # Configure page
 st.set_page_config(
@@ -15,154 +27,737 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Admin panel in the sidebar (metrics and profiling), enabled with MEDBOOK_ADMIN=1
+ADMIN_PANEL = os.environ.get("MEDBOOK_ADMIN") == "1"
+
+# Histories larger than this are exported through the HTTP API, which
+# streams them, instead of being built in memory for a page download
+PAGE_EXPORT_MAX_ROWS = int(os.environ.get("MEDBOOK_PAGE_EXPORT_MAX_ROWS", "100000"))
+# Newer Streamlit builds a download from a callable only when it is clicked
+DEFERRED_DOWNLOADS = hasattr(MediaFileManager, "add_deferred")
+
+# On-demand cProfile of one full rerun, requested from the admin panel. A
+# profile left running by an interrupted rerun is stopped first.
+leftover_profile = st.session_state.pop("active_profile", None)
+if leftover_profile is not None:
+    leftover_profile.disable()
+if st.session_state.pop("profile_next_run", False):
+    st.session_state.active_profile = cProfile.Profile()
+    st.session_state.active_profile.enable()
+
 # Custom CSS for beautiful styling
-st.markdown("""
-<style>
-    .main-header {
-        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
-        padding: 2rem;
-        border-radius: 10px;
-        text-align: center;
-        color: white;
-        margin-bottom: 2rem;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-    }
-    
-    .doctor-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 15px;
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1);
-        border-left: 5px solid #667eea;
-        margin: 1rem 0;
-        transition: transform 0.3s ease;
-    }
-    
-    .doctor-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 8px 20px rgba(0, 0, 0, 0.15);
-    }
-    
-    .emergency-btn {
-        background: linear-gradient(45deg, #ff6b6b, #ee5a52);
-        color: white;
-        padding: 1rem 2rem;
-        border: none;
-        border-radius: 50px;
-        font-size: 1.2rem;
-        font-weight: bold;
-        cursor: pointer;
-        width: 100%;
-        margin: 1rem 0;
-        box-shadow: 0 4px 15px rgba(255, 107, 107, 0.3);
-    }
-    
-    .success-message {
-        background: linear-gradient(90deg, #56ab2f, #a8e6cf);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin: 1rem 0;
-    }
-    
-    .metric-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 10px;
-        text-align: center;
-        box-shadow: 0 2px 10px rgba(0, 0, 0, 0.1);
-    }
-    
-    .stSelectbox > div > div {
-        background-color: #f8f9fa;
-        border-radius: 10px;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+# Booking service over the shared appointment store, slot inventory and
+# read-only doctor catalog (one per process, used by every session)
+@st.cache_resource
+def get_booking_service():
+    return BookingService.open()
+
+# AI recommendations keyed on normalized symptoms, age bucket and gender
+@st.cache_resource
+def get_recommendation_cache():
+    return RecommendationCache()
+
+# Time-to-first-chunk and total latency of streamed Gemini answers
+@st.cache_resource
+def get_stream_stats():
+    return StreamStats()
+
+# Warm Gemini models per API key, with a concurrency cap and retries
+@st.cache_resource
+def get_gemini_clients():
+    return GeminiClientManager()
+
+# Rate-limited queue every session's Gemini calls go through
+@st.cache_resource
+def get_triage_queue():
+    queue = TriageQueue(get_gemini_clients())
+    queue.start()
+    return queue
+
+# Aggregated appointment history for the analytics page, refreshed incrementally.
+# pandas and numpy are only imported once the page is first opened.
+@st.cache_resource
+def get_analytics():
+    from appointment_analytics import AppointmentAnalytics
+    return AppointmentAnalytics(get_booking_service().store)
+
+# Optional standalone /metrics endpoint for this process (MEDBOOK_METRICS_PORT)
+@st.cache_resource
+def start_metrics_endpoint():
+    return start_http_server(METRICS_PORT) if METRICS_PORT else None
+
+# Threads delivering booking emails and SMS from the outbox
+@st.cache_resource
+def start_notification_workers():
+    get_booking_service().notifier.start()
+    return True
+
+# Building layout with every room-to-room route precomputed
+@st.cache_resource
+def get_hospital_map():
+    return HospitalMap.load()
+
+booking_service = get_booking_service()
+store = booking_service.store
+catalog = booking_service.catalog
+recommendation_cache = get_recommendation_cache()
+stream_stats = get_stream_stats()
+triage_queue = get_triage_queue()
+start_metrics_endpoint()
+start_notification_workers()
+
+DOCTORS_PER_PAGE = 10
+# Doctors shown per analytics chart, so large catalogs stay readable
+ANALYTICS_TOP_DOCTORS = 20
+APPOINTMENT_TABLE_COLUMNS = ["id", "date", "time", "doctor", "specialty", "patient_name",
+                             "phone", "fee", "status"]
 
 # Initialize session state
-if 'appointments' not in st.session_state:
-    st.session_state.appointments = []
 if 'gemini_api_key' not in st.session_state:
     st.session_state.gemini_api_key = ""
-if 'doctors_data' not in st.session_state:
-    st.session_state.doctors_data = [
-        {"name": "Dr. Sarah Johnson", "specialty": "Cardiology", "rating": 4.9, "experience": "15 years", "fee": 150, "available_slots": ["09:00", "10:30", "14:00", "15:30"]},
-        {"name": "Dr. Michael Chen", "specialty": "Neurology", "rating": 4.8, "experience": "12 years", "fee": 180, "available_slots": ["08:30", "11:00", "13:30", "16:00"]},
-        {"name": "Dr. Emily Davis", "specialty": "Dermatology", "rating": 4.7, "experience": "10 years", "fee": 120, "available_slots": ["09:30", "11:30", "14:30", "16:30"]},
-        {"name": "Dr. James Wilson", "specialty": "Orthopedics", "rating": 4.9, "experience": "18 years", "fee": 160, "available_slots": ["08:00", "10:00", "13:00", "15:00"]},
-        {"name": "Dr. Lisa Rodriguez", "specialty": "Pediatrics", "rating": 4.8, "experience": "14 years", "fee": 140, "available_slots": ["09:00", "11:00", "14:00", "16:00"]},
-        {"name": "Dr. David Kim", "specialty": "Gynecology", "rating": 4.6, "experience": "16 years", "fee": 170, "available_slots": ["08:30", "10:30", "13:30", "15:30"]}
-    ]
+
+script_ctx = get_script_run_ctx()
+if script_ctx is not None:
+    metrics.touch_session(script_ctx.session_id)
+metrics.inc("medbook_script_runs_total")
 
 # Gemini AI Configuration
 def configure_gemini():
-    if st.session_state.gemini_api_key:
+    return bool(st.session_state.gemini_api_key)
+
+# Sends a prompt through the shared triage queue and polls its future,
+# passing the text so far to on_text. Sessions asking the same thing (same
+# key) share one call. Returns the text and whether it is complete (the wait
+# has a hard timeout); raises QueueFullError when too many routine requests
+# are waiting. on_queued gets the number of requests ahead, if any.
+def ask_gemini(key, prompt, priority, on_text=None, on_fallback=None, on_queued=None):
+    request = triage_queue.submit(key, st.session_state.gemini_api_key, prompt, priority)
+    ahead = triage_queue.position(request)
+    if ahead and on_queued is not None:
+        on_queued(ahead)
+    result = wait_for(request, on_text, on_fallback)
+    stream_stats.record(result)
+    if result.status == "timeout":
+        note = "_(Response timed out before it was complete.)_"
+        return f"{result.text}\n\n{note}" if result.text else note, False
+    return result.text, True
+
+# Recommendation text for a local triage result
+def format_triage(result):
+    reason = f"based on: {', '.join(result.matched)}" if result.matched else "based on the patient's age"
+    return (f"**{result.specialty}** is the most appropriate specialist "
+            f"(instant triage, {result.confidence:.0%} confidence, {reason}).")
+
+# AI-powered doctor recommendation. The local triage classifier answers first;
+# Gemini is only asked when the classifier is not confident.
+# Every call is timed by outcome (triage, cache, success, timeout, error...).
+def get_ai_recommendation(symptoms, age, gender, on_text=None, on_queued=None):
+    from triage import classify as triage_symptoms
+
+    with metrics.timer("medbook_ai_request_seconds", kind="recommendation") as labels:
+        triage_result = triage_symptoms(symptoms, age, gender)
+        # Preselected as the department of the earliest-slot finder
+        if triage_result.specialty:
+            st.session_state.recommended_specialty = triage_result.specialty
+        if triage_result.confident:
+            labels["outcome"] = "triage"
+            return format_triage(triage_result)
+        
+        if not configure_gemini():
+            labels["outcome"] = "no_api_key"
+            if triage_result.specialty:
+                return (format_triage(triage_result) +
+                        "\n\nConfigure your Gemini API key for a more detailed recommendation.")
+            return "Please configure your Gemini API key to get AI recommendations."
+        
+        cached = recommendation_cache.get(symptoms, age, gender)
+        if cached is not None:
+            labels["outcome"] = "cache"
+            return cached
+        
+        try:
+            prompt = f"""
+            Based on the following patient information:
+            - Symptoms: {symptoms}
+            - Age: {age}
+            - Gender: {gender}
+            
+            Recommend the most appropriate medical specialist from these options:
+            - Cardiology
+            - Neurology  
+            - Dermatology
+            - Orthopedics
+            - Pediatrics
+            - Gynecology
+            
+            Provide a brief explanation (2-3 sentences) for your recommendation.
+            """
+            
+            recommendation, complete = ask_gemini(("recommendation", make_key(symptoms, age, gender)), prompt,
+                                                  PRIORITY_ROUTINE, on_text, on_queued=on_queued)
+            labels["outcome"] = "success" if complete else "timeout"
+            if complete:
+                recommendation_cache.put(symptoms, age, gender, recommendation)
+            return recommendation
+        except QueueFullError as e:
+            labels["outcome"] = "busy"
+            if triage_result.specialty:
+                return format_triage(triage_result) + f"\n\nThe AI assistant is busy: {e}"
+            return f"The AI assistant is busy: {e}"
+        except Exception as e:
+            labels["outcome"] = "error"
+            return f"Error getting AI recommendation: {str(e)}"
+
+# Emergency assistance; pass on_text/on_fallback to stream the answer as it arrives
+def get_emergency_guidance(symptoms, on_text=None, on_fallback=None, on_queued=None):
+    with metrics.timer("medbook_ai_request_seconds", kind="emergency") as labels:
+        if not configure_gemini():
+            labels["outcome"] = "no_api_key"
+            return "Please configure your Gemini API key for emergency assistance."
+        
         try:
-            genai.configure(api_key=st.session_state.gemini_api_key)
-            return True
-        except:
-            return False
-    return False
-
-# AI-powered doctor recommendation
-def get_ai_recommendation(symptoms, age, gender):
-    if not configure_gemini():
-        return "Please configure your Gemini API key to get AI recommendations."
-    
-    try:
-        model = genai.GenerativeModel('gemini-pro')
-        prompt = f"""
-        Based on the following patient information:
-        - Symptoms: {symptoms}
-        - Age: {age}
-        - Gender: {gender}
+            prompt = f"""
+            EMERGENCY MEDICAL GUIDANCE:
+            Patient reports: {symptoms}
+            
+            Provide immediate first aid advice and determine urgency level (High/Medium/Low).
+            Include when to call emergency services.
+            Keep response concise but comprehensive.
+            """
+            
+            guidance, complete = ask_gemini(("emergency", normalize_symptoms(symptoms)), prompt,
+                                            PRIORITY_EMERGENCY, on_text, on_fallback, on_queued)
+            labels["outcome"] = "success" if complete else "timeout"
+            return guidance
+        except Exception as e:
+            labels["outcome"] = "error"
+            return f"Error getting emergency guidance: {str(e)}"
+
+# Page fragments: interacting with a widget inside one of these reruns only
+# that function, not the whole script (CSS, menu and other sections are skipped)
+
+# AI recommendation expander on the booking page
+@st.fragment
+@metrics.timed("medbook_fragment_render_seconds", label="fragment")
+def ai_recommendation_panel():
+    col1, col2 = st.columns(2)
+    with col1:
+        symptoms = st.text_area("Describe your symptoms:", placeholder="e.g., chest pain, headache, skin rash...")
+        age = st.number_input("Age:", min_value=1, max_value=120, value=30)
+    with col2:
+        gender = st.selectbox("Gender:", ["Male", "Female", "Other"])
         
-        Recommend the most appropriate medical specialist from these options:
-        - Cardiology
-        - Neurology  
-        - Dermatology
-        - Orthopedics
-        - Pediatrics
-        - Gynecology
+    if st.button("Get AI Recommendation 🔍"):
+        if symptoms:
+            st.success("**AI Recommendation:**")
+            recommendation_area = st.empty()
+            with st.spinner("Analyzing symptoms..."):
+                recommendation = get_ai_recommendation(
+                    symptoms, age, gender, on_text=recommendation_area.write,
+                    on_queued=lambda ahead: recommendation_area.info(f"⏳ {ahead} requests ahead of you...")
+                )
+            recommendation_area.write(recommendation)
+
+# Patient details, doctor list and slot selection
+@st.fragment
+@metrics.timed("medbook_fragment_render_seconds", label="fragment")
+def booking_form():
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        patient_name = st.text_input("👤 Patient Name:", placeholder="Enter your full name", key="patient_name")
+        phone = st.text_input("📱 Phone Number:", placeholder="+91 9876543210", key="patient_phone")
+        email = st.text_input("📧 Email:", placeholder="patient@email.com", key="patient_email")
         
-        Provide a brief explanation (2-3 sentences) for your recommendation.
-        """
+    with col2:
+        appointment_date = st.date_input("📅 Appointment Date:", 
+                                       min_value=datetime.now().date(),
+                                       max_value=datetime.now().date() + timedelta(days=BOOKING_WINDOW_DAYS))
+        specialty = st.selectbox("🏥 Select Department:", catalog.specialties())
         
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        return f"Error getting AI recommendation: {str(e)}"
-
-# Emergency assistance
-def get_emergency_guidance(symptoms):
-    if not configure_gemini():
-        return "Please configure your Gemini API key for emergency assistance."
-    
-    try:
-        model = genai.GenerativeModel('gemini-pro')
-        prompt = f"""
-        EMERGENCY MEDICAL GUIDANCE:
-        Patient reports: {symptoms}
+    # Doctor selection based on specialty
+    doctor_count = catalog.count(specialty)
+    
+    if doctor_count:
+        st.markdown("### 👨‍⚕️ Available Doctors")
         
-        Provide immediate first aid advice and determine urgency level (High/Medium/Low).
-        Include when to call emergency services.
-        Keep response concise but comprehensive.
-        """
+        col1, col2 = st.columns(2)
+        with col1:
+            sort_by = st.selectbox("Sort by:", ["rating", "fee", "experience"], format_func=str.title)
+        with col2:
+            page_count = (doctor_count + DOCTORS_PER_PAGE - 1) // DOCTORS_PER_PAGE
+            page = st.number_input(f"Page (of {page_count}):", min_value=1, max_value=page_count, value=1)
         
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        return f"Error getting emergency guidance: {str(e)}"
+        for doctor in booking_service.search_doctors(specialty, sort_by, page - 1, DOCTORS_PER_PAGE):
+            with st.container():
+                st.markdown(doctor_card(doctor), unsafe_allow_html=True)
+                
+                free_slots = booking_service.free_slots(doctor.name, appointment_date)
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    selected_doctor = st.checkbox(f"Select {doctor.name}", key=f"doc_{doctor.id}")
+                with col2:
+                    if selected_doctor:
+                        if free_slots:
+                            time_slot = st.selectbox(f"Available Time Slots:", 
+                                                   free_slots, 
+                                                   key=f"slot_{doctor.id}")
+                        else:
+                            st.warning("No free slots on this date")
+                
+                if selected_doctor and free_slots and st.button(f"Book with {doctor.name}", key=f"book_{doctor.id}"):
+                    try:
+                        booking_service.book(patient_name, phone, email, doctor.name, appointment_date, time_slot)
+                    except SlotUnavailableError:
+                        st.error(f"Sorry, {time_slot} was just booked by someone else. Please pick another slot.")
+                    except BookingError as e:
+                        st.error(str(e))
+                    else:
+                        st.markdown(BOOKING_SUCCESS, unsafe_allow_html=True)
+                        
+                        # Show booking details
+                        st.info(f"""
+                        **Booking Details:**
+                        - Patient: {patient_name}
+                        - Doctor: {doctor.name}
+                        - Date: {appointment_date}
+                        - Time: {time_slot}
+                        - Fee: ₹{doctor.fee}
+                        """)
+
+# Soonest free slots across every doctor of a department, bookable with the
+# patient details entered in the booking form
+@st.fragment
+@metrics.timed("medbook_fragment_render_seconds", label="fragment")
+def earliest_slot_finder():
+    today = datetime.now().date()
+    specialties = catalog.specialties()
+    recommended = st.session_state.get("recommended_specialty")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        specialty = st.selectbox("🏥 Department:", specialties,
+                                 index=specialties.index(recommended) if recommended in specialties else 0)
+        date_range = st.date_input("📅 Between:", value=(today, today + timedelta(days=BOOKING_WINDOW_DAYS)),
+                                   min_value=today, max_value=today + timedelta(days=BOOKING_WINDOW_DAYS))
+    with col2:
+        earliest, latest = st.select_slider("🕐 Time of day:", options=catalog.slot_times,
+                                            value=(catalog.slot_times[0], catalog.slot_times[-1]))
+        max_fee = st.number_input("💰 Max fee (₹, 0 = any):", min_value=0, value=0, step=50)
+    with col3:
+        min_rating = st.slider("⭐ Min rating:", min_value=0.0, max_value=5.0, value=0.0, step=0.1)
+        limit = st.number_input("Slots to show:", min_value=1, max_value=50, value=5)
+    if len(date_range) != 2:
+        st.info("Select an end date.")
+        return
+    
+    slots = booking_service.earliest_slots(specialty, date_range[0], date_range[1], limit, earliest, latest,
+                                           max_fee=max_fee or None, min_rating=min_rating or None)
+    if not slots:
+        st.warning("No free slots match these filters.")
+    chosen = None
+    for slot in slots:
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.write(f"**{slot.date:%a %d %b}** at **{slot.time}** - {slot.doctor.name} "
+                     f"(⭐ {slot.doctor.rating}, ₹{slot.doctor.fee})")
+        with col2:
+            if st.button("Book", key=f"earliest_{slot.doctor.id}_{slot.date}_{slot.time}"):
+                chosen = slot
+    
+    if chosen is not None:
+        try:
+            booking_service.book(st.session_state.get("patient_name", ""), st.session_state.get("patient_phone", ""),
+                                 st.session_state.get("patient_email", ""), chosen.doctor.name, chosen.date,
+                                 chosen.time)
+        except SlotUnavailableError:
+            st.error(f"Sorry, {chosen.time} was just booked by someone else. Please pick another slot.")
+        except BookingError as e:
+            st.error(str(e))
+        else:
+            st.markdown(BOOKING_SUCCESS, unsafe_allow_html=True)
+            st.info(f"""
+            **Booking Details:**
+            - Patient: {st.session_state.patient_name}
+            - Doctor: {chosen.doctor.name}
+            - Date: {chosen.date}
+            - Time: {chosen.time}
+            - Fee: ₹{chosen.doctor.fee}
+            """)
+
+# Patient lookup: a name prefix, phone number or email answered from the
+# in-memory patient index, so it stays instant however many appointments exist
+@st.fragment
+@metrics.timed("medbook_fragment_render_seconds", label="fragment")
+def patient_search():
+    import pandas as pd
+
+    query = st.text_input("🔍 Find a patient:", placeholder="Name, phone number or email",
+                          key="patient_search_query")
+    if not query.strip():
+        return
+    limit = 50
+    matches = booking_service.search_patients(query, limit=limit)
+    if matches:
+        st.dataframe(pd.DataFrame([apt.to_dict() for apt in matches], columns=APPOINTMENT_TABLE_COLUMNS),
+                     hide_index=True, use_container_width=True,
+                     column_config={"fee": st.column_config.NumberColumn("Fee", format="₹%d")})
+        st.caption(f"First {limit} matches" if len(matches) == limit else f"{len(matches)} matching appointments")
+    else:
+        st.info(f"No patient matches '{query.strip()}'.")
+
+# Filterable, paginated appointments table with bulk cancel
+@st.fragment
+@metrics.timed("medbook_fragment_render_seconds", label="fragment")
+def appointments_table():
+    import pandas as pd
+
+    # Appointments table: filtering, sorting and paging run in the store,
+    # so only the visible page is loaded and rendered
+    st.markdown("### 📅 Upcoming Appointments")
+    
+    # Doctors are picked within a specialty, so the page never sends the
+    # whole catalog to the browser
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        filter_date = st.date_input("Date:", value=None, key="apt_filter_date")
+    with col2:
+        filter_specialty = st.selectbox("Specialty:", ["All"] + catalog.specialties(), key="apt_filter_specialty")
+    with col3:
+        doctor_names = catalog.names(filter_specialty) if filter_specialty != "All" else ()
+        filter_doctor = st.selectbox("Doctor:", ["All", *doctor_names], disabled=not doctor_names,
+                                     key="apt_filter_doctor")
+    with col4:
+        filter_status = st.selectbox("Status:", ["All", STATUS_CONFIRMED, STATUS_CANCELLED, STATUS_NO_SHOW],
+                                     key="apt_filter_status")
+    filters = {
+        "date": filter_date.isoformat() if filter_date else None,
+        "specialty": None if filter_specialty == "All" else filter_specialty,
+        "doctor": None if filter_doctor == "All" or not doctor_names else filter_doctor,
+        "status": None if filter_status == "All" else filter_status,
+    }
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort_by = st.selectbox("Sort by:", list(SORT_COLUMNS),
+                               format_func=lambda column: column.replace("_", " ").title(),
+                               key="apt_sort_by")
+    with col2:
+        descending = st.toggle("Newest first", value=False, key="apt_descending")
+    with col3:
+        page_size = st.selectbox("Rows per page:", [25, 50, 100], key="apt_page_size")
+    
+    # Counts for the common unfiltered views come from the running statistics
+    if filters["date"] is None and filters["specialty"] is None:
+        stats = booking_service.stats()
+        match_count = stats["by_status"].get(filters["status"], 0) if filters["status"] else stats["total"]
+    else:
+        match_count = store.count_appointments(**filters)
+    page_count = max(1, (match_count + page_size - 1) // page_size)
+    page = st.number_input(f"Page (of {page_count}):", min_value=1, max_value=page_count, value=1,
+                           key="apt_page")
+    
+    rows = booking_service.list_appointments(sort_by=sort_by, descending=descending,
+                                   limit=page_size, offset=(page - 1) * page_size, **filters)
+    if rows:
+        table = pd.DataFrame([apt.to_dict() for apt in rows], columns=APPOINTMENT_TABLE_COLUMNS)
+        table.insert(0, "select", False)
+        edited = st.data_editor(
+            table,
+            hide_index=True,
+            use_container_width=True,
+            disabled=APPOINTMENT_TABLE_COLUMNS,
+            column_config={
+                "select": st.column_config.CheckboxColumn("Select"),
+                "fee": st.column_config.NumberColumn("Fee", format="₹%d"),
+            },
+            key=f"apt_table_{page}_{sort_by}_{descending}_{page_size}_{sorted(filters.items())}",
+        )
+        selected_ids = edited.loc[edited["select"] & (edited["status"] == STATUS_CONFIRMED), "id"].tolist()
+        st.caption(f"Showing {len(rows)} of {match_count} appointments")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button(f"Cancel {len(selected_ids)} selected", disabled=not selected_ids):
+                for appointment_id in selected_ids:
+                    booking_service.cancel(int(appointment_id))
+                st.rerun()
+        with col2:
+            if st.button(f"Mark {len(selected_ids)} selected as no-show", disabled=not selected_ids):
+                try:
+                    for appointment_id in selected_ids:
+                        booking_service.mark_no_show(int(appointment_id))
+                except BookingError as e:
+                    st.error(str(e))
+                else:
+                    st.rerun()
+    else:
+        st.info("No appointments match these filters.")
+
+# Bulk import of booking requests from partner files, and export of the
+# appointment history for billing. Both run in batches/chunks, so file size
+# doesn't matter; the import report lists every rejected row and why.
+@st.fragment
+@metrics.timed("medbook_fragment_render_seconds", label="fragment")
+def bulk_transfer():
+    import pandas as pd
+
+    from bulk_io import IMPORT_COLUMNS
+
+    st.markdown("#### 📥 Import Bookings")
+    st.caption("CSV or Parquet with the columns: " + ", ".join(IMPORT_COLUMNS))
+    upload = st.file_uploader("Booking requests:", type=list(BULK_FORMATS), key="import_file")
+    if st.button("Import", disabled=upload is None):
+        fmt = upload.name.rsplit(".", 1)[-1].lower()
+        try:
+            st.session_state.import_result = booking_service.import_bookings(upload, fmt)
+        except BookingError as e:
+            st.error(str(e))
+        else:
+            st.rerun()
+    result = st.session_state.get("import_result")
+    if result is not None:
+        st.success(f"✅ Booked {len(result.booked)} appointments, rejected {len(result.errors)} rows")
+        if result.errors:
+            report = pd.DataFrame(result.errors)
+            st.dataframe(report, hide_index=True, use_container_width=True)
+            st.download_button("Download error report", report.to_csv(index=False), file_name="import_errors.csv",
+                               mime="text/csv")
+    
+    st.markdown("#### 📤 Export Appointments")
+    total = booking_service.stats()["total"]
+    if total > PAGE_EXPORT_MAX_ROWS:
+        st.info(f"The history has {total:,} appointments, more than the page exports "
+                f"({PAGE_EXPORT_MAX_ROWS:,}). Use `GET /appointments/export` on the HTTP API, which streams it.")
+        return
+    st.caption("The download is built in memory. For large histories use `GET /appointments/export` "
+               "on the HTTP API, which streams it.")
+    fmt = st.radio("Format:", list(BULK_FORMATS), horizontal=True, key="export_format")
+    build = lambda: b"".join(booking_service.export_appointments(fmt))
+    if DEFERRED_DOWNLOADS:
+        # Built when clicked, and never kept in the session
+        st.download_button("Download appointments", build, file_name=f"appointments.{fmt}", mime=BULK_FORMATS[fmt])
+    elif st.button("Prepare export"):
+        # Older Streamlit needs the bytes up front: built on request and only
+        # handed to this run's download button
+        st.download_button("Download appointments", build(), file_name=f"appointments.{fmt}",
+                           mime=BULK_FORMATS[fmt])
+
+# Operations dashboard for a date range; every chart reads memoised
+# aggregates, so changing tabs or the range never scans appointments
+@st.fragment
+@metrics.timed("medbook_fragment_render_seconds", label="fragment")
+def analytics_dashboard(first_date, last_date):
+    import plotly.express as px
+
+    analytics = get_analytics()
+    date_range = st.date_input("Appointment dates:", value=(first_date, last_date), key="analytics_range")
+    if len(date_range) != 2:
+        st.info("Select an end date.")
+        return
+    start, end = (day.isoformat() for day in date_range)
+    
+    summary = analytics.summary(start, end)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Appointments", summary["total"])
+    with col2:
+        st.metric("Revenue", f"₹{summary['revenue']:,}")
+    with col3:
+        st.metric("Cancel Rate", f"{summary['cancel_rate']:.1%}")
+    with col4:
+        st.metric("No-show Rate", f"{summary['no_show_rate']:.1%}")
+    if not summary["total"]:
+        st.info("No appointments in this date range.")
+        return
+    
+    tab_specialty, tab_doctor, tab_day, tab_slots, tab_revenue = st.tabs(
+        ["By Specialty", "By Doctor", "By Day", "Slot Utilisation", "Revenue"])
+    with tab_specialty:
+        fig = px.bar(analytics.bookings_by("specialty", start, end), barmode="stack",
+                     labels={"value": "Appointments", "specialty": "Specialty"})
+        st.plotly_chart(fig, use_container_width=True)
+    with tab_doctor:
+        fig = px.bar(analytics.bookings_by("doctor", start, end).head(ANALYTICS_TOP_DOCTORS), barmode="stack",
+                     labels={"value": "Appointments", "doctor": "Doctor"})
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"Top {ANALYTICS_TOP_DOCTORS} doctors by appointments")
+    with tab_day:
+        fig = px.bar(analytics.bookings_by("date", start, end).sort_index(), barmode="stack",
+                     labels={"value": "Appointments", "date": "Date"})
+        st.plotly_chart(fig, use_container_width=True)
+    with tab_slots:
+        specialty = st.selectbox("Department:", catalog.specialties(), key="analytics_specialty")
+        doctors = [doctor.name for doctor in catalog.top_k(specialty, ANALYTICS_TOP_DOCTORS)]
+        utilisation = analytics.slot_utilisation(catalog, start, end).loc[doctors].dropna(axis=1, how="all")
+        fig = px.imshow(utilisation, text_auto=".0%",
+                        color_continuous_scale="Blues", zmin=0, zmax=1, aspect="auto",
+                        labels={"color": "Booked", "x": "Time", "y": "Doctor"})
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption("Share of days in the range on which each offered slot was booked; blank cells are slots the doctor does not offer.")
+    with tab_revenue:
+        col1, col2 = st.columns(2)
+        with col1:
+            revenue = analytics.revenue_by("specialty", start, end)
+            st.plotly_chart(px.pie(names=revenue.index, values=revenue.values, title="By Specialty"),
+                            use_container_width=True)
+        with col2:
+            revenue = analytics.revenue_by("doctor", start, end).head(ANALYTICS_TOP_DOCTORS)
+            st.plotly_chart(px.bar(x=revenue.index, y=revenue.values, title=f"Top {ANALYTICS_TOP_DOCTORS} Doctors",
+                                   labels={"x": "Doctor", "y": "Revenue (₹)"}),
+                            use_container_width=True)
+
+# Base figure of one floor (rooms, corridors, lift and stairs). It never
+# changes, so it is built once per process and routes are drawn on a copy.
+@st.cache_resource
+def get_floor_figure(level):
+    import plotly.graph_objects as go
+
+    hospital_map = get_hospital_map()
+    shapes = []
+    annotations = []
+    for room in hospital_map.rooms_on(level):
+        x0, y0, x1, y1 = room.rect
+        shapes.append(dict(type="rect", x0=x0, y0=y0, x1=x1, y1=y1,
+                           fillcolor=room.color, line=dict(color="black", width=2)))
+        annotations.append(dict(x=(x0 + x1) / 2, y=(y0 + y1) / 2, text=f"{room.name}<br>{room.number}",
+                                showarrow=False, font=dict(size=12, color="black")))
+    for points in hospital_map.corridors_on(level):
+        for (xa, ya), (xb, yb) in zip(points, points[1:]):
+            shapes.append(dict(type="line", x0=xa, y0=ya, x1=xb, y1=yb,
+                               line=dict(color="lightgray", width=14), layer="below"))
+    connectors = hospital_map.connectors_on(level)
+    fig = go.Figure(
+        data=[go.Scatter(
+            x=[connector.position[0] for connector in connectors],
+            y=[connector.position[1] for connector in connectors],
+            text=[connector.name for connector in connectors],
+            mode="markers+text",
+            textposition="top center",
+            marker=dict(symbol="square", size=14, color="dimgray"),
+            hoverinfo="text",
+        )],
+        layout=dict(
+            title=f"{hospital_map.floor_name(level)} - Main Building",
+            shapes=shapes,
+            annotations=annotations,
+            xaxis=dict(range=[-0.5, 8.5], showgrid=True),
+            yaxis=dict(range=[-0.5, 5.5], showgrid=True),
+            width=600,
+            height=400,
+            showlegend=False,
+        ),
+    )
+    return fig
+
+# Floor figure with the part of a route on that floor drawn on top. Copying
+# a figure costs more than drawing it, so each (route, floor) is built once.
+@st.cache_resource
+def get_route_figure(origin, destination, level):
+    import plotly.graph_objects as go
+
+    hospital_map = get_hospital_map()
+    route = hospital_map.route(origin, destination)
+    fig = go.Figure(get_floor_figure(level))
+    points = hospital_map.route_on_floor(route, level)
+    if points:
+        fig.add_trace(go.Scatter(
+            x=[x for x, _ in points],
+            y=[y for _, y in points],
+            mode="lines+markers",
+            line=dict(color="#667eea", width=5),
+            marker=dict(size=[14] + [6] * (len(points) - 2) + [14] if len(points) > 1 else [14]),
+            hoverinfo="skip",
+        ))
+    return fig
+
+# Route finder: origin/destination pickers, directions and the route overlay
+@st.fragment
+@metrics.timed("medbook_fragment_render_seconds", label="fragment")
+def hospital_navigator():
+    hospital_map = get_hospital_map()
+    room_names = list(hospital_map.rooms)
+    col1, col2 = st.columns([2, 1])
+    
+    with col2:
+        st.markdown("### 🎯 Quick Navigation")
+        origin = st.selectbox("You are at:", room_names, index=room_names.index("Reception"))
+        destination = st.selectbox("Select Department:", room_names)
+        
+        room = hospital_map.rooms[destination]
+        st.info(f"""
+        **📍 {room.name}**  
+        🏢 Floor: {hospital_map.floor_name(room.floor)}  
+        🚪 Room: {room.number}  
+        📞 Phone: {room.phone or "-"}
+        """)
+        
+        route = hospital_map.route(origin, destination)
+        if route:
+            st.markdown("**🧭 Directions:**")
+            st.markdown("\n".join(f"{step_no}. {step}" for step_no, step in enumerate(route.directions, start=1)))
+    
+    with col1:
+        st.markdown("### 🏥 Interactive Floor Plan")
+        if route is None:
+            st.plotly_chart(get_floor_figure(room.floor), use_container_width=True)
+        else:
+            floors = hospital_map.route_floors(route)
+            tabs = st.tabs([hospital_map.floor_name(level) for level in floors])
+            for tab, level in zip(tabs, floors):
+                with tab:
+                    st.plotly_chart(get_route_figure(origin, destination, level), use_container_width=True)
+
+@st.fragment
+@metrics.timed("medbook_fragment_render_seconds", label="fragment")
+def ambulance_panel():
+    if st.button("🚨 CALL AMBULANCE NOW", type="primary", use_container_width=True):
+        st.success("🚑 Ambulance dispatched! ETA: 8-12 minutes")
+        st.info("**Emergency Team Notified**\nStay calm and wait for medical assistance.")
+
+@st.fragment
+@metrics.timed("medbook_fragment_render_seconds", label="fragment")
+def emergency_assistant():
+    emergency_symptoms = st.text_area(
+        "Describe the emergency situation:",
+        placeholder="e.g., severe chest pain, difficulty breathing, unconscious person..."
+    )
+    
+    if st.button("Get Emergency Guidance 🔍"):
+        if emergency_symptoms and st.session_state.gemini_api_key:
+            st.markdown("### 🚨 Emergency Guidance")
+            fallback_area = st.empty()
+            guidance_area = st.empty()
+            with st.spinner("Analyzing emergency situation..."):
+                guidance = get_emergency_guidance(
+                    emergency_symptoms,
+                    on_text=guidance_area.warning,
+                    on_fallback=lambda: fallback_area.info(FIRST_AID_FALLBACK),
+                    on_queued=lambda ahead: guidance_area.info(f"⏳ Prioritised: {ahead} ahead of you...")
+                )
+            guidance_area.warning(guidance)
+            
+            latency = stream_stats.summary()
+            if latency["count"]:
+                st.caption(f"⏱️ Median first response {latency['first_chunk_p50_ms'] or 0:.0f} ms, "
+                           f"full answer {latency['total_p50_ms']:.0f} ms "
+                           f"over the last {latency['count']} requests")
+            
+            st.error("""
+            **⚠️ IMPORTANT REMINDERS:**
+            - If life-threatening, call ambulance immediately
+            - Don't leave the patient alone
+            - Keep airways clear
+            - Apply pressure to bleeding wounds
+            - Stay calm and follow medical guidance
+            """)
+        else:
+            st.warning("Please describe the symptoms and ensure API key is configured.")
 
 # Main header
-st.markdown("""
-<div class="main-header">
-    <h1>🏥 MedBook - Smart Hospital System</h1>
-    <p>Your Health, Our Priority - Book appointments with ease</p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(MAIN_HEADER, unsafe_allow_html=True)
 
 # Sidebar for API key
 with st.sidebar:
@@ -175,14 +770,53 @@ with st.sidebar:
         st.success("✅ API Key Configured")
     else:
         st.warning("⚠️ Please enter your Gemini API key for AI features")
+    
+    cache_stats = recommendation_cache.stats()
+    st.caption(f"🧠 AI cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+               f"({cache_stats['entries']} cached)")
+    
+    if ADMIN_PANEL:
+        with st.expander("🛠️ Admin: Metrics"):
+            snapshot = metrics.snapshot()
+            if snapshot["histograms"]:
+                import pandas as pd
 
-# Navigation menu
+                st.dataframe(pd.DataFrame([
+                    {"metric": h["name"].replace("medbook_", "").replace("_seconds", ""),
+                     "labels": ", ".join(f"{k}={v}" for k, v in h["labels"].items()),
+                     "count": h["count"],
+                     "mean ms": round(h["sum"] / h["count"] * 1000, 1),
+                     "p95 ≤ ms": float("inf") if h["p95"] == "+Inf" else h["p95"] * 1000}
+                    for h in snapshot["histograms"]
+                ]), hide_index=True, use_container_width=True)
+            for series in snapshot["counters"] + snapshot["gauges"]:
+                st.caption(f"{series['name']}: {series['value']}")
+            outbox = booking_service.notifier.counts()
+            queue_counts = triage_queue.counts()
+            st.caption(f"🧠 AI queue: {queue_counts['queued']} waiting, {queue_counts['running']} running")
+            st.caption("📬 Outbox: " + ", ".join(f"{count} {status}" for status, count in sorted(outbox.items()))
+                       if outbox else "📬 Outbox: empty")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button("Prometheus", metrics.to_prometheus(), file_name="medbook_metrics.txt")
+            with col2:
+                st.download_button("JSON", json.dumps(snapshot, indent=2), file_name="medbook_metrics.json")
+            if st.button("🔬 Profile next rerun"):
+                st.session_state.profile_next_run = True
+                st.rerun()
+
+# Navigation menu. ?page=<slug> (e.g. ?page=my-appointments) opens a page
+# directly, for bookmarks and the page benchmarks.
+PAGES = ["🏠 Home", "📅 Book Appointment", "📋 My Appointments", "🗺️ Hospital Navigation", "🚨 Emergency",
+         "📊 Analytics"]
+PAGE_SLUGS = [page.split(" ", 1)[1].lower().replace(" ", "-") for page in PAGES]
+requested_page = st.query_params.get("page", "")
 selected = option_menu(
     menu_title=None,
-    options=["🏠 Home", "📅 Book Appointment", "📋 My Appointments", "🗺️ Hospital Navigation", "🚨 Emergency"],
-    icons=["house", "calendar-plus", "list-task", "map", "exclamation-triangle"],
+    options=PAGES,
+    icons=["house", "calendar-plus", "list-task", "map", "exclamation-triangle", "bar-chart"],
     menu_icon="cast",
-    default_index=0,
+    default_index=PAGE_SLUGS.index(requested_page) if requested_page in PAGE_SLUGS else 0,
     orientation="horizontal",
     styles={
         "container": {"padding": "0!important", "background-color": "#fafafa"},
@@ -197,45 +831,14 @@ selected = option_menu(
     },
 )
 
+page_started = time.perf_counter()
+
 # Home Page
 if selected == "🏠 Home":
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown("""
-        <div class="metric-card">
-            <h3 style="color: #667eea;">👨‍⚕️ Doctors</h3>
-            <h2>50+</h2>
-            <p>Specialist Doctors</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div class="metric-card">
-            <h3 style="color: #667eea;">🏥 Departments</h3>
-            <h2>15</h2>
-            <p>Medical Departments</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown("""
-        <div class="metric-card">
-            <h3 style="color: #667eea;">⭐ Rating</h3>
-            <h2>4.8</h2>
-            <p>Patient Satisfaction</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown("""
-        <div class="metric-card">
-            <h3 style="color: #667eea;">📅 Appointments</h3>
-            <h2>{}</h2>
-            <p>Booked Today</p>
-        </div>
-        """.format(len(st.session_state.appointments)), unsafe_allow_html=True)
+    booked_today = BOOKED_TODAY_CARD.format(booking_service.stats()["booked_today"])
+    for column, card in zip(st.columns(4), HOME_METRIC_CARDS + (booked_today,)):
+        with column:
+            st.markdown(card, unsafe_allow_html=True)
     
     st.markdown("### 🔥 Featured Services")
     col1, col2, col3 = st.columns(3)
@@ -255,232 +858,54 @@ elif selected == "📅 Book Appointment":
     
     # AI Recommendation Section
     with st.expander("🤖 Get AI Doctor Recommendation", expanded=False):
-        col1, col2 = st.columns(2)
-        with col1:
-            symptoms = st.text_area("Describe your symptoms:", placeholder="e.g., chest pain, headache, skin rash...")
-            age = st.number_input("Age:", min_value=1, max_value=120, value=30)
-        with col2:
-            gender = st.selectbox("Gender:", ["Male", "Female", "Other"])
-            
-        if st.button("Get AI Recommendation 🔍"):
-            if symptoms and st.session_state.gemini_api_key:
-                with st.spinner("Analyzing symptoms..."):
-                    recommendation = get_ai_recommendation(symptoms, age, gender)
-                st.success("**AI Recommendation:**")
-                st.write(recommendation)
-    
-    # Booking Form
-    col1, col2 = st.columns(2)
+        ai_recommendation_panel()
     
-    with col1:
-        patient_name = st.text_input("👤 Patient Name:", placeholder="Enter your full name")
-        phone = st.text_input("📱 Phone Number:", placeholder="+91 9876543210")
-        email = st.text_input("📧 Email:", placeholder="patient@email.com")
-        
-    with col2:
-        appointment_date = st.date_input("📅 Appointment Date:", 
-                                       min_value=datetime.now().date(),
-                                       max_value=datetime.now().date() + timedelta(days=30))
-        specialty = st.selectbox("🏥 Select Department:", 
-                               ["Cardiology", "Neurology", "Dermatology", "Orthopedics", "Pediatrics", "Gynecology"])
-        
-    # Doctor selection based on specialty
-    available_doctors = [doc for doc in st.session_state.doctors_data if doc["specialty"] == specialty]
+    booking_form()
     
-    if available_doctors:
-        st.markdown("### 👨‍⚕️ Available Doctors")
-        
-        for idx, doctor in enumerate(available_doctors):
-            with st.container():
-                st.markdown(f"""
-                <div class="doctor-card">
-                    <h4>{doctor['name']}</h4>
-                    <p><strong>Specialty:</strong> {doctor['specialty']} | <strong>Experience:</strong> {doctor['experience']}</p>
-                    <p><strong>Rating:</strong> {'⭐' * int(doctor['rating'])} {doctor['rating']} | <strong>Fee:</strong> ₹{doctor['fee']}</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    selected_doctor = st.checkbox(f"Select {doctor['name']}", key=f"doc_{idx}")
-                with col2:
-                    if selected_doctor:
-                        time_slot = st.selectbox(f"Available Time Slots:", 
-                                               doctor['available_slots'], 
-                                               key=f"slot_{idx}")
-                
-                if selected_doctor and st.button(f"Book with {doctor['name']}", key=f"book_{idx}"):
-                    if patient_name and phone and email:
-                        appointment = {
-                            "id": len(st.session_state.appointments) + 1,
-                            "patient_name": patient_name,
-                            "phone": phone,
-                            "email": email,
-                            "doctor": doctor['name'],
-                            "specialty": doctor['specialty'],
-                            "date": appointment_date.strftime("%Y-%m-%d"),
-                            "time": time_slot,
-                            "fee": doctor['fee'],
-                            "status": "Confirmed",
-                            "booking_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        }
-                        st.session_state.appointments.append(appointment)
-                        
-                        st.markdown("""
-                        <div class="success-message">
-                            ✅ Appointment Booked Successfully!<br>
-                            You will receive a confirmation SMS and Email shortly.
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        # Show booking details
-                        st.info(f"""
-                        **Booking Details:**
-                        - Patient: {patient_name}
-                        - Doctor: {doctor['name']}
-                        - Date: {appointment_date}
-                        - Time: {time_slot}
-                        - Fee: ₹{doctor['fee']}
-                        """)
-                    else:
-                        st.error("Please fill in all patient details!")
+    with st.expander("⚡ Find the Earliest Free Slot", expanded=False):
+        earliest_slot_finder()
 
 # My Appointments Page
 elif selected == "📋 My Appointments":
     st.header("📋 My Appointments")
     
-    if st.session_state.appointments:
+    stats = booking_service.stats()
+    if stats["total"]:
         # Statistics
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Total Appointments", len(st.session_state.appointments))
+            st.metric("Total Appointments", stats["total"])
         with col2:
-            confirmed = len([apt for apt in st.session_state.appointments if apt['status'] == 'Confirmed'])
-            st.metric("Confirmed", confirmed)
+            st.metric("Confirmed", stats["confirmed"])
         with col3:
-            total_fee = sum([apt['fee'] for apt in st.session_state.appointments])
-            st.metric("Total Fee", f"₹{total_fee}")
-        
-        # Appointments list
-        st.markdown("### 📅 Upcoming Appointments")
+            st.metric("Total Fee", f"₹{stats['revenue']}")
         
-        for apt in st.session_state.appointments:
-            with st.container():
-                col1, col2, col3 = st.columns([3, 2, 1])
-                
-                with col1:
-                    st.markdown(f"""
-                    **🏥 {apt['doctor']}** - {apt['specialty']}  
-                    📅 {apt['date']} at {apt['time']}  
-                    👤 Patient: {apt['patient_name']}
-                    """)
-                
-                with col2:
-                    st.markdown(f"""
-                    💰 Fee: ₹{apt['fee']}  
-                    📱 {apt['phone']}  
-                    ✅ Status: {apt['status']}
-                    """)
-                
-                with col3:
-                    if st.button("Cancel", key=f"cancel_{apt['id']}"):
-                        st.session_state.appointments = [a for a in st.session_state.appointments if a['id'] != apt['id']]
-                        st.experimental_rerun()
-                
-                st.divider()
+        patient_search()
+        appointments_table()
     else:
         st.info("No appointments booked yet. Book your first appointment!")
         if st.button("Book Appointment Now"):
             st.session_state.selected = "📅 Book Appointment"
+    
+    with st.expander("📦 Bulk Import & Export", expanded=False):
+        bulk_transfer()
 
 # Hospital Navigation Page
 elif selected == "🗺️ Hospital Navigation":
     st.header("🗺️ Hospital Navigation")
     
-    # Hospital floor plan
-    col1, col2 = st.columns([2, 1])
+    hospital_navigator()
     
-    with col1:
-        st.markdown("### 🏥 Interactive Floor Plan")
-        
-        # Create a simple floor plan using plotly
-        fig = go.Figure()
-        
-        # Add rooms
-        rooms = [
-            {"name": "Reception", "x": [0, 2], "y": [0, 1], "color": "lightblue"},
-            {"name": "Emergency", "x": [2, 4], "y": [0, 1], "color": "red"},
-            {"name": "Cardiology", "x": [0, 2], "y": [1, 2], "color": "lightgreen"},
-            {"name": "Neurology", "x": [2, 4], "y": [1, 2], "color": "lightyellow"},
-            {"name": "Pharmacy", "x": [0, 1], "y": [2, 3], "color": "lightcoral"},
-            {"name": "Lab", "x": [1, 3], "y": [2, 3], "color": "lightgray"},
-            {"name": "Cafeteria", "x": [3, 4], "y": [2, 3], "color": "lightpink"}
-        ]
-        
-        for room in rooms:
-            fig.add_shape(
-                type="rect",
-                x0=room["x"][0], y0=room["y"][0],
-                x1=room["x"][1], y1=room["y"][1],
-                fillcolor=room["color"],
-                line=dict(color="black", width=2)
-            )
-            
-            # Add room labels
-            fig.add_annotation(
-                x=(room["x"][0] + room["x"][1]) / 2,
-                y=(room["y"][0] + room["y"][1]) / 2,
-                text=room["name"],
-                showarrow=False,
-                font=dict(size=12, color="black")
-            )
-        
-        fig.update_layout(
-            title="Ground Floor - Main Building",
-            xaxis=dict(range=[-0.5, 4.5], showgrid=True),
-            yaxis=dict(range=[-0.5, 3.5], showgrid=True),
-            width=600,
-            height=400,
-            showlegend=False
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+    col1, col2 = st.columns(2)
     
-    with col2:
-        st.markdown("### 🎯 Quick Navigation")
-        
-        department = st.selectbox("Select Department:", 
-                                ["Reception", "Emergency", "Cardiology", "Neurology", 
-                                 "Dermatology", "Orthopedics", "Pediatrics", "Pharmacy", "Lab"])
-        
-        # Department information
-        dept_info = {
-            "Reception": {"floor": "Ground Floor", "room": "101", "phone": "+91-11-2345-6789"},
-            "Emergency": {"floor": "Ground Floor", "room": "102-105", "phone": "+91-11-2345-9999"},
-            "Cardiology": {"floor": "First Floor", "room": "201-205", "phone": "+91-11-2345-6701"},
-            "Neurology": {"floor": "First Floor", "room": "206-210", "phone": "+91-11-2345-6702"},
-            "Dermatology": {"floor": "Second Floor", "room": "301-303", "phone": "+91-11-2345-6703"},
-            "Orthopedics": {"floor": "Second Floor", "room": "304-308", "phone": "+91-11-2345-6704"},
-            "Pediatrics": {"floor": "Third Floor", "room": "401-405", "phone": "+91-11-2345-6705"},
-            "Pharmacy": {"floor": "Ground Floor", "room": "110", "phone": "+91-11-2345-6706"},
-            "Lab": {"floor": "Ground Floor", "room": "111-113", "phone": "+91-11-2345-6707"}
-        }
-        
-        if department in dept_info:
-            info = dept_info[department]
-            st.info(f"""
-            **📍 {department}**  
-            🏢 Floor: {info['floor']}  
-            🚪 Room: {info['room']}  
-            📞 Phone: {info['phone']}
-            """)
-        
+    with col1:
         st.markdown("### 🚗 Parking Information")
         st.success("🅿️ **Free Parking Available**")
         st.write("- Ground Level: 2-wheeler parking")
         st.write("- Basement 1: Car parking")
         st.write("- Basement 2: Ambulance bay")
-        
+    
+    with col2:
         st.markdown("### 🕐 Hospital Hours")
         st.write("- **OPD:** 8:00 AM - 8:00 PM")
         st.write("- **Emergency:** 24/7")
@@ -489,21 +914,14 @@ elif selected == "🗺️ Hospital Navigation":
 
 # Emergency Page
 elif selected == "🚨 Emergency":
-    st.markdown("""
-    <div style="background: linear-gradient(45deg, #ff6b6b, #ee5a52); padding: 2rem; border-radius: 15px; text-align: center; color: white; margin-bottom: 2rem;">
-        <h1>🚨 EMERGENCY SERVICES</h1>
-        <h3>24/7 Emergency Care Available</h3>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(EMERGENCY_BANNER, unsafe_allow_html=True)
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### 🆘 Emergency Contacts")
         
-        if st.button("🚨 CALL AMBULANCE NOW", type="primary", use_container_width=True):
-            st.success("🚑 Ambulance dispatched! ETA: 8-12 minutes")
-            st.info("**Emergency Team Notified**\nStay calm and wait for medical assistance.")
+        ambulance_panel()
         
         st.markdown("""
         **📞 Emergency Hotlines:**
@@ -527,29 +945,7 @@ elif selected == "🚨 Emergency":
     with col2:
         st.markdown("### 🤖 AI Emergency Assistant")
         
-        emergency_symptoms = st.text_area(
-            "Describe the emergency situation:",
-            placeholder="e.g., severe chest pain, difficulty breathing, unconscious person..."
-        )
-        
-        if st.button("Get Emergency Guidance 🔍"):
-            if emergency_symptoms and st.session_state.gemini_api_key:
-                with st.spinner("Analyzing emergency situation..."):
-                    guidance = get_emergency_guidance(emergency_symptoms)
-                
-                st.markdown("### 🚨 Emergency Guidance")
-                st.warning(guidance)
-                
-                st.error("""
-                **⚠️ IMPORTANT REMINDERS:**
-                - If life-threatening, call ambulance immediately
-                - Don't leave the patient alone
-                - Keep airways clear
-                - Apply pressure to bleeding wounds
-                - Stay calm and follow medical guidance
-                """)
-            else:
-                st.warning("Please describe the symptoms and ensure API key is configured.")
+        emergency_assistant()
         
         st.markdown("### 🏥 Emergency Departments")
         st.info("""
@@ -562,12 +958,28 @@ elif selected == "🚨 Emergency":
         - 🧪 Poison Control
         """)
 
+# Analytics Page
+elif selected == "📊 Analytics":
+    st.header("📊 Analytics")
+    
+    analytics = get_analytics()
+    analytics.refresh()
+    first_date, last_date = analytics.date_range()
+    if first_date is None:
+        st.info("No appointments booked yet. Charts appear once bookings come in.")
+    else:
+        analytics_dashboard(datetime.fromisoformat(first_date).date(), datetime.fromisoformat(last_date).date())
+
 # Footer
-st.markdown("""
----
-<div style="text-align: center; color: #666; padding: 2rem;">
-    <h4>🏥 MedBook Hospital System</h4>
-    <p>Your Health, Our Priority | Available 24/7</p>
-    <p>📞 Emergency: +91-11-2345-9999 | 📧 info@medbook.hospital</p>
-</div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+st.markdown(FOOTER, unsafe_allow_html=True)
+
+metrics.observe("medbook_page_render_seconds", time.perf_counter() - page_started,
+                page=PAGE_SLUGS[PAGES.index(selected)])
+
+finished_profile = st.session_state.pop("active_profile", None)
+if finished_profile is not None:
+    finished_profile.disable()
+    st.session_state.profile_report = format_profile(finished_profile)
+if ADMIN_PANEL and "profile_report" in st.session_state:
+    with st.sidebar.expander("🔬 Last rerun profile"):
+        st.code(st.session_state.profile_report)
\ No newline at end of file
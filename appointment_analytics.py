@@ -0,0 +1,163 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from appointment_book import STATUS_CANCELLED, STATUS_CONFIRMED, STATUS_NO_SHOW
+
+# Dimensions every aggregate is broken down by
+CUBE_KEYS = ["date", "doctor", "specialty", "time", "status"]
+
+# Rows per read when loading the appointment history
+LOAD_CHUNK_ROWS = 200_000
+
+
+def _aggregate(frame):
+    for column in ("doctor", "specialty", "time", "status"):
+        frame[column] = frame[column].astype("category")
+    frame["revenue"] = np.where(frame["status"] == STATUS_CONFIRMED, frame["fee"], 0)
+    cube = frame.groupby(CUBE_KEYS, observed=True).agg(count=("fee", "size"), revenue=("revenue", "sum"))
+    cube.index = cube.index.set_levels([level.astype(str) for level in cube.index.levels])
+    return cube
+
+
+def _empty_cube():
+    index = pd.MultiIndex.from_tuples([], names=CUBE_KEYS)
+    return pd.DataFrame({"count": [], "revenue": []}, index=index, dtype="int64")
+
+
+def _merge(cube, delta):
+    if cube.empty:
+        return delta
+    merged = cube.add(delta, fill_value=0)
+    return merged[merged["count"] != 0].astype("int64")
+
+
+# Operational analytics over the whole appointment history.
+# Appointments are reduced to a small aggregate "cube" of counts and revenue
+# per (date, doctor, specialty, time, status); every chart is a groupby over
+# the cube rather than over individual appointments. refresh() folds in rows
+# with ids above the last one seen and the store's status-change journal, so
+# new bookings and cancellations never trigger a full recompute. Views are
+# memoised until the next change, including changes made by other processes
+# sharing the database.
+class AppointmentAnalytics:
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.RLock()
+        self._cube = _empty_cube()
+        self._high_water = 0
+        self._journal_position = 0
+        self._views = {}
+        self.version = 0
+        self.refresh()
+
+    # Brings the aggregates up to date; returns True if anything changed.
+    # New rows are read from a snapshot that already reflects every journaled
+    # change up to its position, so those changes are applied only to rows
+    # counted by an earlier refresh.
+    def refresh(self):
+        with self._lock:
+            conn, max_id, position = self.store.open_snapshot()
+            try:
+                counted = self._high_water
+                changed = False
+                if max_id > counted:
+                    chunks = pd.read_sql_query(
+                        "SELECT date, doctor, specialty, time, status, fee FROM appointments "
+                        "WHERE id > ? AND id <= ?",
+                        conn, params=(counted, max_id), chunksize=LOAD_CHUNK_ROWS,
+                    )
+                    for chunk in chunks:
+                        self._cube = _merge(self._cube, _aggregate(chunk))
+                    self._high_water = max_id
+                    changed = True
+            finally:
+                conn.close()
+
+            changes = self.store.status_changes(self._journal_position, position, counted) if counted else []
+            self._journal_position = position
+            if changes:
+                rows = []
+                for apt, old_status in changes:
+                    rows.append((apt.date, apt.doctor, apt.specialty, apt.time, old_status, apt.fee, -1))
+                    rows.append((apt.date, apt.doctor, apt.specialty, apt.time, apt.status, apt.fee, 1))
+                delta = pd.DataFrame(rows, columns=CUBE_KEYS + ["fee", "sign"])
+                delta["revenue"] = np.where(delta["status"] == STATUS_CONFIRMED, delta["fee"], 0) * delta["sign"]
+                delta = delta.groupby(CUBE_KEYS).agg(count=("sign", "sum"), revenue=("revenue", "sum"))
+                self._cube = _merge(self._cube, delta)
+                changed = True
+
+            if changed:
+                self.version += 1
+                self._views.clear()
+            return changed
+
+    # Aggregate rows with an appointment date in [start, end] (ISO strings, inclusive)
+    def _window(self, start=None, end=None):
+        key = ("window", start, end)
+        if key not in self._views:
+            cube = self._cube.reset_index()
+            if start is not None:
+                cube = cube[cube["date"] >= start]
+            if end is not None:
+                cube = cube[cube["date"] <= end]
+            self._views[key] = cube
+        return self._views[key]
+
+    def _memo(self, name, start, end, build):
+        key = (name, start, end)
+        with self._lock:
+            if key not in self._views:
+                self._views[key] = build(self._window(start, end))
+            return self._views[key]
+
+    def date_range(self):
+        if self._cube.empty:
+            return None, None
+        dates = self._cube.index.get_level_values("date")
+        return dates.min(), dates.max()
+
+    def summary(self, start=None, end=None):
+        def build(cube):
+            by_status = cube.groupby("status")["count"].sum()
+            total = int(by_status.sum())
+            cancelled = int(by_status.get(STATUS_CANCELLED, 0))
+            no_show = int(by_status.get(STATUS_NO_SHOW, 0))
+            return {
+                "total": total,
+                "confirmed": int(by_status.get(STATUS_CONFIRMED, 0)),
+                "cancelled": cancelled,
+                "no_show": no_show,
+                "revenue": int(cube["revenue"].sum()),
+                "cancel_rate": cancelled / total if total else 0.0,
+                "no_show_rate": no_show / total if total else 0.0,
+            }
+        return self._memo("summary", start, end, build)
+
+    # Appointment counts per value of one dimension, one column per status
+    def bookings_by(self, dimension, start=None, end=None):
+        def build(cube):
+            table = cube.pivot_table(index=dimension, columns="status", values="count",
+                                     aggfunc="sum", fill_value=0)
+            return table.loc[table.sum(axis=1).sort_values(ascending=False).index]
+        return self._memo(f"by_{dimension}", start, end, build)
+
+    def revenue_by(self, dimension, start=None, end=None):
+        def build(cube):
+            return cube.groupby(dimension)["revenue"].sum().sort_values(ascending=False)
+        return self._memo(f"revenue_{dimension}", start, end, build)
+
+    # Share of offered slots that were booked (and not cancelled) per doctor
+    # and time; NaN where the doctor does not offer that time
+    def slot_utilisation(self, catalog, start, end):
+        def build(cube):
+            days = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+            booked = cube[cube["status"] != STATUS_CANCELLED].pivot_table(
+                index="doctor", columns="time", values="count", aggfunc="sum", fill_value=0)
+            times = sorted({slot for doctor in catalog.doctors for slot in doctor.available_slots})
+            names = [doctor.name for doctor in catalog.doctors]
+            booked = booked.reindex(index=names, columns=times, fill_value=0)
+            offered = np.array([[slot in doctor.available_slots for slot in times] for doctor in catalog.doctors])
+            return booked.where(offered) / days
+        return self._memo("utilisation", start, end, build)
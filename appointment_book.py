@@ -0,0 +1,88 @@
+STATUS_CONFIRMED = "Confirmed"
+STATUS_CANCELLED = "Cancelled"
+STATUS_NO_SHOW = "No-show"
+
+FIELDS = ("id", "patient_name", "phone", "email", "doctor", "specialty",
+          "date", "time", "fee", "status", "booking_time")
+
+
+# One appointment. __slots__ keeps each record to a fixed set of attribute
+# slots instead of a per-instance dict.
+class Appointment:
+    __slots__ = FIELDS
+
+    def __init__(self, id, patient_name, phone, email, doctor, specialty, date, time, fee,
+                 status=STATUS_CONFIRMED, booking_time=None):
+        self.id = id
+        self.patient_name = patient_name
+        self.phone = phone
+        self.email = email
+        self.doctor = doctor
+        self.specialty = specialty
+        self.date = date
+        self.time = time
+        self.fee = fee
+        self.status = status
+        self.booking_time = booking_time
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def __repr__(self):
+        return f"Appointment(id={self.id}, doctor={self.doctor!r}, date={self.date}, time={self.time}, status={self.status})"
+
+
+# In-memory appointment collection with a primary index by id and secondary
+# indexes by (doctor, date) and by patient phone. Every index is a dict, so
+# insert, lookup and cancel are O(1); ids are assigned by the caller and
+# must never be reused (the store takes them from SQLite AUTOINCREMENT).
+class AppointmentBook:
+    def __init__(self):
+        self._by_id = {}
+        self._by_doctor_date = {}
+        self._by_phone = {}
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, appointment_id):
+        return appointment_id in self._by_id
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def add(self, appointment):
+        self._by_id[appointment.id] = appointment
+        if appointment.status == STATUS_CONFIRMED:
+            self._by_doctor_date.setdefault((appointment.doctor, appointment.date), {})[appointment.id] = appointment
+        self._by_phone.setdefault(appointment.phone, {})[appointment.id] = appointment
+
+    def get(self, appointment_id):
+        return self._by_id.get(appointment_id)
+
+    # Moves a confirmed appointment to a final status (cancelled or no-show)
+    # and drops it from the active slot index; it stays in the patient's
+    # history. Returns None if it was not confirmed.
+    def close(self, appointment_id, status):
+        appointment = self._by_id.get(appointment_id)
+        if appointment is None or appointment.status != STATUS_CONFIRMED:
+            return None
+        appointment.status = status
+        key = (appointment.doctor, appointment.date)
+        bucket = self._by_doctor_date.get(key)
+        if bucket is not None:
+            bucket.pop(appointment_id, None)
+            if not bucket:
+                del self._by_doctor_date[key]
+        return appointment
+
+    def cancel(self, appointment_id):
+        return self.close(appointment_id, STATUS_CANCELLED)
+
+    # Confirmed appointments for a doctor on a date
+    def for_doctor(self, doctor, date):
+        return list(self._by_doctor_date.get((doctor, date), {}).values())
+
+    # Every appointment booked under a phone number, oldest first
+    def for_phone(self, phone):
+        return list(self._by_phone.get(phone, {}).values())
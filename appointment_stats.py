@@ -0,0 +1,60 @@
+import threading
+from collections import Counter
+from datetime import date
+
+from appointment_book import STATUS_CONFIRMED
+
+
+# Running totals over all appointments, updated in O(1) on every booking and
+# cancel so pages can show them without touching the appointment list.
+# Per-day, per-doctor and per-specialty counts and revenue cover confirmed
+# appointments only; by_status counts every appointment.
+class AppointmentStats:
+    def __init__(self, appointments=()):
+        self._lock = threading.Lock()
+        self.by_status = Counter()
+        self.by_day = Counter()
+        self.by_doctor = Counter()
+        self.by_specialty = Counter()
+        self.revenue = 0
+        for appointment in appointments:
+            self._add(appointment)
+
+    def _add(self, appointment):
+        self.by_status[appointment.status] += 1
+        if appointment.status == STATUS_CONFIRMED:
+            self._count_confirmed(appointment, 1)
+
+    def _count_confirmed(self, appointment, delta):
+        self.by_day[appointment.booking_time[:10]] += delta
+        self.by_doctor[appointment.doctor] += delta
+        self.by_specialty[appointment.specialty] += delta
+        self.revenue += delta * appointment.fee
+
+    def record_booking(self, appointment):
+        with self._lock:
+            self._add(appointment)
+
+    def record_status_change(self, appointment, old_status):
+        with self._lock:
+            self.by_status[old_status] -= 1
+            self.by_status[appointment.status] += 1
+            if old_status == STATUS_CONFIRMED:
+                self._count_confirmed(appointment, -1)
+            elif appointment.status == STATUS_CONFIRMED:
+                self._count_confirmed(appointment, 1)
+
+    # Point-in-time copy that is safe to read while bookings continue
+    # (unary + drops the zero counts left behind by cancellations)
+    def snapshot(self):
+        with self._lock:
+            return {
+                "total": sum(self.by_status.values()),
+                "confirmed": self.by_status[STATUS_CONFIRMED],
+                "by_status": +self.by_status,
+                "revenue": self.revenue,
+                "booked_today": self.by_day[date.today().isoformat()],
+                "by_day": +self.by_day,
+                "by_doctor": +self.by_doctor,
+                "by_specialty": +self.by_specialty,
+            }
@@ -0,0 +1,349 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from appointment_book import (Appointment, AppointmentBook, FIELDS, STATUS_CANCELLED, STATUS_CONFIRMED,
+                              STATUS_NO_SHOW)
+from appointment_stats import AppointmentStats
+from patient_index import PatientIndex
+
+# Default location of the shared appointment database
+DEFAULT_DB_PATH = os.environ.get(
+    "MEDBOOK_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "medbook.db")
+)
+
+SELECT_COLUMNS = ", ".join(FIELDS)
+
+# An appointment row as of a journaled status change (appointments a joined
+# with appointment_status_changes c)
+CHANGE_COLUMNS = ", ".join("c.new_status" if field == "status" else f"a.{field}" for field in FIELDS)
+
+# Sort keys accepted by list_appointments() and the columns they order by
+SORT_COLUMNS = {
+    "date": ("date", "time", "id"),
+    "booking_time": ("booking_time", "id"),
+    "doctor": ("doctor", "date", "time", "id"),
+    "patient_name": ("patient_name", "id"),
+    "fee": ("fee", "id"),
+    "status": ("status", "date", "time", "id"),
+}
+
+
+# Raised when a confirmed appointment already holds the doctor's slot
+class SlotUnavailableError(Exception):
+    pass
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS appointments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_name TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    email TEXT NOT NULL,
+    doctor TEXT NOT NULL,
+    specialty TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    fee INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    booking_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_slot ON appointments (doctor, date, time);
+CREATE INDEX IF NOT EXISTS idx_appointments_phone ON appointments (phone);
+CREATE INDEX IF NOT EXISTS idx_appointments_status ON appointments (status);
+CREATE INDEX IF NOT EXISTS idx_appointments_date ON appointments (date);
+CREATE INDEX IF NOT EXISTS idx_appointments_specialty ON appointments (specialty);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_appointments_confirmed_slot
+    ON appointments (doctor, date, time) WHERE status = 'Confirmed';
+CREATE TABLE IF NOT EXISTS appointment_status_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    appointment_id INTEGER NOT NULL,
+    old_status TEXT NOT NULL,
+    new_status TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS trg_appointments_status_change
+AFTER UPDATE OF status ON appointments WHEN OLD.status <> NEW.status
+BEGIN
+    INSERT INTO appointment_status_changes (appointment_id, old_status, new_status)
+    VALUES (NEW.id, OLD.status, NEW.status);
+END;
+"""
+
+
+# SQLite-backed appointment repository shared by every session of the process.
+# Each thread gets its own connection; WAL mode lets readers run alongside a writer.
+# Records are mirrored in an AppointmentBook so lookups by id, doctor/date and
+# phone, and cancels, don't need a query. AUTOINCREMENT guarantees an id is
+# never handed out twice, even after the newest row is cancelled.
+# Running counters for the dashboards are kept in self.stats, the patient
+# search index in self.patients. Every status change is journaled in the
+# database by a trigger, so consumers such as the analytics cache can catch up.
+# Other processes (the HTTP API, more Streamlit servers) may write to the same
+# database; sync() pulls their bookings and status changes into the mirror,
+# and hands them to the callables in self.listeners (the slot inventory).
+class AppointmentStore:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.book = AppointmentBook()
+        self.listeners = []
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        # Connection used only to read what other connections committed
+        self._sync_conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._data_version = self._sync_conn.execute("PRAGMA data_version").fetchone()[0]
+        self._high_water = 0
+        self._sync_conn.execute("BEGIN")
+        try:
+            self._change_seq = self._sync_conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM appointment_status_changes").fetchone()[0]
+            for row in self._sync_conn.execute(f"SELECT {SELECT_COLUMNS} FROM appointments ORDER BY id"):
+                self.book.add(Appointment(*row))
+                self._high_water = row[0]
+        finally:
+            self._sync_conn.commit()
+        self.stats = AppointmentStats(self.book)
+        self.patients = PatientIndex(self.book)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # on_insert(conn, [appointment]) runs inside the insert's transaction, for
+    # writes that must commit together with the booking (its notifications)
+    def create(self, patient_name, phone, email, doctor, specialty, date, time, fee,
+               status=STATUS_CONFIRMED, booking_time=None, on_insert=None):
+        if booking_time is None:
+            booking_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            with self._connect() as conn:
+                cur = conn.execute(
+                    "INSERT INTO appointments (patient_name, phone, email, doctor, specialty, "
+                    "date, time, fee, status, booking_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (patient_name, phone, email, doctor, specialty, date, time, fee, status, booking_time)
+                )
+                appointment = Appointment(cur.lastrowid, patient_name, phone, email, doctor, specialty,
+                                          date, time, fee, status, booking_time)
+                if on_insert is not None:
+                    on_insert(conn, [appointment])
+        except sqlite3.IntegrityError:
+            raise SlotUnavailableError(f"{doctor} is already booked on {date} at {time}")
+        if not self._mirror([appointment]):
+            return self.book.get(appointment.id)
+        self.stats.record_booking(appointment)
+        self.patients.add(appointment)
+        return appointment
+
+    # Inserts confirmed appointments in one transaction, for bulk imports.
+    # records are (patient_name, phone, email, doctor, specialty, date, time,
+    # fee) tuples. Returns one entry per record: the new appointment, or None
+    # if a confirmed appointment already holds its slot. on_insert gets the
+    # new appointments inside the transaction, as in create().
+    def create_many(self, records, booking_time=None, on_insert=None):
+        if booking_time is None:
+            booking_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        created = []
+        with self._connect() as conn:
+            for record in records:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO appointments (patient_name, phone, email, doctor, specialty, "
+                    "date, time, fee, status, booking_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*record, STATUS_CONFIRMED, booking_time)
+                )
+                created.append(Appointment(cur.lastrowid, *record, STATUS_CONFIRMED, booking_time)
+                               if cur.rowcount == 1 else None)
+            if on_insert is not None:
+                on_insert(conn, [appointment for appointment in created if appointment is not None])
+        appointments = self._mirror([appointment for appointment in created if appointment is not None])
+        created = [appointment and self.book.get(appointment.id) for appointment in created]
+        for appointment in appointments:
+            self.stats.record_booking(appointment)
+            self.patients.add(appointment)
+        return created
+
+    # Adds appointments just inserted here to the mirror and returns those
+    # that were not in it yet; a concurrent sync() may have pulled some in
+    # (and counted them) between the commit and this call
+    def _mirror(self, appointments):
+        with self._lock:
+            added = [appointment for appointment in appointments if appointment.id not in self.book]
+            for appointment in added:
+                self.book.add(appointment)
+        return added
+
+    def get(self, appointment_id):
+        appointment = self.book.get(appointment_id)
+        if appointment is None:
+            # Possibly written by another process sharing the database
+            self.sync()
+            appointment = self.book.get(appointment_id)
+        return appointment
+
+    # Brings the mirror, stats and patient index up to date with what other
+    # processes committed: rows above the highest id seen, and status changes
+    # (journaled by a trigger) past the last sequence number seen. Rows and
+    # changes made through this store are already mirrored and are skipped.
+    # PRAGMA data_version tells whether any other connection has committed
+    # since the last call, so a sync with nothing new costs one pragma.
+    # Returns the (appointments added, (appointment, old_status) changes)
+    # after passing them to every listener.
+    def sync(self):
+        with self._sync_lock:
+            conn = self._sync_conn
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return [], []
+            self._data_version = version
+            # Rows before changes, no transaction needed: a change to a row
+            # inserted after the first read is skipped here, and that row is
+            # read with its final status on the next sync
+            rows = conn.execute(f"SELECT {SELECT_COLUMNS} FROM appointments WHERE id > ? ORDER BY id",
+                                (self._high_water,)).fetchall()
+            changes = conn.execute(
+                "SELECT seq, appointment_id, old_status, new_status FROM appointment_status_changes "
+                "WHERE seq > ? ORDER BY seq", (self._change_seq,)).fetchall()
+            with self._lock:
+                added = []
+                for row in rows:
+                    self._high_water = row[0]
+                    if row[0] not in self.book:
+                        appointment = Appointment(*row)
+                        self.book.add(appointment)
+                        added.append(appointment)
+                changed = []
+                for seq, appointment_id, old_status, new_status in changes:
+                    self._change_seq = seq
+                    appointment = self.book.get(appointment_id)
+                    if appointment is not None and appointment.status != new_status:
+                        appointment = self.book.close(appointment_id, new_status)
+                        if appointment is not None:
+                            changed.append((appointment, old_status))
+            for appointment in added:
+                self.stats.record_booking(appointment)
+                self.patients.add(appointment)
+            for appointment, old_status in changed:
+                self.stats.record_status_change(appointment, old_status)
+            if added or changed:
+                for listener in self.listeners:
+                    listener(added, changed)
+            return added, changed
+
+    @staticmethod
+    def _where(doctor=None, date=None, phone=None, status=None, specialty=None):
+        clauses, params = [], []
+        for column, value in (("doctor", doctor), ("date", date), ("phone", phone), ("status", status),
+                              ("specialty", specialty)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    # One page of appointments matching the filters; sorting happens in SQLite
+    def list_appointments(self, doctor=None, date=None, phone=None, status=None, specialty=None,
+                          sort_by="date", descending=False, limit=None, offset=0):
+        where, params = self._where(doctor, date, phone, status, specialty)
+        direction = " DESC" if descending else ""
+        order = ", ".join(column + direction for column in SORT_COLUMNS[sort_by])
+        sql = f"SELECT {SELECT_COLUMNS} FROM appointments{where} ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return [Appointment(*row) for row in self._connect().execute(sql, params)]
+
+    def count_appointments(self, doctor=None, date=None, phone=None, status=None, specialty=None):
+        where, params = self._where(doctor, date, phone, status, specialty)
+        return self._connect().execute(f"SELECT COUNT(*) FROM appointments{where}", params).fetchone()[0]
+
+    # Rows matching the filters, in id order, as lists of at most chunk_rows
+    # tuples (FIELDS order). Reads from its own connection inside one read
+    # transaction, so a long export sees a consistent snapshot and never
+    # holds more than one chunk.
+    def iter_rows(self, chunk_rows, doctor=None, date=None, phone=None, status=None, specialty=None):
+        where, params = self._where(doctor, date, phone, status, specialty)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        try:
+            conn.execute("BEGIN")
+            cur = conn.execute(f"SELECT {SELECT_COLUMNS} FROM appointments{where} ORDER BY id", params)
+            while True:
+                rows = cur.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    # (doctor, date, time) of every confirmed appointment on or after from_date
+    def booked_slots(self, from_date):
+        return self._connect().execute(
+            "SELECT doctor, date, time FROM appointments WHERE date >= ? AND status = ?",
+            (from_date, STATUS_CONFIRMED)
+        ).fetchall()
+
+    # Name prefix, phone or email search (see PatientIndex.search)
+    def search_patients(self, query, limit=50):
+        self.sync()
+        return self.patients.search(query, limit)
+
+    # Moves a confirmed appointment to a final status. Returns the updated
+    # appointment, or None if it was not confirmed. The trigger journals the
+    # change in the update's transaction; on_update(conn, [appointment]) runs
+    # in it too, as on_insert does for create().
+    def _close(self, appointment_id, status, on_update=None):
+        if appointment_id not in self.book:
+            # Booked by another process: mirror it first
+            self.sync()
+        with self._lock:
+            with self._connect() as conn:
+                cur = conn.execute(
+                    "UPDATE appointments SET status = ? WHERE id = ? AND status = ?",
+                    (status, appointment_id, STATUS_CONFIRMED)
+                )
+                if cur.rowcount == 1 and on_update is not None:
+                    row = conn.execute(f"SELECT {SELECT_COLUMNS} FROM appointments WHERE id = ?",
+                                       (appointment_id,)).fetchone()
+                    on_update(conn, [Appointment(*row)])
+            if cur.rowcount != 1:
+                return None
+            appointment = self.book.close(appointment_id, status)
+        if appointment is None:
+            # Booked by another process since the sync above: mirror the updated row
+            self.sync()
+            return self.book.get(appointment_id)
+        self.stats.record_status_change(appointment, STATUS_CONFIRMED)
+        return appointment
+
+    # Returns the cancelled appointment, or None if it was not confirmed
+    def cancel(self, appointment_id, on_update=None):
+        return self._close(appointment_id, STATUS_CANCELLED, on_update)
+
+    def mark_no_show(self, appointment_id):
+        return self._close(appointment_id, STATUS_NO_SHOW)
+
+    # A new connection holding a read transaction, the highest id it can see,
+    # and the matching journal position: status changes journaled up to the
+    # position are visible in the snapshot, later ones are not
+    def open_snapshot(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("BEGIN")
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM appointments").fetchone()[0]
+        position = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM appointment_status_changes").fetchone()[0]
+        return conn, max_id, position
+
+    # (appointment, old_status) pairs journaled after position start, up to
+    # and including end, for appointments with ids up to max_id. Changes by
+    # every process sharing the database are included.
+    def status_changes(self, start, end, max_id):
+        rows = self._connect().execute(
+            f"SELECT {CHANGE_COLUMNS}, c.old_status FROM appointment_status_changes c "
+            "JOIN appointments a ON a.id = c.appointment_id "
+            "WHERE c.seq > ? AND c.seq <= ? AND a.id <= ? ORDER BY c.seq", (start, end, max_id))
+        return [(Appointment(*row[:-1]), row[-1]) for row in rows]
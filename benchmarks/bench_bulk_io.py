@@ -0,0 +1,129 @@
+# Throughput of the bulk booking import (vectorized validation, one
+# transaction per batch) against booking the same rows one by one through
+# BookingService.book, and the peak memory of the streaming export against
+# loading the whole history. --bad-rows of the import file are invalid in
+# assorted ways, so the error report is exercised too.
+#
+#   python benchmarks/bench_bulk_io.py --rows 20000 --batch-size 2000 --formats csv,parquet
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from appointment_store import AppointmentStore, SlotUnavailableError
+from booking_service import BookingError, BookingService
+from doctor_catalog import Doctor, DoctorCatalog
+from notification_outbox import NotificationOutbox
+from slot_inventory import SlotInventory
+
+SPECIALTIES = ["Cardiology", "Neurology", "Dermatology", "Orthopedics", "Pediatrics", "Gynecology"]
+SLOTS = ("09:00", "10:00", "11:00", "14:00", "15:00", "16:00")
+
+
+def open_service(path, doctors):
+    catalog = DoctorCatalog(
+        Doctor(idx, f"Dr. Bench {idx:05d}", SPECIALTIES[idx % len(SPECIALTIES)], 4.5, 10, 150, SLOTS)
+        for idx in range(1, doctors + 1)
+    )
+    store = AppointmentStore(path)
+    return BookingService(store, SlotInventory(store), catalog, notifier=NotificationOutbox(path))
+
+
+# rows booking requests, spread over the doctors and the booking window
+def make_requests(rows, doctors, bad_rows, seed):
+    rng = random.Random(seed)
+    requests = []
+    for idx in range(rows):
+        slot = idx % (doctors * len(SLOTS))
+        day = date.today() + timedelta(days=1 + idx // (doctors * len(SLOTS)))
+        requests.append({"patient_name": f"Patient {idx}", "phone": f"+91 9{idx:09d}",
+                         "email": f"patient{idx}@example.com", "doctor": f"Dr. Bench {slot // len(SLOTS) + 1:05d}",
+                         "date": day.isoformat(), "time": SLOTS[slot % len(SLOTS)]})
+    for idx in rng.sample(range(rows), bad_rows):
+        column, value = rng.choice([("doctor", "Dr. Nobody"), ("date", "2020-01-01"), ("time", "03:00"),
+                                    ("email", ""), ("date", "31/01/2025")])
+        requests[idx][column] = value
+    return pd.DataFrame(requests)
+
+
+def encode(frame, fmt):
+    buffer = io.BytesIO()
+    if fmt == "csv":
+        frame.to_csv(buffer, index=False)
+    else:
+        frame.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def one_by_one(service, frame):
+    booked = 0
+    for request in frame.itertuples(index=False):
+        try:
+            service.book(*request)
+            booked += 1
+        except (BookingError, SlotUnavailableError):
+            pass
+    return booked
+
+
+def export_peak(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 2), "peak_mb": round(peak / 2 ** 20, 1), "bytes": size}
+
+
+def run(rows, doctors, bad_rows, batch_size, formats, seed):
+    frame = make_requests(rows, doctors, bad_rows, seed)
+    results = {"rows": rows, "bad_rows": bad_rows, "batch_size": batch_size, "import": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        service = open_service(os.path.join(tmp, "loop.db"), doctors)
+        started = time.perf_counter()
+        booked = one_by_one(service, frame)
+        elapsed = time.perf_counter() - started
+        results["one_by_one"] = {"booked": booked, "seconds": round(elapsed, 2), "rows_per_s": round(rows / elapsed)}
+
+        for fmt in formats:
+            service = open_service(os.path.join(tmp, f"import_{fmt}.db"), doctors)
+            data = encode(frame, fmt)
+            started = time.perf_counter()
+            result = service.import_bookings(io.BytesIO(data), fmt, batch_size=batch_size)
+            elapsed = time.perf_counter() - started
+            results["import"][fmt] = {"booked": len(result.booked), "errors": len(result.errors),
+                                      "seconds": round(elapsed, 2), "rows_per_s": round(rows / elapsed)}
+
+        # Export the history just imported: streamed chunks against a full load
+        results["export"] = {
+            fmt: export_peak(lambda: sum(len(chunk) for chunk in service.export_appointments(fmt)))
+            for fmt in formats
+        }
+        results["export"]["full_load_csv"] = export_peak(lambda: len(pd.DataFrame(
+            [apt.to_dict() for apt in service.list_appointments()]).to_csv(index=False)))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bulk booking import and streaming export")
+    parser.add_argument("--rows", type=int, default=20000, help="booking requests in the import file")
+    parser.add_argument("--doctors", type=int, default=500)
+    parser.add_argument("--bad-rows", type=int, default=200, help="invalid rows mixed into the file")
+    parser.add_argument("--batch-size", type=int, default=2000, help="rows per import transaction")
+    parser.add_argument("--formats", default="csv,parquet")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.doctors, args.bad_rows, args.batch_size, args.formats.split(","),
+                         args.seed), indent=2))
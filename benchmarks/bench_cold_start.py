@@ -0,0 +1,80 @@
+# Cold-start cost of app.py: for each run a fresh interpreter imports
+# Streamlit's AppTest, then renders one page for the first time (the first
+# paint a new server process pays after a deploy or autoscale). Reports the
+# time of that first run, the median of the reruns after it, and which heavy
+# libraries the page pulled in.
+#
+#   python benchmarks/bench_cold_start.py --pages home,analytics --runs 5
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "plotly.express", "google.generativeai",
+                 "appointment_analytics", "triage"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_ms = (time.perf_counter() - started) * 1000
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.query_params["page"] = sys.argv[2]
+started = time.perf_counter()
+at.run()
+first_paint_ms = (time.perf_counter() - started) * 1000
+reruns = []
+for _ in range(5):
+    started = time.perf_counter()
+    at.run()
+    reruns.append((time.perf_counter() - started) * 1000)
+rerun_ms = sorted(reruns)[len(reruns) // 2]
+print(json.dumps({
+    "streamlit_import_ms": streamlit_ms,
+    "first_paint_ms": first_paint_ms,
+    "rerun_ms": rerun_ms,
+    "exceptions": [str(exc.value) for exc in at.exception],
+    "loaded": [name for name in json.loads(sys.argv[3]) if name in sys.modules],
+}))
+"""
+
+
+def run_page(app_path, page, env):
+    completed = subprocess.run([sys.executable, "-c", PROBE, app_path, page, json.dumps(HEAVY_MODULES)],
+                               env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(app_path, pages, runs, db_path=None):
+    results = {"app": os.path.relpath(app_path, ROOT), "runs": runs, "pages": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ,
+                   MEDBOOK_DB_PATH=db_path or os.path.join(tmp, "cold.db"),
+                   MEDBOOK_AI_CACHE_PATH="",
+                   MEDBOOK_GEMINI_BACKEND="fake")
+        for page in pages:
+            samples = [run_page(app_path, page, env) for _ in range(runs)]
+            results["pages"][page] = {
+                "first_paint_ms": round(statistics.median(s["first_paint_ms"] for s in samples), 1),
+                "rerun_ms": round(statistics.median(s["rerun_ms"] for s in samples), 1),
+                "streamlit_import_ms": round(statistics.median(s["streamlit_import_ms"] for s in samples), 1),
+                "heavy_modules_loaded": samples[-1]["loaded"],
+                "exceptions": samples[-1]["exceptions"],
+            }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure app.py import time and first paint per page")
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"), help="script to measure")
+    parser.add_argument("--pages", default="home,book-appointment,my-appointments,hospital-navigation,"
+                                           "emergency,analytics")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per page (median reported)")
+    parser.add_argument("--db", help="existing appointment database to open (default: a new empty one)")
+    args = parser.parse_args()
+    print(json.dumps(run(os.path.abspath(args.app), args.pages.split(","), args.runs, args.db), indent=2))
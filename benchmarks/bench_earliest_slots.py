@@ -0,0 +1,106 @@
+# Latency of the earliest-free-slot search (BookingService.earliest_slots)
+# against the nested loop over doctors x days x slots it replaces, for
+# growing catalogs. The first --busy-days of the window are booked to
+# --occupancy, so the search has to skip mostly-full days.
+#
+#   python benchmarks/bench_earliest_slots.py --doctors 1000,10000 --limit 10
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from appointment_store import AppointmentStore
+from booking_service import BookingService
+from doctor_catalog import Doctor, DoctorCatalog
+from slot_inventory import BOOKING_WINDOW_DAYS, SlotInventory
+
+SPECIALTIES = ["Cardiology", "Neurology", "Dermatology", "Orthopedics", "Pediatrics", "Gynecology"]
+SLOT_POOL = ["08:00", "08:30", "09:00", "09:30", "10:00", "10:30", "11:00", "11:30",
+             "13:00", "13:30", "14:00", "14:30", "15:00", "15:30", "16:00", "16:30"]
+
+
+def build_service(directory, doctors, occupancy, busy_days, seed):
+    rng = random.Random(seed)
+    catalog = DoctorCatalog(
+        Doctor(idx, f"Dr. Bench {idx:06d}", SPECIALTIES[idx % len(SPECIALTIES)], round(rng.uniform(3.5, 5.0), 1),
+               rng.randint(1, 35), rng.randrange(80, 260, 10), tuple(sorted(rng.sample(SLOT_POOL, 6))))
+        for idx in range(1, doctors + 1)
+    )
+    store = AppointmentStore(os.path.join(directory, "bench.db"))
+    inventory = SlotInventory(store)
+    today = date.today()
+    for doctor in catalog.doctors:
+        for offset in range(busy_days):
+            for slot in doctor.available_slots:
+                if rng.random() < occupancy:
+                    inventory.reserve(doctor.name, today + timedelta(days=offset), slot)
+    return BookingService(store, inventory, catalog)
+
+
+# What the booking page had to do before: every doctor, every day, every slot
+def naive_earliest(service, specialty, start, end, limit, earliest, latest):
+    doctors = service.catalog.top_k(specialty, service.catalog.count(specialty), "rating")
+    found = []
+    day = start
+    while day <= end:
+        for rank, doctor in enumerate(doctors):
+            for slot in service.free_slots(doctor.name, day):
+                if earliest <= slot <= latest:
+                    found.append((day, slot, rank, doctor.name))
+        day += timedelta(days=1)
+    found.sort()
+    return found[:limit]
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return round(timings[len(timings) // 2], 3)
+
+
+def run(sizes, limit, occupancy, busy_days, repeat, seed):
+    results = []
+    start = date.today() + timedelta(days=1)
+    end = date.today() + timedelta(days=BOOKING_WINDOW_DAYS)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            service = build_service(tmp, size, occupancy, busy_days, seed)
+            query = ("Cardiology", start, end, limit, "08:00", "16:30")
+            heap_slots = service.earliest_slots(*query)
+            naive_slots = naive_earliest(service, *query)
+            results.append({
+                "doctors": size,
+                "heap_ms": timed(lambda: service.earliest_slots(*query), repeat),
+                "naive_ms": timed(lambda: naive_earliest(service, *query), max(1, repeat // 10)),
+                "filtered_heap_ms": timed(lambda: service.earliest_slots(
+                    "Cardiology", start, end, limit, "13:00", "15:00", max_fee=150, min_rating=4.5), repeat),
+                "same_result": [(s.date, s.time, s.doctor.name) for s in heap_slots]
+                               == [(d, t, name) for d, t, _, name in naive_slots],
+                "first": [f"{s.date} {s.time} {s.doctor.name}" for s in heap_slots[:3]],
+            })
+        print(f"{size} doctors: done", file=sys.stderr)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the earliest-free-slot search")
+    parser.add_argument("--doctors", default="100,1000,10000", help="comma-separated catalog sizes")
+    parser.add_argument("--limit", type=int, default=10, help="slots requested per query")
+    parser.add_argument("--occupancy", type=float, default=0.95, help="share of slots booked on busy days")
+    parser.add_argument("--busy-days", type=int, default=7, help="leading days of the window that are busy")
+    parser.add_argument("--repeat", type=int, default=50, help="timed queries per size (median reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sizes = [int(value) for value in args.doctors.split(",")]
+    print(json.dumps(run(sizes, args.limit, args.occupancy, args.busy_days, args.repeat, args.seed), indent=2))
@@ -0,0 +1,64 @@
+# Offline throughput/latency benchmark for GeminiClientManager using the fake backend.
+#
+#   python benchmarks/bench_gemini_pool.py --requests 200 --workers 32 --latency 0.05
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gemini_pool import FakeBackend, GeminiClientManager
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(requests, workers, latency, failure_rate, max_concurrent, stream):
+    manager = GeminiClientManager(backend=FakeBackend(latency=latency, failure_rate=failure_rate),
+                                  max_concurrent=max_concurrent, base_delay=0.01)
+
+    def call(_):
+        started = time.perf_counter()
+        try:
+            if stream:
+                "".join(chunk.text for chunk in manager.stream("bench-key", "bench"))
+            else:
+                manager.generate("bench-key", "bench")
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies = [r[0] * 1000 for r in results]
+    return {
+        "requests": requests,
+        "workers": workers,
+        "max_concurrent": max_concurrent,
+        "stream": stream,
+        "errors": sum(1 for r in results if not r[1]),
+        "throughput_rps": requests / elapsed,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark GeminiClientManager offline")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake call latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--max-concurrent", type=int, default=8)
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.workers, args.latency, args.failure_rate,
+                         args.max_concurrent, args.stream), indent=2))
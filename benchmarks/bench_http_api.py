@@ -0,0 +1,83 @@
+# Requests per second of the asyncio HTTP API against a throwaway database.
+# Each client keeps one connection open and alternates slot lookups with
+# booking attempts, so the numbers cover both the read and the write path.
+#
+#   python benchmarks/bench_http_api.py --clients 50 --requests 40
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from booking_service import BookingService
+from http_api import start_server
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def client(port, client_id, requests, doctors, latencies, statuses):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for i in range(requests):
+        doctor = doctors[(client_id + i) % len(doctors)]
+        day = (date.today() + timedelta(days=1 + (client_id * requests + i) % 30)).isoformat()
+        started = time.perf_counter()
+        if i % 2:
+            status = await request(reader, writer, "POST", "/appointments", {
+                "patient_name": f"Bench {client_id}", "phone": f"+91{client_id:08d}", "email": "bench@example.com",
+                "doctor": doctor.name, "date": day, "time": doctor.available_slots[i % len(doctor.available_slots)],
+            })
+        else:
+            status = await request(reader, writer, "GET", f"/slots?doctor={doctor.name.replace(' ', '%20')}&date={day}")
+        latencies.append(time.perf_counter() - started)
+        statuses[status] = statuses.get(status, 0) + 1
+    writer.close()
+
+
+async def run(clients, requests):
+    with tempfile.TemporaryDirectory() as tmp:
+        service = BookingService.open(db_path=os.path.join(tmp, "bench.db"))
+        server = await start_server(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        doctors = list(service.catalog.doctors)
+        latencies, statuses = [], {}
+        started = time.perf_counter()
+        await asyncio.gather(*(client(port, c, requests, doctors, latencies, statuses) for c in range(clients)))
+        elapsed = time.perf_counter() - started
+        server.close()
+        await server.wait_closed()
+    latencies.sort()
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "requests_per_second": len(latencies) / elapsed,
+        "latency_p50_ms": latencies[len(latencies) // 2] * 1000,
+        "latency_p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "status_counts": statuses,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the booking HTTP API")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=40, help="requests per client")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.clients, args.requests)), indent=2))
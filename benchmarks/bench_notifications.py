@@ -0,0 +1,97 @@
+# Cost of the notification outbox on the booking path, and how fast the
+# delivery threads drain it against a slow, flaky provider (FakeSender).
+# Bookings are timed with and without the outbox; draining is timed for
+# several worker counts.
+#
+#   python benchmarks/bench_notifications.py --bookings 2000 --provider-latency 0.2 --workers 1,4
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from booking_service import BookingService
+from notification_outbox import FakeSender, NotificationOutbox
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+# Books up to `bookings` appointments spread over the catalog and booking
+# window (fewer if it runs out of slots); one timing per booking made
+def book_all(service, bookings):
+    doctors = service.catalog.doctors
+    timings = []
+    idx = 0
+    for offset in range(1, 31):
+        day = date.today() + timedelta(days=offset)
+        for doctor in doctors:
+            for slot in doctor.available_slots:
+                if idx == bookings:
+                    return timings
+                started = time.perf_counter()
+                service.book(f"Patient {idx}", f"+91 9{idx:09d}", f"patient{idx}@example.com", doctor.name, day, slot)
+                timings.append((time.perf_counter() - started) * 1000)
+                idx += 1
+    return timings
+
+
+def booking_latency(directory, bookings, notify):
+    service = BookingService.open(os.path.join(directory, f"book_{notify}.db"))
+    if not notify:
+        service.notifier = None
+    timings = book_all(service, bookings)
+    return {"p50_ms": round(percentile(timings, 50), 3), "p99_ms": round(percentile(timings, 99), 3)}
+
+
+def drain_time(directory, bookings, workers, latency, failure_rate):
+    senders = {"email": FakeSender(latency, failure_rate), "sms": FakeSender(latency, failure_rate)}
+    db_path = os.path.join(directory, f"drain_{workers}.db")
+    service = BookingService.open(db_path)
+    service.notifier = NotificationOutbox(db_path, senders, base_delay=0.01, max_delay=0.1, poll_interval=0.05)
+    jobs = len(book_all(service, bookings)) * 2
+    started = time.perf_counter()
+    service.notifier.start(workers)
+    while len(senders["email"].delivered) + len(senders["sms"].delivered) < jobs:
+        if service.notifier.counts().get("failed"):
+            break
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    service.notifier.stop()
+    return {
+        "workers": workers,
+        "jobs": jobs,
+        "drain_s": round(elapsed, 2),
+        "jobs_per_s": round(jobs / elapsed, 1),
+        "outbox": service.notifier.counts(),
+    }
+
+
+def run(bookings, workers, latency, failure_rate):
+    with tempfile.TemporaryDirectory() as tmp:
+        return {
+            "bookings": bookings,
+            "provider_latency_s": latency,
+            "provider_failure_rate": failure_rate,
+            "book_without_outbox": booking_latency(tmp, bookings, notify=False),
+            "book_with_outbox": booking_latency(tmp, bookings, notify=True),
+            "drain": [drain_time(tmp, bookings, count, latency, failure_rate) for count in workers],
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the notification outbox")
+    parser.add_argument("--bookings", type=int, default=1000)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated delivery thread counts")
+    parser.add_argument("--provider-latency", type=float, default=0.1, help="fake provider time per batch (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="share of sends that fail and are retried")
+    args = parser.parse_args()
+    workers = [int(value) for value in args.workers.split(",")]
+    print(json.dumps(run(args.bookings, workers, args.provider_latency, args.failure_rate), indent=2))
@@ -0,0 +1,289 @@
+# Rerun latency and memory of every app.py page, plus concurrent booking
+# throughput, as the doctor and appointment counts grow. Pages are driven
+# through streamlit.testing.v1.AppTest (opened with ?page=<slug>); each size
+# runs in its own subprocess against generated data with the fake Gemini
+# backend, so caches start cold and nothing touches the real database.
+# Interactions inside an st.fragment rerun only that fragment and send only
+# its deltas. AppTest always reruns the whole script, so for each fragment
+# the report gives its own run time (the medbook_fragment_render_seconds
+# histogram) and the size of the deltas tagged with its fragment id, next
+# to the full rerun's time and the bytes of all its messages.
+#
+#   python benchmarks/bench_pages.py --sizes 10,1000,100000 --reruns 5 --output results.json
+import argparse
+import inspect
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+APP_PATH = os.path.join(ROOT, "app.py")
+PAGE_SLUGS = ["home", "book-appointment", "my-appointments", "hospital-navigation", "emergency", "analytics"]
+SPECIALTIES = ["Cardiology", "Neurology", "Dermatology", "Orthopedics", "Pediatrics", "Gynecology"]
+SLOT_POOL = ["08:00", "08:30", "09:00", "09:30", "10:00", "10:30", "11:00", "11:30",
+             "13:00", "13:30", "14:00", "14:30", "15:00", "15:30", "16:00", "16:30"]
+HISTORY_DAYS = 60
+
+# ForwardMsgs of the latest AppTest run (see capture_messages)
+_last_messages = []
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# size doctors with one appointment each, spread over the last HISTORY_DAYS
+# days and the booking window
+def generate_dataset(directory, size, seed=0):
+    from appointment_store import AppointmentStore
+
+    rng = random.Random(seed)
+    doctors = []
+    for idx in range(1, size + 1):
+        doctors.append({
+            "id": idx,
+            "name": f"Dr. Bench {idx:06d}",
+            "specialty": SPECIALTIES[idx % len(SPECIALTIES)],
+            "rating": round(rng.uniform(3.5, 5.0), 1),
+            "experience": rng.randint(1, 35),
+            "fee": rng.randrange(80, 260, 10),
+            "available_slots": sorted(rng.sample(SLOT_POOL, 4)),
+        })
+    catalog_path = os.path.join(directory, "doctors.json")
+    with open(catalog_path, "w", encoding="utf-8") as f:
+        json.dump(doctors, f)
+
+    db_path = os.path.join(directory, "bench.db")
+    AppointmentStore(db_path)
+    first_day = date.today() - timedelta(days=HISTORY_DAYS)
+    days = HISTORY_DAYS + 30
+    rows = []
+    for idx, doctor in enumerate(doctors):
+        day = first_day + timedelta(days=idx % days)
+        status = rng.choices(["Confirmed", "Cancelled", "No-show"], weights=[85, 10, 5])[0]
+        if status == "No-show" and day > date.today():
+            status = "Confirmed"
+        booked_at = datetime.combine(day, datetime.min.time()) - timedelta(days=rng.randint(1, 20))
+        rows.append((f"Patient {idx}", f"+91 9{idx:09d}", f"patient{idx}@example.com", doctor["name"],
+                     doctor["specialty"], day.isoformat(), doctor["available_slots"][idx % 4],
+                     doctor["fee"], status, booked_at.strftime("%Y-%m-%d %H:%M:%S")))
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO appointments (patient_name, phone, email, doctor, specialty, date, time, fee, "
+            "status, booking_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return db_path, catalog_path
+
+
+# Keeps the messages AppTest parses after each run, so their size can be
+# measured the way they would go over the websocket
+def capture_messages():
+    import streamlit.testing.v1.local_script_runner as local_script_runner
+
+    parse = local_script_runner.parse_tree_from_messages
+
+    def capture(messages):
+        _last_messages[:] = messages
+        return parse(messages)
+
+    local_script_runner.parse_tree_from_messages = capture
+
+
+# Fragment id -> name of the decorated function (the innermost function the
+# st.fragment wrapper closes over)
+def fragment_names(at):
+    names = {}
+    for fragment_id, wrapper in at._fragment_storage._fragments.items():
+        functions = [cell.cell_contents for cell in wrapper.__closure__ or ()
+                     if inspect.isfunction(cell.cell_contents)]
+        names[fragment_id] = functions[-1].__name__ if functions else fragment_id
+    return names
+
+
+# (total seconds, runs) per fragment from the fragment render histogram
+def fragment_totals():
+    from metrics import REGISTRY
+
+    return {h["labels"]["fragment"]: (h["sum"], h["count"]) for h in REGISTRY.snapshot()["histograms"]
+            if h["name"] == "medbook_fragment_render_seconds"}
+
+
+def bench_page(slug, reruns, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.query_params["page"] = slug
+    started = time.perf_counter()
+    at.run()
+    first_run_ms = (time.perf_counter() - started) * 1000
+    before = fragment_totals()
+    timings = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - started) * 1000)
+    after = fragment_totals()
+    sent = {}
+    for message in _last_messages:
+        fragment_id = message.delta.fragment_id if message.HasField("delta") else ""
+        sent[fragment_id] = sent.get(fragment_id, 0) + message.ByteSize()
+    fragments = {}
+    for fragment_id, name in fragment_names(at).items():
+        seconds, count = after.get(name, (0.0, 0))
+        seconds -= before.get(name, (0.0, 0))[0]
+        count -= before.get(name, (0.0, 0))[1]
+        fragments[name] = {
+            "rerun_ms": round(seconds / count * 1000, 2) if count else None,
+            "sent_kb": round(sent.get(fragment_id, 0) / 1024, 2),
+        }
+    # Allocation tracing slows the script down, so it gets a rerun of its own
+    tracemalloc.start()
+    at.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "first_run_ms": round(first_run_ms, 2),
+        "rerun_p50_ms": round(percentile(timings, 50), 2),
+        "rerun_p95_ms": round(percentile(timings, 95), 2),
+        "rerun_sent_kb": round(sum(sent.values()) / 1024, 2),
+        "fragments": fragments,
+        "rerun_peak_alloc_mb": round(peak / 2 ** 20, 2),
+        "rss_mb": round(rss_mb(), 1),
+        "exceptions": [str(exc.value) for exc in at.exception],
+    }
+
+
+# Simulated patients: one (fake) Gemini recommendation, a slot lookup and a
+# booking each, from many threads at once against the same service
+def bench_booking(db_path, catalog_path, bookings, threads, gemini_latency):
+    from appointment_store import SlotUnavailableError
+    from booking_service import BookingError, BookingService
+    from gemini_pool import FakeBackend, GeminiClientManager
+
+    service = BookingService.open(db_path, catalog_path)
+    gemini = GeminiClientManager(backend=FakeBackend(latency=gemini_latency), base_delay=0.01)
+    doctors = service.catalog.doctors
+
+    def patient(idx):
+        started = time.perf_counter()
+        gemini.generate("bench-key", f"chest pain patient {idx}")
+        doctor = doctors[idx % len(doctors)]
+        day = date.today() + timedelta(days=1 + (idx // len(doctors)) % 29)
+        free = service.free_slots(doctor.name, day)
+        outcome = "no_slot"
+        if free:
+            try:
+                service.book(f"Load {idx}", f"+91 8{idx:09d}", "load@example.com", doctor.name, day, free[0])
+                outcome = "booked"
+            except SlotUnavailableError:
+                outcome = "conflict"
+            except BookingError:
+                outcome = "rejected"
+        return time.perf_counter() - started, outcome
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(patient, range(bookings)))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for latency, _ in results]
+    outcomes = {}
+    for _, outcome in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return {
+        "bookings": bookings,
+        "threads": threads,
+        "gemini_latency_s": gemini_latency,
+        "throughput_per_s": round(bookings / elapsed, 1),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "outcomes": outcomes,
+    }
+
+
+# Runs inside the per-size subprocess; the MEDBOOK_* variables are already set
+def run_size(args):
+    db_path, catalog_path = os.environ["MEDBOOK_DB_PATH"], os.environ["MEDBOOK_DOCTORS_PATH"]
+    started = time.perf_counter()
+    generate_dataset(os.path.dirname(db_path), args.size, args.seed)
+    result = {"size": args.size, "setup_s": round(time.perf_counter() - started, 2), "pages": {}}
+    capture_messages()
+    for slug in args.pages.split(","):
+        result["pages"][slug] = bench_page(slug, args.reruns, args.timeout)
+    if args.bookings:
+        result["booking"] = bench_booking(db_path, catalog_path, args.bookings, args.threads, args.gemini_latency)
+    return result
+
+
+def run(args):
+    import streamlit
+
+    results = {
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "reruns": args.reruns,
+        "sizes": [],
+    }
+    for size in (int(value) for value in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ,
+                       MEDBOOK_DB_PATH=os.path.join(tmp, "bench.db"),
+                       MEDBOOK_DOCTORS_PATH=os.path.join(tmp, "doctors.json"),
+                       MEDBOOK_AI_CACHE_PATH="",
+                       MEDBOOK_GEMINI_BACKEND="fake")
+            command = [sys.executable, os.path.abspath(__file__), "--size", str(size),
+                       "--reruns", str(args.reruns), "--pages", args.pages, "--bookings", str(args.bookings),
+                       "--threads", str(args.threads), "--gemini-latency", str(args.gemini_latency),
+                       "--timeout", str(args.timeout), "--seed", str(args.seed)]
+            completed = subprocess.run(command, env=env, cwd=tmp, capture_output=True, text=True)
+            if completed.returncode != 0:
+                results["sizes"].append({"size": size, "error": completed.stderr.strip().splitlines()[-1:]})
+                continue
+            results["sizes"].append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        print(f"size {size}: done", file=sys.stderr)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark app.py page reruns and booking throughput")
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000",
+                        help="comma-separated doctor/appointment counts")
+    parser.add_argument("--pages", default=",".join(PAGE_SLUGS))
+    parser.add_argument("--reruns", type=int, default=5, help="timed reruns per page")
+    parser.add_argument("--bookings", type=int, default=500, help="simulated patients in the throughput test")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--gemini-latency", type=float, default=0.05, help="fake Gemini response time (s)")
+    parser.add_argument("--timeout", type=float, default=300, help="AppTest timeout per run (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.size is not None:
+        print(json.dumps(run_size(args)))
+    else:
+        output = json.dumps(run(args), indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+        print(output)
@@ -0,0 +1,108 @@
+# Latency of the My Appointments patient search (PatientIndex) over a large
+# appointment history, against the linear scan it replaces. Appointments are
+# synthetic and built in memory; names are drawn from a small pool of first
+# and last names so prefixes have realistic fan-out.
+#
+#   python benchmarks/bench_patient_search.py --appointments 1000000 --queries 2000
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from appointment_book import Appointment
+from patient_index import PatientIndex, normalize_email, normalize_name, normalize_phone
+
+FIRST_NAMES = ["Aarav", "Aditi", "Ananya", "Arjun", "Diya", "Ishaan", "Kavya", "Meera", "Mohan", "Nisha",
+               "Priya", "Rahul", "Riya", "Rohan", "Sanjay", "Sara", "Tara", "Vikram", "Zoya", "Neha"]
+LAST_NAMES = ["Sharma", "Verma", "Iyer", "Nair", "Reddy", "Patel", "Gupta", "Khan", "Das", "Mehta",
+              "Joshi", "Rao", "Singh", "Kapoor", "Bose", "Menon", "Pillai", "Chopra", "Kulkarni", "Shah"]
+
+
+def make_appointments(count, patients, seed):
+    rng = random.Random(seed)
+    people = []
+    for idx in range(patients):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {idx:06d}"
+        people.append((name, f"+91 9{idx:09d}", f"patient{idx}@example.com"))
+    for idx in range(1, count + 1):
+        name, phone, email = people[rng.randrange(patients)]
+        yield Appointment(idx, name, phone, email, "Dr. Sarah Johnson", "Cardiology",
+                          "2025-01-31", "09:00", 150, "Confirmed", "2025-01-01 09:00:00")
+
+
+# What a search had to do without the index
+def linear_search(appointments, query, limit):
+    query = query.strip()
+    if "@" in query:
+        target = normalize_email(query)
+        return [apt for apt in appointments if normalize_email(apt.email) == target][:limit]
+    if query.replace(" ", "").lstrip("+").isdigit():
+        target = normalize_phone(query)
+        return [apt for apt in appointments if normalize_phone(apt.phone) == target][:limit]
+    prefix = normalize_name(query)
+    return [apt for apt in appointments
+            if any(word.startswith(prefix) for word in normalize_name(apt.patient_name).split())][:limit]
+
+
+def percentiles(func, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        func(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {"p50_ms": round(timings[len(timings) // 2], 4), "p99_ms": round(timings[int(len(timings) * 0.99)], 4),
+            "max_ms": round(timings[-1], 4)}
+
+
+def run(count, patients, queries, limit, seed):
+    rng = random.Random(seed + 1)
+    appointments = list(make_appointments(count, patients, seed))
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    index = PatientIndex(appointments)
+    build_s = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    sample = [rng.choice(appointments) for _ in range(queries)]
+    workloads = {
+        "phone": [apt.phone.replace(" ", "") for apt in sample],
+        "email": [apt.email.upper() for apt in sample],
+        "name_prefix": [apt.patient_name.split()[rng.randrange(3)][:rng.randint(2, 5)] for apt in sample],
+        "full_name": [apt.patient_name for apt in sample],
+    }
+    results = {
+        "appointments": count,
+        "patients": patients,
+        "build_s": round(build_s, 2),
+        "index_rss_mb": round((rss_after - rss_before) / 1024, 1),
+        "indexed": {kind: percentiles(lambda q: index.search(q, limit), qs) for kind, qs in workloads.items()},
+        "linear_scan": {kind: percentiles(lambda q: linear_search(appointments, q, limit), qs[:3])
+                        for kind, qs in workloads.items()},
+    }
+
+    # Incremental add for new patients; max_ms includes merging the recent
+    # name keys into the main array
+    new = list(make_appointments(queries, queries, seed + 2))
+    for offset, apt in enumerate(new):
+        apt.id = count + offset + 1
+        apt.patient_name = f"{apt.patient_name} new{offset}"
+    results["add_new_patient"] = percentiles(index.add, new)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the patient search index")
+    parser.add_argument("--appointments", type=int, default=1_000_000)
+    parser.add_argument("--patients", type=int, default=300_000, help="distinct patients behind the appointments")
+    parser.add_argument("--queries", type=int, default=2000, help="timed queries per workload")
+    parser.add_argument("--limit", type=int, default=50, help="matches returned per search")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.appointments, args.patients, args.queries, args.limit, args.seed), indent=2))
@@ -0,0 +1,68 @@
+# Accuracy and latency of the local triage classifier on data/triage_cases.csv.
+# Rows with an empty "expected" column are vague complaints the classifier
+# should defer to Gemini instead of answering.
+#
+#   python benchmarks/bench_triage.py --repeat 2000
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from triage import classify
+
+CASES_PATH = os.path.join(ROOT, "data", "triage_cases.csv")
+
+
+def load_cases(path=CASES_PATH):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["symptoms"], int(row["age"]), row["gender"], row["expected"] or None)
+                for row in csv.DictReader(f)]
+
+
+def run(repeat):
+    cases = load_cases()
+    correct = confident = confident_correct = deferred_ok = 0
+    failures = []
+    for symptoms, age, gender, expected in cases:
+        result = classify(symptoms, age, gender)
+        if expected is None:
+            deferred_ok += not result.confident
+            continue
+        correct += result.specialty == expected
+        if result.confident:
+            confident += 1
+            confident_correct += result.specialty == expected
+        if result.specialty != expected:
+            failures.append({"symptoms": symptoms, "expected": expected, "got": result.specialty})
+
+    timings = []
+    for _ in range(repeat):
+        for symptoms, age, gender, _ in cases:
+            started = time.perf_counter()
+            classify(symptoms, age, gender)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    labelled = sum(1 for case in cases if case[3] is not None)
+    return {
+        "cases": len(cases),
+        "accuracy": correct / labelled,
+        "coverage": confident / labelled,
+        "confident_accuracy": confident_correct / confident if confident else None,
+        "vague_cases_deferred": deferred_ok,
+        "vague_cases": len(cases) - labelled,
+        "latency_p50_us": timings[len(timings) // 2] * 1e6,
+        "latency_p99_us": timings[int(len(timings) * 0.99)] * 1e6,
+        "failures": failures,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the local triage classifier")
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
@@ -0,0 +1,144 @@
+# Peak-time symptom intake against a quota-limited (fake) Gemini: every
+# session calling Gemini directly (GeminiClientManager with its retries),
+# against the shared TriageQueue (per-key token buckets, coalescing,
+# emergency priority). Reports errors, calls that reached the API, and
+# latency for routine and emergency requests. The quota is scaled down (per second
+# rather than per minute) so a run takes seconds.
+#
+#   python benchmarks/bench_triage_queue.py --sessions 60 --quota 10 --duplicates 0.3 --emergencies 0.1
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from gemini_pool import FakeApiError, FakeBackend, GeminiClientManager
+from triage_queue import PRIORITY_EMERGENCY, PRIORITY_ROUTINE, TriageQueue, wait_for
+
+
+# FakeBackend that answers 429 once more than `quota` calls started in the
+# last second, like a per-key quota
+class QuotaBackend(FakeBackend):
+    def __init__(self, quota, latency):
+        super().__init__(latency=latency)
+        self.quota = quota
+        self.calls = 0
+        self.rejected = 0
+        self._started = []
+        self._lock = threading.Lock()
+
+    def create_model(self, api_key, model_name):
+        model = super().create_model(api_key, model_name)
+        backend = self
+
+        class QuotaModel:
+            def generate_content(self, prompt, stream=False):
+                with backend._lock:
+                    now = time.monotonic()
+                    backend._started = [t for t in backend._started if now - t < 1.0]
+                    if len(backend._started) >= backend.quota:
+                        backend.rejected += 1
+                        raise FakeApiError(429, "quota exceeded")
+                    backend._started.append(now)
+                    backend.calls += 1
+                return model.generate_content(prompt, stream)
+
+        return QuotaModel()
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))], 1) if values else None
+
+
+# (key, priority) per session; a share of them repeat an earlier session's symptoms
+def make_requests(sessions, duplicates, emergencies, seed):
+    rng = random.Random(seed)
+    requests = []
+    for idx in range(sessions):
+        key = rng.choice(requests)[0] if requests and rng.random() < duplicates else f"symptoms {idx}"
+        priority = PRIORITY_EMERGENCY if rng.random() < emergencies else PRIORITY_ROUTINE
+        requests.append((key, priority))
+    return requests
+
+
+def run_sessions(requests, ask):
+    results = [None] * len(requests)
+
+    def session(idx):
+        key, priority = requests[idx]
+        started = time.perf_counter()
+        try:
+            ask(key, priority)
+            ok = True
+        except Exception:
+            ok = False
+        results[idx] = (priority, ok, (time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=session, args=(idx,)) for idx in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def summarize(results, backend):
+    routine = [ms for priority, ok, ms in results if ok and priority == PRIORITY_ROUTINE]
+    emergency = [ms for priority, ok, ms in results if ok and priority == PRIORITY_EMERGENCY]
+    return {
+        "errors": sum(1 for _, ok, _ in results if not ok),
+        "api_calls": backend.calls,
+        "api_429s": backend.rejected,
+        "routine_p50_ms": percentile(routine, 50),
+        "routine_p95_ms": percentile(routine, 95),
+        "emergency_p50_ms": percentile(emergency, 50),
+        "emergency_max_ms": round(max(emergency), 1) if emergency else None,
+    }
+
+
+def run(sessions, quota, burst, latency, duplicates, emergencies, workers, seed):
+    requests = make_requests(sessions, duplicates, emergencies, seed)
+
+    backend = QuotaBackend(quota, latency)
+    manager = GeminiClientManager(backend=backend, base_delay=0.5)
+    direct = summarize(run_sessions(requests, lambda key, priority: "".join(
+        chunk.text for chunk in manager.stream("bench-key", key))), backend)
+
+    backend = QuotaBackend(quota, latency)
+    # The quota window is one second here instead of a minute
+    queue = TriageQueue(GeminiClientManager(backend=backend), quota_rpm=quota, burst=burst, workers=workers,
+                        window=1.0)
+    queue.start()
+    queued = summarize(run_sessions(requests, lambda key, priority: wait_for(
+        queue.submit(key, "bench-key", key, priority), timeout=600)), backend)
+    queue.stop()
+
+    return {
+        "sessions": sessions,
+        "quota_per_s": quota,
+        "distinct_requests": len({key for key, _ in requests}),
+        "emergencies": sum(1 for _, priority in requests if priority == PRIORITY_EMERGENCY),
+        "direct": direct,
+        "triage_queue": queued,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the triage queue against direct Gemini calls")
+    parser.add_argument("--sessions", type=int, default=60, help="sessions submitting at the same moment")
+    parser.add_argument("--quota", type=int, default=10, help="API calls allowed per second")
+    parser.add_argument("--burst", type=int, default=2, help="calls the queue may send at once")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake call latency in seconds")
+    parser.add_argument("--duplicates", type=float, default=0.3, help="share of sessions repeating earlier symptoms")
+    parser.add_argument("--emergencies", type=float, default=0.1, help="share of sessions from the Emergency page")
+    parser.add_argument("--workers", type=int, default=4, help="triage queue call threads")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sessions, args.quota, args.burst, args.latency, args.duplicates, args.emergencies,
+                         args.workers, args.seed), indent=2))
@@ -0,0 +1,213 @@
+import os
+from datetime import date, datetime, timedelta
+
+from appointment_store import AppointmentStore, SlotUnavailableError, DEFAULT_DB_PATH
+from doctor_catalog import DoctorCatalog, DEFAULT_CATALOG_PATH
+from metrics import REGISTRY
+from notification_outbox import NotificationOutbox
+from slot_inventory import SlotInventory
+
+
+# Raised for requests that can never succeed as sent (missing details,
+# unknown doctor, date outside the booking window, slot not offered)
+class BookingError(Exception):
+    pass
+
+
+# File formats of bulk import and export, with their MIME types. Kept here,
+# not in bulk_io, so the pages and the HTTP API can offer them without
+# loading pandas.
+BULK_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def _as_date(day):
+    if isinstance(day, date):
+        return day
+    try:
+        return date.fromisoformat(day)
+    except (TypeError, ValueError):
+        raise BookingError(f"Invalid date: {day!r} (expected YYYY-MM-DD)")
+
+
+def _as_time(value):
+    try:
+        return datetime.strptime(value, "%H:%M").strftime("%H:%M")
+    except (TypeError, ValueError):
+        raise BookingError(f"Invalid time: {value!r} (expected HH:MM)")
+
+
+# Booking operations with no Streamlit dependency. The Streamlit pages, the
+# HTTP API and scripts all go through this class, so validation and slot
+# reservation behave the same everywhere. Bookings and cancels are timed
+# into the metrics registry by outcome, and queue the patient's email and
+# SMS in the notifier's outbox (when one is given) in the same transaction
+# as the appointment write, so neither commits without the other. Each
+# process has its own service; every call first syncs the store with
+# bookings and cancels the other processes committed to the shared database.
+class BookingService:
+    def __init__(self, store, inventory, catalog, metrics=REGISTRY, notifier=None):
+        self.store = store
+        self.inventory = inventory
+        self.catalog = catalog
+        self.metrics = metrics
+        if notifier is not None and os.path.abspath(notifier.path) != os.path.abspath(store.path):
+            raise ValueError("The notification outbox must live in the appointment database")
+        self.notifier = notifier
+
+    @classmethod
+    def open(cls, db_path=DEFAULT_DB_PATH, catalog_path=DEFAULT_CATALOG_PATH):
+        store = AppointmentStore(db_path)
+        return cls(store, SlotInventory(store), DoctorCatalog.load(catalog_path),
+                   notifier=NotificationOutbox(db_path))
+
+    def search_doctors(self, specialty, sort_by="rating", page=0, page_size=10, max_fee=None, min_rating=None):
+        return self.catalog.page(specialty, sort_by, page, page_size, max_fee, min_rating)
+
+    def _doctor(self, doctor_name):
+        doctor = self.catalog.get(doctor_name)
+        if doctor is None:
+            raise BookingError(f"Unknown doctor: {doctor_name}")
+        return doctor
+
+    def free_slots(self, doctor_name, day):
+        doctor = self._doctor(doctor_name)
+        self.store.sync()
+        return self.inventory.free_slots(doctor.name, _as_date(day), doctor.available_slots)
+
+    # The `limit` soonest free slots of a specialty between start and end
+    # (defaults: today and the end of the booking window), optionally only
+    # between earliest and latest ("HH:MM") and for doctors within a fee and
+    # rating bound. Slots that have already started today are skipped; among
+    # slots at the same time the better-rated doctor comes first.
+    def earliest_slots(self, specialty, start=None, end=None, limit=5, earliest=None, latest=None,
+                       max_fee=None, min_rating=None):
+        now = datetime.now()
+        start = _as_date(start) if start is not None else now.date()
+        end = _as_date(end) if end is not None else now.date() + timedelta(days=self.inventory.window_days)
+        earliest = _as_time(earliest) if earliest else None
+        latest = _as_time(latest) if latest else None
+        if earliest and latest and earliest > latest:
+            raise BookingError(f"earliest ({earliest}) is after latest ({latest})")
+        doctors = self.catalog.top_k(specialty, self.catalog.count(specialty), "rating", max_fee, min_rating)
+        after = now.strftime("%H:%M") if start <= now.date() else None
+        self.store.sync()
+        return self.inventory.earliest_free(doctors, start, end, limit, earliest, latest, after)
+
+    def book(self, patient_name, phone, email, doctor_name, day, time_slot):
+        with self.metrics.timer("medbook_booking_seconds") as labels:
+            try:
+                appointment = self._book(patient_name, phone, email, doctor_name, day, time_slot)
+            except SlotUnavailableError:
+                labels["outcome"] = "conflict"
+                raise
+            except BookingError:
+                labels["outcome"] = "rejected"
+                raise
+            labels["outcome"] = "booked"
+            return appointment
+
+    # Store callback that queues the event's notifications for the written
+    # appointments on the store's connection, inside its transaction
+    def _notify(self, event):
+        if self.notifier is None:
+            return None
+        return lambda conn, appointments: self.notifier.notify_in(conn, event, appointments)
+
+    def _book(self, patient_name, phone, email, doctor_name, day, time_slot):
+        if not (patient_name and phone and email):
+            raise BookingError("Please fill in all patient details!")
+        doctor = self._doctor(doctor_name)
+        day = _as_date(day)
+        if not self.inventory.in_window(day):
+            raise BookingError(f"{day} is outside the {self.inventory.window_days}-day booking window")
+        if time_slot not in doctor.available_slots:
+            raise BookingError(f"{doctor.name} does not offer a {time_slot} slot")
+        self.store.sync()
+        if not self.inventory.reserve(doctor.name, day, time_slot):
+            raise SlotUnavailableError(f"{doctor.name} is already booked on {day} at {time_slot}")
+        try:
+            return self.store.create(
+                patient_name=patient_name,
+                phone=phone,
+                email=email,
+                doctor=doctor.name,
+                specialty=doctor.specialty,
+                date=day.isoformat(),
+                time=time_slot,
+                fee=doctor.fee,
+                on_insert=self._notify("confirmed")
+            )
+        except SlotUnavailableError:
+            # Taken through another process; the bit correctly stays set
+            raise
+        except Exception:
+            self.inventory.release(doctor.name, day, time_slot)
+            raise
+
+    # Books requests that already passed validation (see bulk_io), as
+    # (patient_name, phone, email, doctor_name, day, time_slot) tuples, in a
+    # single transaction. Returns one entry per request: the appointment, or
+    # None if its slot was taken by then.
+    def book_many(self, requests):
+        with self.metrics.timer("medbook_book_many_seconds"):
+            self.store.sync()
+            reserved = []
+            for _, _, _, doctor_name, day, time_slot in requests:
+                doctor = self._doctor(doctor_name)
+                day = _as_date(day)
+                reserved.append((doctor, day) if self.inventory.reserve(doctor.name, day, time_slot) else None)
+            records = [
+                (patient_name, phone, email, slot[0].name, slot[0].specialty, slot[1].isoformat(), time_slot,
+                 slot[0].fee)
+                for (patient_name, phone, email, _, _, time_slot), slot in zip(requests, reserved) if slot
+            ]
+            try:
+                created = iter(self.store.create_many(records, on_insert=self._notify("confirmed")))
+            except Exception:
+                for (_, _, _, _, _, time_slot), slot in zip(requests, reserved):
+                    if slot:
+                        self.inventory.release(slot[0].name, slot[1], time_slot)
+                raise
+            return [next(created) if slot else None for slot in reserved]
+
+    # Bulk booking from a CSV or Parquet file; pandas is only loaded here
+    def import_bookings(self, source, fmt="csv", **options):
+        import bulk_io
+        return bulk_io.import_bookings(self, source, fmt, **options)
+
+    # The appointment history as CSV or Parquet, streamed as byte chunks
+    def export_appointments(self, fmt="csv", **options):
+        import bulk_io
+        return bulk_io.export_appointments(self.store, fmt, **options)
+
+    # Returns the cancelled appointment, or None if it was not confirmed
+    def cancel(self, appointment_id):
+        with self.metrics.timer("medbook_cancel_seconds") as labels:
+            self.store.sync()
+            cancelled = self.store.cancel(appointment_id, on_update=self._notify("cancelled"))
+            if cancelled:
+                self.inventory.release(cancelled.doctor, date.fromisoformat(cancelled.date), cancelled.time)
+            labels["outcome"] = "cancelled" if cancelled else "not_confirmed"
+            return cancelled
+
+    # Records that the patient did not turn up. Only past or same-day
+    # appointments qualify; the slot stays taken.
+    def mark_no_show(self, appointment_id):
+        appointment = self.store.get(appointment_id)
+        if appointment is not None and appointment.date > date.today().isoformat():
+            raise BookingError(f"Appointment {appointment_id} on {appointment.date} has not happened yet")
+        return self.store.mark_no_show(appointment_id)
+
+    def get_appointment(self, appointment_id):
+        return self.store.get(appointment_id)
+
+    def list_appointments(self, **filters):
+        return self.store.list_appointments(**filters)
+
+    def search_patients(self, query, limit=50):
+        return self.store.search_patients(query, limit)
+
+    # Running totals (see AppointmentStats.snapshot)
+    def stats(self):
+        self.store.sync()
+        return self.store.stats.snapshot()
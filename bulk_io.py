@@ -0,0 +1,183 @@
+import csv
+import io
+from collections import namedtuple
+from datetime import date
+
+import pandas as pd
+
+from appointment_book import FIELDS
+from booking_service import BULK_FORMATS, BookingError
+
+# Columns an import file must have; one booking request per row
+IMPORT_COLUMNS = ["patient_name", "phone", "email", "doctor", "date", "time"]
+
+# Rows validated and booked per transaction
+IMPORT_BATCH_SIZE = 2000
+
+# Rows read from SQLite and encoded per export chunk
+EXPORT_CHUNK_ROWS = 5000
+
+# booked: the new appointments; errors: one dict per rejected row with its
+# 1-based row number in the file, the request and the reason
+ImportResult = namedtuple("ImportResult", ["booked", "errors"])
+
+
+def _check_format(fmt):
+    if fmt not in BULK_FORMATS:
+        raise BookingError(f"Unsupported format: {fmt!r} (expected csv or parquet)")
+
+
+# The file as DataFrames of at most batch_size rows, every column a stripped
+# string ("" for blanks), so validation never sees mixed dtypes
+def read_batches(source, fmt="csv", batch_size=IMPORT_BATCH_SIZE):
+    _check_format(fmt)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        if fmt == "csv":
+            batches = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=batch_size)
+        else:
+            batches = (batch.to_pandas() for batch in pq.ParquetFile(source).iter_batches(batch_size))
+        for batch in batches:
+            missing = [column for column in IMPORT_COLUMNS if column not in batch.columns]
+            if missing:
+                raise BookingError(f"Missing columns: {', '.join(missing)}")
+            batch = batch[IMPORT_COLUMNS]
+            yield batch.where(batch.notna(), "").astype(str).apply(lambda column: column.str.strip())
+    except (ValueError, pa.ArrowException) as e:
+        raise BookingError(f"Could not read the {fmt} file: {e}")
+
+
+# Checks a batch column by column instead of row by row: details present,
+# doctor known, date valid and inside the booking window, slot offered by
+# the doctor, not repeated in the batch and not already booked. Returns the
+# batch with dates and times normalized, and the reason each row is rejected
+# ("" if it can be booked); the first failing check wins.
+def validate(batch, catalog, window_days, offered, booked, today=None):
+    today = pd.Timestamp(today or date.today())
+    errors = pd.Series("", index=batch.index)
+
+    def reject(mask, reason):
+        errors[mask & (errors == "")] = reason
+
+    reject((batch[["patient_name", "phone", "email"]] == "").any(axis=1), "Missing patient details")
+    reject(~batch["doctor"].isin([doctor.name for doctor in catalog.doctors]), "Unknown doctor")
+    days = pd.to_datetime(batch["date"], format="%Y-%m-%d", errors="coerce")
+    reject(days.isna(), "Invalid date (expected YYYY-MM-DD)")
+    reject(~days.between(today, today + pd.Timedelta(days=window_days)),
+           f"Outside the {window_days}-day booking window")
+    times = pd.to_datetime(batch["time"], format="%H:%M", errors="coerce")
+    reject(times.isna(), "Invalid time (expected HH:MM)")
+    batch = batch.assign(date=days.dt.strftime("%Y-%m-%d"), time=times.dt.strftime("%H:%M"))
+    reject(~pd.MultiIndex.from_frame(batch[["doctor", "time"]]).isin(offered), "Slot not offered by this doctor")
+    slots = batch[["doctor", "date", "time"]]
+    reject(slots[errors == ""].duplicated().reindex(batch.index, fill_value=False), "Same slot as an earlier row")
+    reject(pd.MultiIndex.from_frame(slots).isin(booked), "Slot already booked")
+    return batch, errors
+
+
+# Books every valid row of a CSV or Parquet file, batch_size rows per
+# transaction, and reports the others. Slots booked while the import runs
+# (including by earlier rows) are caught when the batch reserves them.
+def import_bookings(service, source, fmt="csv", batch_size=IMPORT_BATCH_SIZE):
+    catalog = service.catalog
+    offered = pd.MultiIndex.from_tuples(
+        [(doctor.name, slot) for doctor in catalog.doctors for slot in doctor.available_slots],
+        names=["doctor", "time"])
+    booked = pd.MultiIndex.from_tuples(service.store.booked_slots(date.today().isoformat()),
+                                       names=["doctor", "date", "time"])
+    result = ImportResult([], [])
+    first_row = 1
+    for batch in read_batches(source, fmt, batch_size):
+        sent = _rows(batch)
+        batch, errors = validate(batch, catalog, service.inventory.window_days, offered, booked)
+        rows = range(first_row, first_row + len(batch))
+        first_row += len(batch)
+        requests = _rows(batch)
+        accepted = [(row, request) for row, request, error in zip(rows, requests, errors) if not error]
+        for row, request, error in zip(rows, sent, errors):
+            if error:
+                result.errors.append(_error_row(row, request, error))
+        booked_now = service.book_many([request for _, request in accepted])
+        for (row, request), appointment in zip(accepted, booked_now):
+            if appointment is None:
+                result.errors.append(_error_row(row, request, "Slot already booked"))
+            else:
+                result.booked.append(appointment)
+        conflicts = sum(appointment is None for appointment in booked_now)
+        service.metrics.inc("medbook_import_rows_total", len(booked_now) - conflicts, outcome="booked")
+        service.metrics.inc("medbook_import_rows_total", conflicts, outcome="conflict")
+        service.metrics.inc("medbook_import_rows_total", len(batch) - len(accepted), outcome="rejected")
+    return result
+
+
+def _rows(batch):
+    return list(zip(*(batch[column].tolist() for column in IMPORT_COLUMNS)))
+
+
+def _error_row(row, request, error):
+    patient_name, _, _, doctor, day, time_slot = request
+    return {"row": row, "patient_name": patient_name, "doctor": doctor, "date": day, "time": time_slot,
+            "error": error}
+
+
+# Collects what the Parquet writer emits so it can be handed out chunk by chunk
+class _ChunkSink:
+    def __init__(self):
+        self.closed = False
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+# Appointments matching the filters (see AppointmentStore.iter_rows) as CSV
+# or Parquet bytes, one chunk per chunk_rows rows (one Parquet row group
+# each), so memory stays flat however long the history is
+def export_appointments(store, fmt="csv", chunk_rows=EXPORT_CHUNK_ROWS, **filters):
+    _check_format(fmt)
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(FIELDS)
+        for rows in store.iter_rows(chunk_rows, **filters):
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.int64() if name in ("id", "fee") else pa.string()) for name in FIELDS])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in store.iter_rows(chunk_rows, **filters):
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(zip(*rows), schema)], schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
@@ -0,0 +1,117 @@
+import csv
+import json
+import os
+import sys
+from collections import namedtuple
+from itertools import islice
+
+# Default location of the doctor catalog (JSON list or CSV with a header row)
+DEFAULT_CATALOG_PATH = os.environ.get(
+    "MEDBOOK_DOCTORS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "doctors.json")
+)
+
+Doctor = namedtuple("Doctor", ["id", "name", "specialty", "rating", "experience", "fee", "available_slots"])
+
+# Ranking keys: best doctor first, ties broken by id
+SORT_KEYS = {
+    "rating": lambda doc: (-doc.rating, -doc.experience, doc.id),
+    "fee": lambda doc: (doc.fee, -doc.rating, doc.id),
+    "experience": lambda doc: (-doc.experience, -doc.rating, doc.id),
+}
+
+
+def _parse_experience(value):
+    # Accepts 15 as well as the older "15 years" form
+    if isinstance(value, str):
+        value = value.split()[0]
+    return int(value)
+
+
+def _parse_slots(value):
+    if isinstance(value, str):
+        value = value.replace(";", " ").replace(",", " ").split()
+    return tuple(sorted(sys.intern(slot) for slot in value))
+
+
+def _read_records(path):
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Read-only doctor catalog, loaded once per process.
+# Doctors are namedtuples (no per-instance dict) and every specialty keeps its
+# members pre-sorted by each ranking key, so a page is a slice rather than a
+# scan over the whole catalog.
+class DoctorCatalog:
+    def __init__(self, doctors):
+        self.doctors = tuple(doctors)
+        self._by_name = {doc.name: doc for doc in self.doctors}
+        # Every slot time offered by at least one doctor, earliest first
+        self.slot_times = tuple(sorted({slot for doc in self.doctors for slot in doc.available_slots}))
+        members = {}
+        for doc in self.doctors:
+            members.setdefault(doc.specialty, []).append(doc)
+        self._ranked = {
+            specialty: {key: tuple(sorted(docs, key=rank)) for key, rank in SORT_KEYS.items()}
+            for specialty, docs in members.items()
+        }
+        self._names = {specialty: tuple(sorted(doc.name for doc in docs)) for specialty, docs in members.items()}
+
+    @classmethod
+    def load(cls, path=DEFAULT_CATALOG_PATH):
+        doctors = []
+        for idx, record in enumerate(_read_records(path), start=1):
+            doctors.append(Doctor(
+                id=int(record.get("id") or idx),
+                name=record["name"],
+                specialty=sys.intern(record["specialty"]),
+                rating=float(record["rating"]),
+                experience=_parse_experience(record["experience"]),
+                fee=int(record["fee"]),
+                available_slots=_parse_slots(record["available_slots"]),
+            ))
+        return cls(doctors)
+
+    def __len__(self):
+        return len(self.doctors)
+
+    def get(self, name):
+        return self._by_name.get(name)
+
+    def specialties(self):
+        return sorted(self._ranked)
+
+    # A specialty's doctor names in alphabetical order, for pickers
+    def names(self, specialty):
+        return self._names.get(specialty, ())
+
+    def count(self, specialty):
+        ranked = self._ranked.get(specialty)
+        return len(ranked["rating"]) if ranked else 0
+
+    # One page of a specialty's doctors, best first according to sort_by.
+    # Without filters this slices the precomputed ranking; with filters it
+    # walks the ranking only until the requested page is filled.
+    def page(self, specialty, sort_by="rating", page=0, page_size=10, max_fee=None, min_rating=None):
+        ranked = self._ranked.get(specialty)
+        if not ranked:
+            return []
+        start = page * page_size
+        if max_fee is None and min_rating is None:
+            return list(ranked[sort_by][start:start + page_size])
+        return self.top_k(specialty, start + page_size, sort_by, max_fee, min_rating)[start:]
+
+    def top_k(self, specialty, k, sort_by="rating", max_fee=None, min_rating=None):
+        ranked = self._ranked.get(specialty)
+        if not ranked:
+            return []
+        candidates = ranked[sort_by]
+        if max_fee is not None:
+            candidates = (doc for doc in candidates if doc.fee <= max_fee)
+        if min_rating is not None:
+            candidates = (doc for doc in candidates if doc.rating >= min_rating)
+        return list(islice(candidates, k))
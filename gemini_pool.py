@@ -0,0 +1,158 @@
+import os
+import random
+import threading
+import time
+
+MODEL_NAME = "gemini-pro"
+# Upper bound on in-flight Gemini calls per API key
+MAX_CONCURRENT_CALLS = int(os.environ.get("MEDBOOK_GEMINI_MAX_CONCURRENT", "8"))
+MAX_RETRIES = int(os.environ.get("MEDBOOK_GEMINI_MAX_RETRIES", "3"))
+# "gemini" for the real API, "fake" for offline runs and benchmarks
+BACKEND = os.environ.get("MEDBOOK_GEMINI_BACKEND", "gemini")
+
+# Quota exhaustion and server-side failures are worth retrying; anything else is not
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def is_retryable(exc):
+    code = getattr(exc, "code", None)
+    try:
+        return int(code) in RETRYABLE_STATUS_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+# Real backend. genai.configure() is process-global, so models are created
+# under a lock and bound to their key's client before the lock is released.
+class GeminiBackend:
+    _configure_lock = threading.Lock()
+
+    def create_model(self, api_key, model_name):
+        import google.generativeai as genai
+        from google.generativeai import client as genai_client
+
+        with self._configure_lock:
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(model_name)
+            model._client = genai_client.get_default_generative_client()
+        return model
+
+
+class FakeApiError(Exception):
+    def __init__(self, code, message="fake API error"):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeModel:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def generate_content(self, prompt, stream=False):
+        backend = self._backend
+        if backend.failure_rate and random.random() < backend.failure_rate:
+            time.sleep(backend.latency)
+            raise FakeApiError(503, "service unavailable")
+        words = backend.text.split(" ")
+        size = max(1, len(words) // backend.chunks)
+        parts = [" ".join(words[i:i + size]) + " " for i in range(0, len(words), size)]
+        if not stream:
+            time.sleep(backend.latency)
+            return _FakeResponse("".join(parts).strip())
+        return self._stream(parts)
+
+    def _stream(self, parts):
+        delay = self._backend.latency / len(parts)
+        for part in parts:
+            time.sleep(delay)
+            yield _FakeResponse(part)
+
+
+# Offline stand-in with configurable latency and failure rate
+class FakeBackend:
+    def __init__(self, latency=0.2, chunks=4, failure_rate=0.0,
+                 text="Cardiology is recommended based on the reported symptoms. "
+                      "Please book a consultation for a detailed examination."):
+        self.latency = latency
+        self.chunks = chunks
+        self.failure_rate = failure_rate
+        self.text = text
+
+    def create_model(self, api_key, model_name):
+        return _FakeModel(self)
+
+
+def default_backend():
+    return FakeBackend() if BACKEND == "fake" else GeminiBackend()
+
+
+class _KeyClient:
+    def __init__(self, model, max_concurrent):
+        self.model = model
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+
+
+# Process-wide Gemini clients keyed by API key. Each key keeps one warm model,
+# a semaphore capping in-flight calls, and retries quota/5xx errors with
+# exponential backoff and full jitter.
+class GeminiClientManager:
+    def __init__(self, backend=None, model_name=MODEL_NAME, max_concurrent=MAX_CONCURRENT_CALLS,
+                 max_retries=MAX_RETRIES, base_delay=0.5, max_delay=8.0):
+        self.backend = backend or default_backend()
+        self.model_name = model_name
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _client(self, api_key):
+        client = self._clients.get(api_key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(api_key)
+                if client is None:
+                    model = self.backend.create_model(api_key, self.model_name)
+                    client = self._clients[api_key] = _KeyClient(model, self.max_concurrent)
+        return client
+
+    def _backoff(self, attempt):
+        time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    def generate(self, api_key, prompt):
+        client = self._client(api_key)
+        attempt = 0
+        while True:
+            with client.slots:
+                try:
+                    return client.model.generate_content(prompt)
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        raise
+            self._backoff(attempt)
+            attempt += 1
+
+    # Streaming calls hold their slot until the stream is exhausted; a failure
+    # is only retried if no chunk has been handed to the caller yet
+    def stream(self, api_key, prompt):
+        client = self._client(api_key)
+        attempt = 0
+        while True:
+            yielded = False
+            with client.slots:
+                try:
+                    for chunk in client.model.generate_content(prompt, stream=True):
+                        yielded = True
+                        yield chunk
+                    return
+                except Exception as e:
+                    if yielded or attempt >= self.max_retries or not is_retryable(e):
+                        raise
+            self._backoff(attempt)
+            attempt += 1
@@ -0,0 +1,215 @@
+import heapq
+import json
+import math
+import os
+from collections import namedtuple
+
+# Default location of the building layout (floors, rooms, corridors, lifts and stairs)
+DEFAULT_LAYOUT_PATH = os.environ.get(
+    "MEDBOOK_LAYOUT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "hospital_layout.json")
+)
+
+Floor = namedtuple("Floor", ["level", "name"])
+Room = namedtuple("Room", ["name", "floor", "number", "phone", "rect", "door", "color"])
+Connector = namedtuple("Connector", ["name", "kind", "position", "floors", "cost_per_floor"])
+
+# path is a tuple of (floor, x, y) points; directions are plain-text steps
+Route = namedtuple("Route", ["origin", "destination", "distance", "path", "directions"])
+
+_EPSILON = 1e-6
+
+
+def _distance(a, b):
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+# Position of point p along segment a-b (0 at a, 1 at b), or None if p is off it
+def _along_segment(a, b, p):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return None
+    if abs(dx * (p[1] - a[1]) - dy * (p[0] - a[0])) > _EPSILON * max(1.0, math.sqrt(length_sq)):
+        return None
+    t = ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length_sq
+    return t if -_EPSILON <= t <= 1 + _EPSILON else None
+
+
+# Walking graph of the building, loaded once per process.
+# Nodes are room centres, room doors, corridor bends and lift/stair landings;
+# doors and landings that sit on a corridor are chained along it. Routes
+# between every pair of rooms are computed up front (one Dijkstra per room),
+# so asking for directions is a dictionary lookup.
+class HospitalMap:
+    def __init__(self, floors, rooms, corridors, connectors):
+        self.floors = tuple(sorted(floors))
+        self.rooms = {room.name: room for room in rooms}
+        self.corridors = tuple(corridors)
+        self.connectors = tuple(connectors)
+        self._floor_names = {floor.level: floor.name for floor in self.floors}
+        self._positions = {}
+        self._edges = {}
+        self._build_graph()
+        self._routes = self._route_all_rooms()
+
+    @classmethod
+    def load(cls, path=DEFAULT_LAYOUT_PATH):
+        with open(path, encoding="utf-8") as f:
+            layout = json.load(f)
+        return cls(
+            floors=[Floor(int(floor["level"]), floor["name"]) for floor in layout["floors"]],
+            rooms=[
+                Room(
+                    name=room["name"],
+                    floor=int(room["floor"]),
+                    number=room.get("room"),
+                    phone=room.get("phone"),
+                    rect=tuple(room["rect"]),
+                    door=tuple(room["door"]),
+                    color=room.get("color", "lightgray"),
+                )
+                for room in layout["rooms"]
+            ],
+            corridors=[(int(corridor["floor"]), tuple(map(tuple, corridor["points"])))
+                       for corridor in layout["corridors"]],
+            connectors=[
+                Connector(
+                    name=connector["name"],
+                    kind=connector.get("kind", "stairs"),
+                    position=tuple(connector["position"]),
+                    floors=tuple(sorted(connector["floors"])),
+                    cost_per_floor=float(connector.get("cost_per_floor", 1.0)),
+                )
+                for connector in layout["connectors"]
+            ],
+        )
+
+    def _add_node(self, node, floor, x, y):
+        self._positions[node] = (floor, x, y)
+        self._edges.setdefault(node, {})
+
+    def _link(self, a, b, cost):
+        self._edges[a][b] = min(cost, self._edges[a].get(b, math.inf))
+        self._edges[b][a] = self._edges[a][b]
+
+    def _build_graph(self):
+        for room in self.rooms.values():
+            x0, y0, x1, y1 = room.rect
+            self._add_node(("room", room.name), room.floor, (x0 + x1) / 2, (y0 + y1) / 2)
+            self._add_node(("door", room.name), room.floor, *room.door)
+            self._link(("room", room.name), ("door", room.name), _distance(
+                self._positions[("room", room.name)][1:], room.door))
+
+        for connector in self.connectors:
+            for floor in connector.floors:
+                self._add_node(("landing", connector.name, floor), floor, *connector.position)
+            for lower, upper in zip(connector.floors, connector.floors[1:]):
+                self._link(("landing", connector.name, lower), ("landing", connector.name, upper),
+                           connector.cost_per_floor * (upper - lower))
+
+        for index, (floor, points) in enumerate(self.corridors):
+            on_floor = [node for node, position in self._positions.items()
+                        if position[0] == floor and node[0] in ("door", "landing")]
+            for bend, point in enumerate(points):
+                self._add_node(("corridor", index, bend), floor, *point)
+            for bend, (a, b) in enumerate(zip(points, points[1:])):
+                stops = [(0.0, ("corridor", index, bend)), (1.0, ("corridor", index, bend + 1))]
+                for node in on_floor:
+                    t = _along_segment(a, b, self._positions[node][1:])
+                    if t is not None:
+                        stops.append((t, node))
+                stops.sort(key=lambda stop: stop[0])
+                for (_, first), (_, second) in zip(stops, stops[1:]):
+                    if first != second:
+                        self._link(first, second, _distance(self._positions[first][1:],
+                                                            self._positions[second][1:]))
+
+    def _shortest_paths(self, source):
+        distance = {source: 0.0}
+        previous = {}
+        queue = [(0.0, 0, source)]
+        counter = 1
+        while queue:
+            cost, _, node = heapq.heappop(queue)
+            if cost > distance[node]:
+                continue
+            for neighbour, weight in self._edges[node].items():
+                candidate = cost + weight
+                if candidate < distance.get(neighbour, math.inf):
+                    distance[neighbour] = candidate
+                    previous[neighbour] = node
+                    heapq.heappush(queue, (candidate, counter, neighbour))
+                    counter += 1
+        return distance, previous
+
+    def _route_all_rooms(self):
+        routes = {}
+        for origin in self.rooms:
+            source = ("room", origin)
+            distance, previous = self._shortest_paths(source)
+            for destination in self.rooms:
+                target = ("room", destination)
+                if target not in distance:
+                    continue
+                nodes = [target]
+                while nodes[-1] != source:
+                    nodes.append(previous[nodes[-1]])
+                nodes.reverse()
+                routes[origin, destination] = Route(
+                    origin=origin,
+                    destination=destination,
+                    distance=round(distance[target], 2),
+                    path=tuple(self._positions[node] for node in nodes),
+                    directions=tuple(self._directions(nodes)),
+                )
+        return routes
+
+    def _directions(self, nodes):
+        origin, destination = self.rooms[nodes[0][1]], self.rooms[nodes[-1][1]]
+        steps = [f"Start at {origin.name} (Room {origin.number}, {self.floor_name(origin.floor)})"]
+        if origin.name == destination.name:
+            return steps
+        for node, following in zip(nodes, nodes[1:]):
+            if node[0] == "landing" and following[0] == "landing":
+                # Collapse consecutive floor changes into a single instruction
+                if steps[-1].startswith(f"Take the {node[1]}"):
+                    steps.pop()
+                else:
+                    steps.append(f"Walk along the corridor to the {node[1]}")
+                steps.append(f"Take the {node[1]} to the {self.floor_name(following[2])}")
+        steps.append(f"Walk along the corridor to {destination.name} (Room {destination.number})")
+        return steps
+
+    def floor_name(self, level):
+        return self._floor_names.get(level, f"Floor {level}")
+
+    def rooms_on(self, level):
+        return [room for room in self.rooms.values() if room.floor == level]
+
+    def corridors_on(self, level):
+        return [points for floor, points in self.corridors if floor == level]
+
+    def connectors_on(self, level):
+        return [connector for connector in self.connectors if level in connector.floors]
+
+    # Precomputed route between two rooms, or None if they are not connected
+    def route(self, origin, destination):
+        return self._routes.get((origin, destination))
+
+    # Floors the route walks on, in order (floors only passed in the lift or
+    # on the stairs are left out)
+    @staticmethod
+    def route_floors(route):
+        floors = []
+        for floor, _, _ in route.path:
+            if not floors or floors[-1][0] != floor:
+                floors.append([floor, 0])
+            floors[-1][1] += 1
+        walked = [floor for floor, points in floors if points > 1]
+        return walked or [floors[0][0]]
+
+    # (x, y) points of the part of a route drawn on one floor
+    @staticmethod
+    def route_on_floor(route, level):
+        return [(x, y) for floor, x, y in route.path if floor == level]
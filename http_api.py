@@ -0,0 +1,314 @@
+# Lightweight HTTP/JSON front end over BookingService for kiosks and partner
+# integrations. Runs on asyncio with keep-alive connections; the blocking
+# service calls run in the default thread pool.
+#
+#   python http_api.py --host 127.0.0.1 --port 8080
+#
+#   GET    /health
+#   GET    /metrics        (Prometheus text; ?format=json for a JSON snapshot)
+#   GET    /doctors?specialty=Cardiology&sort_by=rating&page=0&page_size=10
+#   GET    /slots?doctor=Dr.%20Sarah%20Johnson&date=2025-01-31
+#   GET    /slots/earliest?specialty=Cardiology&start=&end=&earliest=09:00&latest=13:00&max_fee=&min_rating=&limit=5
+#   GET    /appointments?doctor=&date=&phone=&status=&limit=50&offset=0
+#   GET    /appointments/export?format=csv|parquet&doctor=&date=&status=   (streamed, chunked)
+#   POST   /appointments/import?format=csv|parquet   (file as the body; per-row error report)
+#   GET    /appointments/<id>
+#   GET    /patients?q=<name prefix, phone or email>&limit=50
+#   POST   /appointments   {"patient_name", "phone", "email", "doctor", "date", "time"}
+#   DELETE /appointments/<id>
+import argparse
+import asyncio
+import functools
+import io
+import json
+import time
+from collections import namedtuple
+from urllib.parse import parse_qs, urlsplit
+
+from appointment_store import SlotUnavailableError
+from booking_service import BULK_FORMATS, BookingError, BookingService
+from metrics import PROMETHEUS_CONTENT_TYPE
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 500: "Internal Server Error"}
+
+MAX_BODY_BYTES = 64 * 1024
+
+# Bulk import files may be larger than other request bodies
+IMPORT_PATH = "/appointments/import"
+MAX_IMPORT_BYTES = 32 * 1024 * 1024
+
+# Upper bound on the limit parameter of /slots/earliest
+MAX_EARLIEST_SLOTS = 100
+
+# Upper bound on the limit parameter of /patients
+MAX_PATIENT_MATCHES = 500
+
+ROUTES = {"/health", "/metrics", "/doctors", "/slots", "/appointments", "/patients"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(query, name, default):
+    try:
+        return int(query.get(name, default))
+    except ValueError:
+        raise HttpError(400, f"{name} must be an integer")
+
+
+def _float_param(query, name):
+    if not query.get(name):
+        return None
+    try:
+        return float(query[name])
+    except ValueError:
+        raise HttpError(400, f"{name} must be a number")
+
+
+# A response body produced chunk by chunk (sent with chunked transfer encoding)
+StreamingBody = namedtuple("StreamingBody", ["content_type", "filename", "chunks"])
+
+
+def _doctor_json(doctor):
+    data = doctor._asdict()
+    data["available_slots"] = list(doctor.available_slots)
+    return data
+
+
+# Catalog lookups run inline on the event loop. Every other service call goes
+# to the thread pool: each one first syncs the store with the database (a
+# lock shared with bookings, PRAGMA data_version and possibly two SELECTs),
+# and slot and patient searches can take milliseconds of CPU on their own.
+class BookingApi:
+    def __init__(self, service):
+        self.service = service
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts == ["health"] and method == "GET":
+            return 200, {"status": "ok"}
+
+        if parts == ["metrics"] and method == "GET":
+            if query.get("format") == "json":
+                return 200, self.service.metrics.snapshot()
+            return 200, self.service.metrics.to_prometheus()
+
+        if parts == ["doctors"] and method == "GET":
+            if "specialty" not in query:
+                raise HttpError(400, "specialty is required")
+            doctors = self.service.search_doctors(
+                query["specialty"],
+                sort_by=query.get("sort_by", "rating"),
+                page=_int_param(query, "page", 0),
+                page_size=_int_param(query, "page_size", 10),
+            )
+            return 200, {"doctors": [_doctor_json(doc) for doc in doctors]}
+
+        if parts == ["slots"] and method == "GET":
+            if "doctor" not in query or "date" not in query:
+                raise HttpError(400, "doctor and date are required")
+            return 200, {"slots": await self._call(self.service.free_slots, query["doctor"], query["date"])}
+
+        if parts == ["slots", "earliest"] and method == "GET":
+            if "specialty" not in query:
+                raise HttpError(400, "specialty is required")
+            slots = await self._call(
+                self.service.earliest_slots, query["specialty"],
+                start=query.get("start") or None, end=query.get("end") or None,
+                limit=min(_int_param(query, "limit", 5), MAX_EARLIEST_SLOTS),
+                earliest=query.get("earliest") or None, latest=query.get("latest") or None,
+                max_fee=_float_param(query, "max_fee"), min_rating=_float_param(query, "min_rating"),
+            )
+            return 200, {"slots": [{"doctor": _doctor_json(slot.doctor), "date": slot.date.isoformat(),
+                                    "time": slot.time} for slot in slots]}
+
+        if parts == ["appointments"]:
+            if method == "GET":
+                appointments = await self._call(
+                    self.service.list_appointments,
+                    doctor=query.get("doctor"), date=query.get("date"),
+                    phone=query.get("phone"), status=query.get("status"),
+                    limit=_int_param(query, "limit", 50), offset=_int_param(query, "offset", 0),
+                )
+                return 200, {"appointments": [apt.to_dict() for apt in appointments]}
+            if method == "POST":
+                try:
+                    payload = json.loads(body or b"{}")
+                    fields = [payload[name] for name in ("patient_name", "phone", "email", "doctor", "date", "time")]
+                except (ValueError, TypeError, KeyError) as e:
+                    raise HttpError(400, f"Invalid booking request: {e}")
+                appointment = await self._call(self.service.book, *fields)
+                return 201, appointment.to_dict()
+            raise HttpError(405, f"{method} not allowed on /appointments")
+
+        if parts == ["appointments", "export"] and method == "GET":
+            fmt = query.get("format", "csv")
+            if fmt not in BULK_FORMATS:
+                raise HttpError(400, "format must be csv or parquet")
+            chunks = self.service.export_appointments(fmt, doctor=query.get("doctor"), date=query.get("date"),
+                                                      status=query.get("status"))
+            return 200, StreamingBody(BULK_FORMATS[fmt], f"appointments.{fmt}", chunks)
+
+        if parts == ["appointments", "import"] and method == "POST":
+            result = await self._call(self.service.import_bookings, io.BytesIO(body), query.get("format", "csv"))
+            return 200, {"booked": [apt.id for apt in result.booked], "errors": result.errors}
+
+        if len(parts) == 2 and parts[0] == "appointments":
+            try:
+                appointment_id = int(parts[1])
+            except ValueError:
+                raise HttpError(404, f"No appointment {parts[1]}")
+            if method == "GET":
+                appointment = await self._call(self.service.get_appointment, appointment_id)
+            elif method == "DELETE":
+                appointment = await self._call(self.service.cancel, appointment_id)
+            else:
+                raise HttpError(405, f"{method} not allowed on /appointments/<id>")
+            if appointment is None:
+                raise HttpError(404, f"No confirmed appointment {appointment_id}")
+            return 200, appointment.to_dict()
+
+        if parts == ["patients"] and method == "GET":
+            if not query.get("q", "").strip():
+                raise HttpError(400, "q is required")
+            appointments = await self._call(
+                self.service.search_patients, query["q"], limit=min(_int_param(query, "limit", 50), MAX_PATIENT_MATCHES))
+            return 200, {"appointments": [apt.to_dict() for apt in appointments]}
+
+        raise HttpError(404, f"No route for {method} {url.path}")
+
+    async def respond(self, method, target, body):
+        started = time.perf_counter()
+        status, payload = await self._respond(method, target, body)
+        # Route label is the first path segment, so ids don't create new series
+        route = "/" + urlsplit(target).path.strip("/").split("/")[0]
+        self.service.metrics.observe("medbook_http_request_seconds", time.perf_counter() - started,
+                                     method=method if method in ("GET", "POST", "DELETE") else "other",
+                                     route=route if route in ROUTES else "other", status=str(status))
+        return status, payload
+
+    async def _respond(self, method, target, body):
+        try:
+            return await self.dispatch(method, target, body)
+        except HttpError as e:
+            return e.status, {"error": str(e)}
+        except SlotUnavailableError as e:
+            return 409, {"error": str(e)}
+        except BookingError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._write(writer, 400, {"error": "Malformed request line"}, keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                max_length = MAX_IMPORT_BYTES if urlsplit(target).path.rstrip("/") == IMPORT_PATH else MAX_BODY_BYTES
+                if length > max_length:
+                    await self._write(writer, 400, {"error": "Request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                status, payload = await self.respond(method.upper(), target, body)
+                await self._write(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    # Text payloads (the Prometheus exposition) are sent as-is, streaming
+    # bodies chunk by chunk, anything else as JSON
+    async def _write(self, writer, status, payload, keep_alive):
+        if isinstance(payload, StreamingBody):
+            return await self._write_stream(writer, status, payload, keep_alive)
+        if isinstance(payload, str):
+            data, content_type = payload.encode(), PROMETHEUS_CONTENT_TYPE
+        else:
+            data, content_type = json.dumps(payload).encode(), "application/json"
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+
+
+    # Chunks are produced in the thread pool (they read SQLite) and written
+    # one at a time, waiting for the client to drain each, so a large export
+    # never piles up in memory. A failure halfway drops the connection.
+    async def _write_stream(self, writer, status, body, keep_alive):
+        loop = asyncio.get_running_loop()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: {body.content_type}\r\n"
+            f"Content-Disposition: attachment; filename=\"{body.filename}\"\r\n"
+            f"Transfer-Encoding: chunked\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+        )
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, next, body.chunks, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                    await writer.drain()
+        except Exception as e:
+            body.chunks.close()
+            raise ConnectionError(f"Export failed: {e}")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+async def start_server(service, host="127.0.0.1", port=8080):
+    api = BookingApi(service)
+    return await asyncio.start_server(api.handle_connection, host, port)
+
+
+async def main(host, port):
+    service = BookingService.open()
+    service.notifier.start()
+    server = await start_server(service, host, port)
+    print(f"MedBook API listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the MedBook booking HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
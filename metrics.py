@@ -0,0 +1,240 @@
+import bisect
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds (Prometheus convention); every
+# histogram keeps one counter per bucket, so memory does not grow with traffic
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# A session counts as active if it reran within this many seconds
+SESSION_ACTIVE_SECONDS = 300
+
+# Port for the standalone /metrics endpoint of the Streamlit process (unset: off)
+METRICS_PORT = os.environ.get("MEDBOOK_METRICS_PORT")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HELP = {
+    "medbook_page_render_seconds": "Time to render the selected page section of app.py",
+    "medbook_fragment_render_seconds": "Time to render a page fragment (full or fragment-only rerun)",
+    "medbook_ai_request_seconds": "AI recommendation and emergency guidance calls by outcome",
+    "medbook_booking_seconds": "BookingService.book calls by outcome",
+    "medbook_cancel_seconds": "BookingService.cancel calls by outcome",
+    "medbook_book_many_seconds": "BookingService.book_many batches (one transaction each)",
+    "medbook_import_rows_total": "Rows of bulk import files by outcome (booked, rejected, conflict)",
+    "medbook_http_request_seconds": "HTTP API requests by route and status",
+    "medbook_notification_batch_seconds": "Time to hand one batch of queued notifications to its sender",
+    "medbook_notifications_total": "Notification jobs by channel and outcome (queued, duplicate, sent, retry, failed)",
+    "medbook_triage_requests_total": "Gemini requests submitted to the triage queue by priority and outcome "
+                                     "(queued, coalesced, rejected)",
+    "medbook_triage_queue_depth": "Gemini requests waiting in the triage queue",
+    "medbook_triage_wait_seconds": "Time Gemini requests waited in the triage queue, by priority",
+    "medbook_script_runs_total": "Full reruns of app.py",
+    "medbook_sessions_total": "Browser sessions seen since the process started",
+    "medbook_active_sessions": f"Sessions that reran in the last {SESSION_ACTIVE_SECONDS} seconds",
+}
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    # Upper bound of the bucket holding the q-th quantile (inf past the last bucket)
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS + (float("inf"),), self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+def _label_text(labels):
+    return ",".join('{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                    for name, value in labels)
+
+
+def _json_number(value):
+    return "+Inf" if value == float("inf") else value
+
+
+def _prometheus_number(value):
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Process-wide counters, gauges and latency histograms. Series are keyed by
+# metric name plus a sorted tuple of label pairs; labels come from small
+# fixed sets (page, outcome, route), so the number of series stays bounded.
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._sessions = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    # Times the block into a histogram. The yielded dict holds the labels and
+    # can be filled in as the outcome becomes known; an exception without an
+    # outcome is recorded as outcome="error".
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield labels
+        except BaseException as e:
+            if "outcome" not in labels and isinstance(e, Exception):
+                labels["outcome"] = "error"
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    # Decorator form of timer(), labelled with the function name
+    def timed(self, name, label="section"):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **{label: func.__name__}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def touch_session(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            if session_id not in self._sessions:
+                key = ("medbook_sessions_total", ())
+                self._counters[key] = self._counters.get(key, 0) + 1
+            self._sessions[session_id] = now
+            cutoff = now - SESSION_ACTIVE_SECONDS
+            for stale in [sid for sid, seen in self._sessions.items() if seen < cutoff]:
+                del self._sessions[stale]
+            self._gauges[("medbook_active_sessions", ())] = len(self._sessions)
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {key: (list(h.counts), h.sum, h.count, h.quantile(0.5), h.quantile(0.95))
+                          for key, h in self._histograms.items()}
+        return {
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(counters.items())],
+            "gauges": [{"name": name, "labels": dict(labels), "value": value}
+                       for (name, labels), value in sorted(gauges.items())],
+            "histograms": [
+                {"name": name, "labels": dict(labels), "count": count, "sum": total,
+                 "p50": _json_number(p50), "p95": _json_number(p95),
+                 "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], counts))}
+                for (name, labels), (counts, total, count, p50, p95) in sorted(histograms.items())
+            ],
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), default=str)
+
+    # Prometheus text exposition format (version 0.0.4)
+    def to_prometheus(self):
+        with self._lock:
+            series = [("counter", key, value) for key, value in self._counters.items()]
+            series += [("gauge", key, value) for key, value in self._gauges.items()]
+            series += [("histogram", key, (list(h.counts), h.sum, h.count))
+                       for key, h in self._histograms.items()]
+        lines = []
+        described = set()
+        for kind, (name, labels), value in sorted(series, key=lambda s: s[1]):
+            if name not in described:
+                described.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+            if kind != "histogram":
+                lines.append(f"{name}{{{_label_text(labels)}}} {_prometheus_number(value)}"
+                             if labels else f"{name} {_prometheus_number(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS + (float("inf"),), counts):
+                cumulative += bucket_count
+                bucket_labels = _label_text(labels + (("le", _prometheus_number(bound)),))
+                lines.append(f"{name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{_label_text(labels)}}}" if labels else ""
+            lines.append(f"{name}_sum{suffix} {total!r}")
+            lines.append(f"{name}_count{suffix} {count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+# Top functions of a cProfile run by cumulative time, as text
+def format_profile(profile, limit=30):
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path == "/metrics" and "format=json" in query:
+            body, content_type = self.registry.to_json().encode(), "application/json"
+        elif path == "/metrics":
+            body, content_type = self.registry.to_prometheus().encode(), PROMETHEUS_CONTENT_TYPE
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Serves GET /metrics (Prometheus text) and /metrics?format=json from a
+# daemon thread; for processes without their own HTTP server
+def start_http_server(port, host="127.0.0.1", registry=REGISTRY):
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, int(port)), handler)
+    threading.Thread(target=server.serve_forever, name="medbook-metrics", daemon=True).start()
+    return server
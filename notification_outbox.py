@@ -0,0 +1,360 @@
+import importlib
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from email.message import EmailMessage
+
+from metrics import REGISTRY
+
+# SMTP relay for confirmation emails. For local testing run a debugging
+# server, e.g. `python -m aiosmtpd -n -l localhost:1025`
+SMTP_HOST = os.environ.get("MEDBOOK_SMTP_HOST", "localhost")
+SMTP_PORT = int(os.environ.get("MEDBOOK_SMTP_PORT", "1025"))
+SMTP_FROM = os.environ.get("MEDBOOK_SMTP_FROM", "MedBook Hospital <no-reply@medbook.hospital>")
+# With a user set, the connection is upgraded with STARTTLS before logging in
+SMTP_USER = os.environ.get("MEDBOOK_SMTP_USER", "")
+SMTP_PASSWORD = os.environ.get("MEDBOOK_SMTP_PASSWORD", "")
+# "none" drops texts until a gateway is configured, "console" prints them to
+# stdout for local testing, "package.module:ClassName" loads another sender
+SMS_SENDER = os.environ.get("MEDBOOK_SMS_SENDER", "none")
+# Delivery threads started per process (0: this process only enqueues)
+WORKERS = int(os.environ.get("MEDBOOK_NOTIFY_WORKERS", "2"))
+MAX_ATTEMPTS = int(os.environ.get("MEDBOOK_NOTIFY_MAX_ATTEMPTS", "6"))
+# Jobs handed to a sender at once (one SMTP connection per batch)
+BATCH_SIZE = 20
+# A claimed job whose worker died is handed out again after this long
+LEASE_SECONDS = 60
+
+STATUS_PENDING = "pending"
+STATUS_SENDING = "sending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    channel TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_notifications_due ON notifications (status, next_attempt_at);
+"""
+
+# Messages per appointment event, filled in from Appointment.to_dict()
+EMAIL_TEMPLATES = {
+    "confirmed": (
+        "Appointment confirmed: {doctor}, {date} at {time}",
+        "Dear {patient_name},\n\n"
+        "Your appointment with {doctor} ({specialty}) on {date} at {time} is confirmed.\n"
+        "Consultation fee: ₹{fee}\n"
+        "Booking reference: #{id}\n\n"
+        "MedBook Hospital | Emergency: +91-11-2345-9999\n",
+    ),
+    "cancelled": (
+        "Appointment cancelled: {doctor}, {date} at {time}",
+        "Dear {patient_name},\n\n"
+        "Your appointment with {doctor} ({specialty}) on {date} at {time} has been cancelled.\n"
+        "Booking reference: #{id}\n\n"
+        "MedBook Hospital | Emergency: +91-11-2345-9999\n",
+    ),
+}
+SMS_TEMPLATES = {
+    "confirmed": "MedBook: appointment #{id} with {doctor} on {date} at {time} is confirmed.",
+    "cancelled": "MedBook: appointment #{id} with {doctor} on {date} at {time} has been cancelled.",
+}
+
+Notification = namedtuple("Notification", ["id", "key", "channel", "recipient", "subject", "body", "attempts"])
+
+
+# Raised (or returned) by senders for failures a retry cannot fix, such as a
+# rejected address; the job is marked failed straight away
+class PermanentDeliveryError(Exception):
+    pass
+
+
+# Senders take a batch of Notifications and return one entry per job: None
+# if it was accepted, otherwise the exception. Raising fails the whole batch.
+
+# Email over SMTP, one connection per batch. The Message-ID is derived from
+# the idempotency key, so a resend after a crash is recognisable downstream.
+class SmtpEmailSender:
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, sender=SMTP_FROM, user=SMTP_USER, password=SMTP_PASSWORD,
+                 timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+
+    def send_batch(self, notifications):
+        errors = []
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.user:
+                smtp.starttls()
+                smtp.login(self.user, self.password)
+            for notification in notifications:
+                message = EmailMessage()
+                message["From"] = self.sender
+                message["To"] = notification.recipient
+                message["Subject"] = notification.subject
+                message["Message-ID"] = f"<{notification.key}@medbook.hospital>"
+                message.set_content(notification.body)
+                try:
+                    smtp.send_message(message)
+                    errors.append(None)
+                except smtplib.SMTPRecipientsRefused as e:
+                    errors.append(PermanentDeliveryError(str(e)))
+                except smtplib.SMTPResponseException as e:
+                    errors.append(PermanentDeliveryError(str(e)) if e.smtp_code >= 500 else e)
+        return errors
+
+
+# Default SMS sender when no gateway is configured: marks texts as sent
+# without writing patient details anywhere
+class NullSmsSender:
+    def send_batch(self, notifications):
+        return [None] * len(notifications)
+
+
+# Prints texts to stdout, standing in for an SMS gateway in local testing
+class ConsoleSmsSender:
+    def send_batch(self, notifications):
+        for notification in notifications:
+            print(f"SMS to {notification.recipient}: {notification.body}", flush=True)
+        return [None] * len(notifications)
+
+
+# Offline stand-in with a per-batch round trip and a failure rate
+class FakeSender:
+    def __init__(self, latency=0.05, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.delivered = []
+        self._lock = threading.Lock()
+
+    def send_batch(self, notifications):
+        time.sleep(self.latency)
+        errors = []
+        for notification in notifications:
+            if self.failure_rate and random.random() < self.failure_rate:
+                errors.append(ConnectionError("fake provider unavailable"))
+                continue
+            with self._lock:
+                self.delivered.append(notification.key)
+            errors.append(None)
+        return errors
+
+
+def load_sms_sender(spec=SMS_SENDER):
+    if spec == "none":
+        return NullSmsSender()
+    if spec == "console":
+        return ConsoleSmsSender()
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+# Durable outbox for booking emails and SMS, in a table of the appointment
+# database. Enqueueing is one local insert, made in the booking's own
+# transaction (notify_in), so bookings never wait on a provider and never
+# commit without their notifications. Delivery threads claim due jobs in
+# batches under a lease, hand them to the channel's sender and retry
+# failures with exponential backoff and full jitter. Every job has an idempotency key; enqueueing a key twice
+# is a no-op, and senders can use it to drop duplicates. Several processes
+# can share one outbox: a job is claimed by exactly one worker at a time.
+class NotificationOutbox:
+    def __init__(self, path, senders=None, batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS, base_delay=2.0,
+                 max_delay=600.0, poll_interval=1.0, metrics=REGISTRY):
+        self.path = path
+        self.senders = senders if senders is not None else {"email": SmtpEmailSender(), "sms": load_sms_sender()}
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.metrics = metrics
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # Inserts jobs given as (key, channel, recipient, subject, body) on conn,
+    # skipping keys that were enqueued before, counts them and wakes the
+    # delivery threads. Returns the number of jobs added.
+    def _insert(self, conn, jobs):
+        now = time.time()
+        added = [
+            (channel, conn.execute(
+                "INSERT OR IGNORE INTO notifications (idempotency_key, channel, recipient, subject, body, "
+                "status, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, channel, recipient, subject, body, STATUS_PENDING, now, now)
+            ).rowcount == 1)
+            for key, channel, recipient, subject, body in jobs
+        ]
+        for channel, was_added in added:
+            self.metrics.inc("medbook_notifications_total", channel=channel,
+                             outcome="queued" if was_added else "duplicate")
+        count = sum(was_added for _, was_added in added)
+        if count:
+            self._wakeup.set()
+        return count
+
+    # Adds jobs in one transaction of their own
+    def enqueue_many(self, jobs):
+        with self._connect() as conn:
+            return self._insert(conn, jobs)
+
+    def enqueue(self, key, channel, recipient, subject, body):
+        return self.enqueue_many([(key, channel, recipient, subject, body)]) == 1
+
+    @staticmethod
+    def _jobs(event, appointment):
+        fields = appointment.to_dict()
+        subject, body = EMAIL_TEMPLATES[event]
+        return [
+            (f"{event}-{appointment.id}-email", "email", appointment.email, subject.format(**fields),
+             body.format(**fields)),
+            (f"{event}-{appointment.id}-sms", "sms", appointment.phone, "", SMS_TEMPLATES[event].format(**fields)),
+        ]
+
+    # Email and SMS for an appointment event ("confirmed" or "cancelled")
+    def notify(self, event, appointment):
+        return self.enqueue_many(self._jobs(event, appointment))
+
+    # Same for many appointments, inserted on conn inside the caller's open
+    # transaction (the store's booking insert or cancel update; conn must be
+    # on this outbox's database), so the jobs commit or roll back with it.
+    # A delivery thread woken before the commit waits for the caller's write
+    # lock when it claims, so it never misses them.
+    def notify_in(self, conn, event, appointments):
+        return self._insert(conn, [job for appointment in appointments for job in self._jobs(event, appointment)])
+
+    # Marks up to batch_size due jobs as sending, leased for LEASE_SECONDS
+    def _claim(self):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, idempotency_key, channel, recipient, subject, body, attempts FROM notifications "
+                "WHERE status IN (?, ?) AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                (STATUS_PENDING, STATUS_SENDING, now, self.batch_size)
+            ).fetchall()
+            conn.executemany("UPDATE notifications SET status = ?, next_attempt_at = ? WHERE id = ?",
+                             [(STATUS_SENDING, now + LEASE_SECONDS, row[0]) for row in rows])
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return [Notification(*row) for row in rows]
+
+    def _backoff(self, attempts):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempts))
+
+    def _deliver(self, batch):
+        by_channel = {}
+        for notification in batch:
+            by_channel.setdefault(notification.channel, []).append(notification)
+        for channel, notifications in by_channel.items():
+            sender = self.senders.get(channel)
+            started = time.perf_counter()
+            try:
+                if sender is None:
+                    raise PermanentDeliveryError(f"No sender for channel {channel!r}")
+                errors = sender.send_batch(notifications)
+            except Exception as e:
+                errors = [e] * len(notifications)
+            self.metrics.observe("medbook_notification_batch_seconds", time.perf_counter() - started,
+                                 channel=channel)
+            self._record(notifications, errors)
+
+    def _record(self, notifications, errors):
+        now = time.time()
+        updates = []
+        for notification, error in zip(notifications, errors):
+            attempts = notification.attempts + 1
+            if error is None:
+                outcome = STATUS_SENT
+                updates.append((STATUS_SENT, attempts, now, None, now, notification.id))
+            elif isinstance(error, PermanentDeliveryError) or attempts >= self.max_attempts:
+                outcome = STATUS_FAILED
+                updates.append((STATUS_FAILED, attempts, now, repr(error), None, notification.id))
+            else:
+                outcome = "retry"
+                updates.append((STATUS_PENDING, attempts, now + self._backoff(attempts), repr(error), None,
+                                notification.id))
+            self.metrics.inc("medbook_notifications_total", channel=notification.channel, outcome=outcome)
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE notifications SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, "
+                "sent_at = ? WHERE id = ?", updates)
+
+    # Delivers every due job once; returns how many were handed to senders.
+    # The worker threads loop over this, and scripts can call it directly.
+    def drain(self):
+        delivered = 0
+        while True:
+            batch = self._claim()
+            if not batch:
+                return delivered
+            self._deliver(batch)
+            delivered += len(batch)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                delivered = self.drain()
+            except sqlite3.OperationalError:
+                # Database busy past the connection timeout; try again on the next poll
+                delivered = 0
+            if not delivered:
+                self._wakeup.wait(self.poll_interval)
+
+    # Starts the delivery threads (once per outbox)
+    def start(self, workers=WORKERS):
+        with self._start_lock:
+            if self._threads or workers <= 0:
+                return
+            self._stopping.clear()
+            for idx in range(workers):
+                thread = threading.Thread(target=self._run, name=f"medbook-notify-{idx}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        with self._start_lock:
+            self._stopping.set()
+            self._wakeup.set()
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    # Job counts per status
+    def counts(self):
+        return dict(self._connect().execute("SELECT status, COUNT(*) FROM notifications GROUP BY status"))
@@ -0,0 +1,133 @@
+from functools import lru_cache
+
+# Static CSS and HTML of app.py. Built once when the module is first imported
+# and reused by every rerun and session of the process.
+
+CUSTOM_CSS = """
+<style>
+    .main-header {
+        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+        padding: 2rem;
+        border-radius: 10px;
+        text-align: center;
+        color: white;
+        margin-bottom: 2rem;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+    }
+    
+    .doctor-card {
+        background: white;
+        padding: 1.5rem;
+        border-radius: 15px;
+        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1);
+        border-left: 5px solid #667eea;
+        margin: 1rem 0;
+        transition: transform 0.3s ease;
+    }
+    
+    .doctor-card:hover {
+        transform: translateY(-5px);
+        box-shadow: 0 8px 20px rgba(0, 0, 0, 0.15);
+    }
+    
+    .emergency-btn {
+        background: linear-gradient(45deg, #ff6b6b, #ee5a52);
+        color: white;
+        padding: 1rem 2rem;
+        border: none;
+        border-radius: 50px;
+        font-size: 1.2rem;
+        font-weight: bold;
+        cursor: pointer;
+        width: 100%;
+        margin: 1rem 0;
+        box-shadow: 0 4px 15px rgba(255, 107, 107, 0.3);
+    }
+    
+    .success-message {
+        background: linear-gradient(90deg, #56ab2f, #a8e6cf);
+        padding: 1rem;
+        border-radius: 10px;
+        color: white;
+        text-align: center;
+        margin: 1rem 0;
+    }
+    
+    .metric-card {
+        background: white;
+        padding: 1.5rem;
+        border-radius: 10px;
+        text-align: center;
+        box-shadow: 0 2px 10px rgba(0, 0, 0, 0.1);
+    }
+    
+    .stSelectbox > div > div {
+        background-color: #f8f9fa;
+        border-radius: 10px;
+    }
+</style>
+"""
+
+MAIN_HEADER = """
+<div class="main-header">
+    <h1>🏥 MedBook - Smart Hospital System</h1>
+    <p>Your Health, Our Priority - Book appointments with ease</p>
+</div>
+"""
+
+
+def _metric_card(title, value, caption):
+    return f"""
+<div class="metric-card">
+    <h3 style="color: #667eea;">{title}</h3>
+    <h2>{value}</h2>
+    <p>{caption}</p>
+</div>
+"""
+
+
+# Home page statistics; the last card is filled in with today's bookings
+HOME_METRIC_CARDS = (
+    _metric_card("👨‍⚕️ Doctors", "50+", "Specialist Doctors"),
+    _metric_card("🏥 Departments", "15", "Medical Departments"),
+    _metric_card("⭐ Rating", "4.8", "Patient Satisfaction"),
+)
+BOOKED_TODAY_CARD = _metric_card("📅 Appointments", "{}", "Booked Today")
+
+BOOKING_SUCCESS = """
+<div class="success-message">
+    ✅ Appointment Booked Successfully!<br>
+    You will receive a confirmation SMS and Email shortly.
+</div>
+"""
+
+EMERGENCY_BANNER = """
+<div style="background: linear-gradient(45deg, #ff6b6b, #ee5a52); padding: 2rem; border-radius: 15px; text-align: center; color: white; margin-bottom: 2rem;">
+    <h1>🚨 EMERGENCY SERVICES</h1>
+    <h3>24/7 Emergency Care Available</h3>
+</div>
+"""
+
+FOOTER = """
+---
+<div style="text-align: center; color: #666; padding: 2rem;">
+    <h4>🏥 MedBook Hospital System</h4>
+    <p>Your Health, Our Priority | Available 24/7</p>
+    <p>📞 Emergency: +91-11-2345-9999 | 📧 info@medbook.hospital</p>
+</div>
+"""
+
+# Doctor cards rendered per booking-page rerun; catalog doctors are immutable
+# namedtuples, so the HTML is cached per doctor
+DOCTOR_CARD_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=DOCTOR_CARD_CACHE_SIZE)
+def doctor_card(doctor):
+    return f"""
+<div class="doctor-card">
+    <h4>{doctor.name}</h4>
+    <p><strong>Specialty:</strong> {doctor.specialty} | <strong>Experience:</strong> {doctor.experience} years</p>
+    <p><strong>Rating:</strong> {'⭐' * int(doctor.rating)} {doctor.rating} | <strong>Fee:</strong> ₹{doctor.fee}</p>
+</div>
+"""
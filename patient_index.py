@@ -0,0 +1,154 @@
+import re
+import threading
+from bisect import bisect_left, insort
+from heapq import merge
+
+# Phone numbers are matched on their last PHONE_DIGITS digits, so
+# "+91 98765 43210", "098765-43210" and "9876543210" are the same patient
+PHONE_DIGITS = 10
+
+# Queries of at least this many digits (ignoring spaces, +, - and brackets)
+# are looked up as phone numbers
+MIN_PHONE_QUERY_DIGITS = 7
+
+# Name keys of new patients collect in a small sorted array that is merged
+# into the main one once it holds this many keys
+RECENT_NAME_KEYS = 65536
+
+_NON_DIGITS = re.compile(r"\D")
+_PHONE_PUNCTUATION = re.compile(r"[\s+()\-.]")
+
+
+def normalize_phone(phone):
+    return _NON_DIGITS.sub("", phone)[-PHONE_DIGITS:]
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def normalize_name(name):
+    return " ".join(name.casefold().split())
+
+
+# "Mary Ann Smith" is found by "mary", "ann s" and "smith": every word
+# starts a key that runs to the end of the name
+def name_keys(name):
+    words = normalize_name(name).split(" ")
+    return [" ".join(words[idx:]) for idx in range(len(words)) if words[idx]]
+
+
+# Patient lookup over every appointment: exact-match hash indexes on the
+# normalized phone and email, and sorted arrays of name keys searched with
+# bisect for name prefixes. Appointments are grouped per patient (same name,
+# phone and email), and the indexes point at those groups, so each patient
+# is normalized and indexed once however many visits they have. Entries are
+# the store's Appointment objects, so a cancel shows up without touching the
+# index; add() keeps it current as bookings come in. A new patient's name
+# keys are insorted into the short recent array, which is merged into the
+# main one every RECENT_NAME_KEYS keys, so a booking never shifts the whole
+# array.
+class PatientIndex:
+    def __init__(self, appointments=()):
+        self._lock = threading.Lock()
+        self._patients = {}
+        self._by_phone = {}
+        self._by_email = {}
+        self._by_name = {}
+        for appointment in appointments:
+            self._add(appointment)
+        self._name_keys = sorted(self._by_name)
+        self._recent_keys = []
+
+    def __len__(self):
+        return len(self._patients)
+
+    # Adds appointment to its patient's group; returns the name keys the
+    # patient brought in if they are new
+    def _add(self, appointment):
+        patient = (appointment.patient_name, appointment.phone, appointment.email)
+        visits = self._patients.get(patient)
+        if visits is not None:
+            visits.append(appointment)
+            return ()
+        visits = self._patients[patient] = [appointment]
+        self._by_phone.setdefault(normalize_phone(appointment.phone), []).append(visits)
+        self._by_email.setdefault(normalize_email(appointment.email), []).append(visits)
+        new_keys = []
+        for key in name_keys(appointment.patient_name):
+            groups = self._by_name.get(key)
+            if groups is None:
+                groups = self._by_name[key] = []
+                new_keys.append(key)
+            groups.append(visits)
+        return new_keys
+
+    def add(self, appointment):
+        with self._lock:
+            for key in self._add(appointment):
+                insort(self._recent_keys, key)
+            if len(self._recent_keys) >= RECENT_NAME_KEYS:
+                self._merge_recent_keys()
+
+    # Splices the recent keys into the main array: one bisect per recent key
+    # and slice copies in between, no string comparisons over the whole array
+    def _merge_recent_keys(self):
+        keys = self._name_keys
+        merged = []
+        start = 0
+        for key in self._recent_keys:
+            idx = bisect_left(keys, key, start)
+            merged.extend(keys[start:idx])
+            merged.append(key)
+            start = idx
+        merged.extend(keys[start:])
+        self._name_keys = merged
+        self._recent_keys = []
+
+    @staticmethod
+    def _keys_with_prefix(keys, prefix):
+        idx = bisect_left(keys, prefix)
+        while idx < len(keys) and keys[idx].startswith(prefix):
+            yield keys[idx]
+            idx += 1
+
+    @staticmethod
+    def _newest_first(groups, limit):
+        return sorted((apt for visits in groups for apt in visits),
+                      key=lambda appointment: appointment.id, reverse=True)[:limit]
+
+    def by_phone(self, phone, limit=50):
+        with self._lock:
+            return self._newest_first(self._by_phone.get(normalize_phone(phone), ()), limit)
+
+    def by_email(self, email, limit=50):
+        with self._lock:
+            return self._newest_first(self._by_email.get(normalize_email(email), ()), limit)
+
+    # Appointments of patients with a name word starting with prefix, in name
+    # order and newest first per patient; stops after limit appointments
+    def by_name_prefix(self, prefix, limit=50):
+        prefix = normalize_name(prefix)
+        if not prefix:
+            return []
+        found = {}
+        with self._lock:
+            for key in merge(self._keys_with_prefix(self._name_keys, prefix),
+                             self._keys_with_prefix(self._recent_keys, prefix)):
+                if len(found) >= limit:
+                    break
+                for visits in self._by_name[key]:
+                    for appointment in reversed(visits):
+                        found.setdefault(appointment.id, appointment)
+        return list(found.values())[:limit]
+
+    # Free-text search box: an email address or a phone number is matched
+    # exactly, anything else as a name prefix
+    def search(self, query, limit=50):
+        query = query.strip()
+        if "@" in query:
+            return self.by_email(query, limit)
+        if _PHONE_PUNCTUATION.sub("", query).isdigit() and \
+                len(_NON_DIGITS.sub("", query)) >= MIN_PHONE_QUERY_DIGITS:
+            return self.by_phone(query, limit)
+        return self.by_name_prefix(query, limit)
@@ -0,0 +1,113 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("MEDBOOK_AI_CACHE_SIZE", "1024"))
+DEFAULT_TTL_SECONDS = int(os.environ.get("MEDBOOK_AI_CACHE_TTL", str(24 * 60 * 60)))
+# Set MEDBOOK_AI_CACHE_PATH to an empty string to keep the cache in memory only
+DEFAULT_CACHE_PATH = os.environ.get(
+    "MEDBOOK_AI_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "medbook_cache.db")
+)
+
+AGE_BUCKETS = ((12, "child"), (17, "teen"), (39, "adult"), (64, "middle-aged"))
+
+
+# "Chest pain." and "  chest   PAIN" share one cache entry
+def normalize_symptoms(symptoms):
+    return " ".join(re.sub(r"[^\w\s]", " ", symptoms.lower()).split())
+
+
+def age_bucket(age):
+    for upper, label in AGE_BUCKETS:
+        if age <= upper:
+            return label
+    return "senior"
+
+
+def make_key(symptoms, age, gender):
+    return f"{normalize_symptoms(symptoms)}|{age_bucket(age)}|{gender.lower()}"
+
+
+# LRU cache of AI recommendations with a TTL, optionally backed by SQLite so
+# entries survive restarts and are shared by every process using the file.
+class RecommendationCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 path=DEFAULT_CACHE_PATH):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS recommendations "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "DELETE FROM recommendations WHERE created_at < ?", (time.time() - ttl_seconds,)
+            )
+            self._db.commit()
+
+    def get(self, symptoms, age, gender):
+        key = make_key(symptoms, age, gender)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM recommendations WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+            if entry is not None and now - entry[1] > self.ttl_seconds:
+                self._forget(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, symptoms, age, gender, value):
+        key = make_key(symptoms, age, gender)
+        entry = (value, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO recommendations (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, entry[0], entry[1])
+                )
+                self._db.commit()
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _forget(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM recommendations WHERE key = ?", (key,))
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
@@ -0,0 +1,165 @@
+import heapq
+import threading
+from collections import namedtuple
+from datetime import date, timedelta
+from functools import lru_cache
+
+from appointment_book import STATUS_CANCELLED, STATUS_CONFIRMED
+
+# Bookings are accepted from today up to this many days ahead
+BOOKING_WINDOW_DAYS = 30
+
+# Granularity of the per-day bitmap: bit n covers minutes [n*5, n*5+5)
+SLOT_MINUTES = 5
+
+# One bookable slot found by SlotInventory.earliest_free
+FreeSlot = namedtuple("FreeSlot", ["doctor", "date", "time"])
+
+
+# Map "HH:MM" to its bit in the day bitmap
+@lru_cache(maxsize=None)
+def slot_bit(time_slot):
+    hours, minutes = time_slot.split(":")
+    return 1 << ((int(hours) * 60 + int(minutes)) // SLOT_MINUTES)
+
+
+# Bitmap of the slots a doctor offers, and the slot for each bit index
+@lru_cache(maxsize=None)
+def _schedule(slots):
+    names = {slot_bit(slot).bit_length() - 1: slot for slot in slots}
+    return sum(1 << bit for bit in names), names
+
+
+# Bits from earliest to latest "HH:MM" (both inclusive; None leaves that end
+# open). A reversed range selects nothing.
+def _time_mask(earliest=None, latest=None):
+    low = slot_bit(earliest) if earliest else 1
+    high = slot_bit(latest) << 1 if latest else 1 << (24 * 60 // SLOT_MINUTES)
+    return max(high - low, 0)
+
+
+# Process-wide availability for every doctor over the booking window.
+# Each (doctor, date) pair maps to an int bitmap of taken slots, so checking,
+# reserving and releasing a slot are single dict lookups plus a bit test.
+# The store's unique index on confirmed (doctor, date, time) remains the final
+# guard when several processes share one database; bookings and cancels made
+# by the other processes arrive through the store's sync listeners.
+class SlotInventory:
+    def __init__(self, store, window_days=BOOKING_WINDOW_DAYS):
+        self.window_days = window_days
+        self._lock = threading.Lock()
+        self._taken = {}
+        self._today = date.today()
+        for doctor, day, time_slot in store.booked_slots(self._today.isoformat()):
+            key = (doctor, day)
+            self._taken[key] = self._taken.get(key, 0) | slot_bit(time_slot)
+        store.listeners.append(self._apply_sync)
+
+    # Drop bitmaps for days that have left the window
+    def _roll_window(self):
+        today = date.today()
+        if today != self._today:
+            cutoff = today.isoformat()
+            self._taken = {key: mask for key, mask in self._taken.items() if key[1] >= cutoff}
+            self._today = today
+
+    def in_window(self, day):
+        today = date.today()
+        return today <= day <= today + timedelta(days=self.window_days)
+
+    def free_slots(self, doctor, day, slots):
+        mask = self._taken.get((doctor, day.isoformat()), 0)
+        return [slot for slot in slots if not mask & slot_bit(slot)]
+
+    # Compare-and-set: marks the slot taken and returns True only if it was free
+    def reserve(self, doctor, day, time_slot):
+        if not self.in_window(day):
+            return False
+        bit = slot_bit(time_slot)
+        key = (doctor, day.isoformat())
+        with self._lock:
+            self._roll_window()
+            mask = self._taken.get(key, 0)
+            if mask & bit:
+                return False
+            self._taken[key] = mask | bit
+        return True
+
+    def release(self, doctor, day, time_slot):
+        bit = slot_bit(time_slot)
+        key = (doctor, day.isoformat())
+        with self._lock:
+            mask = self._taken.get(key, 0) & ~bit
+            if mask:
+                self._taken[key] = mask
+            else:
+                self._taken.pop(key, None)
+
+    # Store sync listener: marks slots booked by other processes as taken and
+    # frees the ones they cancelled (a no-show keeps its slot, as it does here)
+    def _apply_sync(self, added, changed):
+        today = date.today().isoformat()
+        with self._lock:
+            for appointment in added:
+                if appointment.status == STATUS_CONFIRMED and appointment.date >= today:
+                    key = (appointment.doctor, appointment.date)
+                    self._taken[key] = self._taken.get(key, 0) | slot_bit(appointment.time)
+            for appointment, _ in changed:
+                if appointment.status == STATUS_CANCELLED:
+                    key = (appointment.doctor, appointment.date)
+                    mask = self._taken.get(key, 0) & ~slot_bit(appointment.time)
+                    if mask:
+                        self._taken[key] = mask
+                    else:
+                        self._taken.pop(key, None)
+
+    # The first `limit` free slots of the given doctors between start and end
+    # (inclusive, clipped to the window), soonest first. Ties go to the doctor
+    # listed first. Each doctor's free slots come from its offered bitmap minus
+    # the taken one, walked day by day. A heap merges those per-doctor streams,
+    # so a query looks at one slot per doctor plus the ones it returns, not
+    # doctors x days x slots. On the first day only slots after `after`
+    # ("HH:MM") count.
+    def earliest_free(self, doctors, start, end, limit, earliest=None, latest=None, after=None):
+        today = date.today()
+        start = max(start, today)
+        end = min(end, today + timedelta(days=self.window_days))
+        if start > end or limit <= 0:
+            return []
+        days = [(start + timedelta(days=n)).isoformat() for n in range((end - start).days + 1)]
+        time_mask = _time_mask(earliest, latest)
+        first_mask = time_mask & -(slot_bit(after) << 1) if after else time_mask
+        taken = self._taken
+
+        def first_free(name, offered, day_index, allowed):
+            while day_index < len(days):
+                free = offered & allowed & ~taken.get((name, days[day_index]), 0)
+                if free:
+                    return day_index, free
+                day_index += 1
+                allowed = time_mask
+            return None
+
+        heap = []
+        for rank, doctor in enumerate(doctors):
+            offered, _ = _schedule(doctor.available_slots)
+            if offered & time_mask:
+                found = first_free(doctor.name, offered, 0, first_mask)
+                if found:
+                    day_index, free = found
+                    heap.append((day_index, (free & -free).bit_length() - 1, rank, free, doctor))
+        heapq.heapify(heap)
+
+        results = []
+        while heap and len(results) < limit:
+            day_index, bit, rank, free, doctor = heap[0]
+            offered, names = _schedule(doctor.available_slots)
+            results.append(FreeSlot(doctor, start + timedelta(days=day_index), names[bit]))
+            free &= free - 1
+            found = (day_index, free) if free else first_free(doctor.name, offered, day_index + 1, time_mask)
+            if found:
+                day_index, free = found
+                heapq.heapreplace(heap, (day_index, (free & -free).bit_length() - 1, rank, free, doctor))
+            else:
+                heapq.heappop(heap)
+        return results
@@ -0,0 +1,41 @@
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from appointment_store import AppointmentStore
+from booking_service import BookingService
+from doctor_catalog import Doctor, DoctorCatalog
+from slot_inventory import SlotInventory
+
+SLOTS = ("09:00", "10:00", "11:00")
+# Patient details for tests that don't care who books
+PATIENT = ("Asha Rao", "+91 9876543210", "asha@example.com")
+
+
+def make_catalog():
+    return DoctorCatalog([
+        Doctor(1, "Dr. Test One", "Cardiology", 4.8, 10, 150, SLOTS),
+        Doctor(2, "Dr. Test Two", "Cardiology", 4.5, 8, 120, SLOTS),
+    ])
+
+
+# A BookingService on its own store and inventory over the database at path,
+# the way each process opens one
+def open_service(path):
+    store = AppointmentStore(path)
+    return BookingService(store, SlotInventory(store), make_catalog())
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "medbook.db")
+
+
+@pytest.fixture
+def tomorrow():
+    return date.today() + timedelta(days=1)
@@ -0,0 +1,20 @@
+from appointment_analytics import AppointmentAnalytics
+from conftest import PATIENT, open_service
+
+
+def test_refresh_folds_in_bookings_and_cancels_from_every_process(db_path, tomorrow):
+    ui = open_service(db_path)
+    api = open_service(db_path)
+    first = ui.book(*PATIENT, "Dr. Test One", tomorrow, "09:00")
+    analytics = AppointmentAnalytics(ui.store)
+    assert analytics.summary()["confirmed"] == 1
+
+    second = ui.book(*PATIENT, "Dr. Test Two", tomorrow, "09:00")
+    ui.cancel(first.id)
+    api.cancel(second.id)
+    api.book(*PATIENT, "Dr. Test One", tomorrow, "10:00")
+    assert analytics.refresh()
+    summary = analytics.summary()
+    assert (summary["total"], summary["confirmed"], summary["cancelled"]) == (3, 1, 2)
+    assert summary["revenue"] == 150
+    assert not analytics.refresh()
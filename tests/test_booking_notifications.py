@@ -0,0 +1,44 @@
+import sqlite3
+
+import pytest
+
+from booking_service import BookingService
+from conftest import PATIENT, open_service
+from notification_outbox import NotificationOutbox
+
+
+def open_notifying_service(path):
+    service = open_service(path)
+    service.notifier = NotificationOutbox(path, senders={})
+    return service
+
+
+def test_booking_and_cancel_queue_their_notifications(db_path, tomorrow):
+    service = open_notifying_service(db_path)
+    appointment = service.book(*PATIENT, "Dr. Test One", tomorrow, "09:00")
+    assert service.notifier.counts() == {"pending": 2}
+    service.cancel(appointment.id)
+    assert service.notifier.counts() == {"pending": 4}
+
+
+def test_failed_enqueue_rolls_back_the_booking(db_path, tomorrow, monkeypatch):
+    service = open_notifying_service(db_path)
+
+    def fail(conn, jobs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(service.notifier, "_insert", fail)
+    with pytest.raises(sqlite3.OperationalError):
+        service.book(*PATIENT, "Dr. Test One", tomorrow, "09:00")
+    assert service.store.count_appointments() == 0
+    assert "09:00" in service.free_slots("Dr. Test One", tomorrow)
+    monkeypatch.undo()
+    assert service.book(*PATIENT, "Dr. Test One", tomorrow, "09:00").status == "Confirmed"
+    assert service.notifier.counts() == {"pending": 2}
+
+
+def test_outbox_must_share_the_appointment_database(db_path, tmp_path):
+    service = open_service(db_path)
+    with pytest.raises(ValueError):
+        BookingService(service.store, service.inventory, service.catalog,
+                       notifier=NotificationOutbox(str(tmp_path / "other.db"), senders={}))
@@ -0,0 +1,66 @@
+import io
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+from appointment_book import FIELDS
+from booking_service import BookingError
+from bulk_io import IMPORT_COLUMNS
+from conftest import PATIENT, open_service
+
+
+def csv_file(rows, columns=IMPORT_COLUMNS):
+    return io.BytesIO(pd.DataFrame(rows, columns=columns).to_csv(index=False).encode())
+
+
+def test_rejected_rows_are_reported_with_their_row_numbers(db_path, tomorrow):
+    service = open_service(db_path)
+    service.book(*PATIENT, "Dr. Test Two", tomorrow, "10:00")
+    day = tomorrow.isoformat()
+    late = (tomorrow + timedelta(days=service.inventory.window_days)).isoformat()
+    rows = [
+        (*PATIENT, "Dr. Test One", day, "09:00"),
+        (*PATIENT, "Dr. Test One", day, "09:00"),
+        (*PATIENT, "Dr. Nobody", day, "09:00"),
+        (*PATIENT, "Dr. Test One", late, "10:00"),
+        (*PATIENT, "Dr. Test One", day, "09:30"),
+        (*PATIENT, "Dr. Test Two", day, "10:00"),
+        ("Asha Rao", "+91 9876543210", "", "Dr. Test One", day, "11:00"),
+        (*PATIENT, "Dr. Test Two", day, "11:00"),
+    ]
+    # Three rows per batch, so row numbers run on across batches
+    result = service.import_bookings(csv_file(rows), "csv", batch_size=3)
+    assert [(apt.doctor, apt.time) for apt in result.booked] == [("Dr. Test One", "09:00"), ("Dr. Test Two", "11:00")]
+    assert [(error["row"], error["error"]) for error in result.errors] == [
+        (2, "Same slot as an earlier row"),
+        (3, "Unknown doctor"),
+        (4, f"Outside the {service.inventory.window_days}-day booking window"),
+        (5, "Slot not offered by this doctor"),
+        (6, "Slot already booked"),
+        (7, "Missing patient details"),
+    ]
+
+
+def test_missing_columns_are_rejected(db_path, tomorrow):
+    service = open_service(db_path)
+    source = csv_file([(*PATIENT, "Dr. Test One", tomorrow.isoformat())], IMPORT_COLUMNS[:-1])
+    with pytest.raises(BookingError, match="Missing columns: time"):
+        service.import_bookings(source, "csv")
+
+
+def test_unreadable_file_is_rejected(db_path):
+    service = open_service(db_path)
+    with pytest.raises(BookingError, match="Could not read the parquet file"):
+        service.import_bookings(io.BytesIO(b"not a parquet file"), "parquet")
+    with pytest.raises(BookingError, match="Unsupported format"):
+        service.import_bookings(io.BytesIO(b""), "xlsx")
+
+
+def test_parquet_export_round_trips(db_path, tomorrow):
+    service = open_service(db_path)
+    booked = [service.book(*PATIENT, "Dr. Test One", tomorrow, slot) for slot in ("09:00", "10:00", "11:00")]
+    service.cancel(booked[1].id)
+    exported = pd.read_parquet(io.BytesIO(b"".join(service.export_appointments("parquet", chunk_rows=2))))
+    assert list(exported.columns) == list(FIELDS)
+    assert exported.to_dict("records") == [service.get_appointment(apt.id).to_dict() for apt in booked]
@@ -0,0 +1,18 @@
+import pytest
+
+from booking_service import BookingError
+from conftest import open_service
+
+
+def test_time_window_limits_the_slots(db_path, tomorrow):
+    service = open_service(db_path)
+    slots = service.earliest_slots("Cardiology", tomorrow, tomorrow, limit=10, earliest="10:00", latest="10:00")
+    assert [(slot.doctor.name, slot.time) for slot in slots] == [("Dr. Test One", "10:00"), ("Dr. Test Two", "10:00")]
+
+
+def test_reversed_time_window_is_rejected(db_path, tomorrow):
+    service = open_service(db_path)
+    with pytest.raises(BookingError):
+        service.earliest_slots("Cardiology", earliest="11:00", latest="09:00")
+    assert service.inventory.earliest_free(service.catalog.doctors, tomorrow, tomorrow, 10,
+                                           earliest="11:00", latest="09:00") == []
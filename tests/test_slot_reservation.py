@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from appointment_store import SlotUnavailableError
+from conftest import PATIENT, open_service
+
+
+def test_concurrent_reserve_has_one_winner(db_path, tomorrow):
+    inventory = open_service(db_path).inventory
+    barrier = threading.Barrier(16)
+    results = []
+
+    def reserve():
+        barrier.wait()
+        results.append(inventory.reserve("Dr. Test One", tomorrow, "09:00"))
+
+    threads = [threading.Thread(target=reserve) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1
+
+
+def test_concurrent_bookings_of_one_slot_book_it_once(db_path, tomorrow):
+    service = open_service(db_path)
+    barrier = threading.Barrier(8)
+    outcomes = []
+
+    def book(idx):
+        barrier.wait()
+        try:
+            service.book(f"Patient {idx}", f"+91 90000000{idx:02d}", f"p{idx}@example.com",
+                         "Dr. Test One", tomorrow, "10:00")
+            outcomes.append("booked")
+        except SlotUnavailableError:
+            outcomes.append("conflict")
+
+    threads = [threading.Thread(target=book, args=(idx,)) for idx in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert outcomes.count("booked") == 1
+    assert service.store.count_appointments(doctor="Dr. Test One", status="Confirmed") == 1
+
+
+def test_unique_index_rejects_a_second_confirmed_booking(db_path, tomorrow):
+    store = open_service(db_path).store
+    slot = ("Dr. Test One", "Cardiology", tomorrow.isoformat(), "09:00", 150)
+    first = store.create(*PATIENT, *slot)
+    with pytest.raises(SlotUnavailableError):
+        store.create(*PATIENT, *slot)
+    # Only confirmed appointments hold the slot
+    store.cancel(first.id)
+    assert store.create(*PATIENT, *slot).id != first.id
+
+
+def test_second_process_cannot_double_book(db_path, tomorrow):
+    first = open_service(db_path)
+    second = open_service(db_path)
+    first.book(*PATIENT, "Dr. Test One", tomorrow, "09:00")
+    with pytest.raises(SlotUnavailableError):
+        second.book(*PATIENT, "Dr. Test One", tomorrow, "09:00")
+    assert "09:00" not in second.free_slots("Dr. Test One", tomorrow)
+
+
+def test_cancel_releases_the_slot(db_path, tomorrow):
+    service = open_service(db_path)
+    appointment = service.book(*PATIENT, "Dr. Test One", tomorrow, "11:00")
+    assert "11:00" not in service.free_slots("Dr. Test One", tomorrow)
+    assert service.cancel(appointment.id).status == "Cancelled"
+    assert "11:00" in service.free_slots("Dr. Test One", tomorrow)
+    assert service.book(*PATIENT, "Dr. Test One", tomorrow, "11:00").status == "Confirmed"
+    assert service.cancel(appointment.id) is None
@@ -0,0 +1,33 @@
+from conftest import PATIENT, open_service
+
+
+def test_cancel_in_another_process_frees_the_slot(db_path, tomorrow):
+    ui = open_service(db_path)
+    api = open_service(db_path)
+    appointment = ui.book(*PATIENT, "Dr. Test One", tomorrow, "09:00")
+    assert api.cancel(appointment.id).status == "Cancelled"
+    assert "09:00" in ui.free_slots("Dr. Test One", tomorrow)
+    assert ui.book(*PATIENT, "Dr. Test One", tomorrow, "09:00").status == "Confirmed"
+    assert ui.stats()["by_status"] == {"Confirmed": 1, "Cancelled": 1}
+
+
+def test_bookings_from_another_process_show_up(db_path, tomorrow):
+    ui = open_service(db_path)
+    api = open_service(db_path)
+    ui.book(*PATIENT, "Dr. Test One", tomorrow, "09:00")
+    booked = api.book("Ravi Menon", "+91 9123456780", "ravi@example.com", "Dr. Test Two", tomorrow, "10:00")
+    assert ui.stats()["total"] == 2
+    assert [apt.id for apt in ui.search_patients("ravi")] == [booked.id]
+    assert "10:00" not in ui.free_slots("Dr. Test Two", tomorrow)
+    assert [slot.time for slot in ui.earliest_slots("Cardiology", tomorrow, tomorrow, limit=10)
+            if slot.doctor.name == "Dr. Test Two"] == ["09:00", "11:00"]
+
+
+def test_own_changes_are_not_applied_twice(db_path, tomorrow):
+    service = open_service(db_path)
+    appointment = service.book(*PATIENT, "Dr. Test One", tomorrow, "09:00")
+    service.cancel(appointment.id)
+    service.book(*PATIENT, "Dr. Test One", tomorrow, "10:00")
+    assert service.store.sync() == ([], [])
+    assert service.stats()["by_status"] == {"Confirmed": 1, "Cancelled": 1}
+    assert len(service.search_patients("asha")) == 2
@@ -0,0 +1,18 @@
+from gemini_pool import FakeBackend, GeminiClientManager
+from triage_queue import TriageQueue
+
+
+def test_a_key_out_of_quota_does_not_hold_back_other_keys():
+    backend = FakeBackend(latency=0.01)
+    # One call per key, then the next token is minutes away
+    queue = TriageQueue(GeminiClientManager(backend=backend), quota_rpm=2, burst=1, workers=2, window=600.0)
+    queue.start()
+    try:
+        assert queue.submit("first", "key-a", "prompt").result(timeout=5).strip() == backend.text
+        waiting = queue.submit("second", "key-a", "prompt")
+        assert queue.submit("other", "key-b", "prompt").result(timeout=5).strip() == backend.text
+        assert not waiting.done()
+        assert queue.counts() == {"queued": 1, "running": 0}
+    finally:
+        queue.stop()
+    assert waiting.cancelled()
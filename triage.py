@@ -0,0 +1,116 @@
+import numpy as np
+
+from recommendation_cache import normalize_symptoms
+
+SPECIALTIES = ("Cardiology", "Neurology", "Dermatology", "Orthopedics", "Pediatrics", "Gynecology")
+
+# Below this confidence the local answer is only a hint and Gemini is asked
+CONFIDENCE_THRESHOLD = 0.6
+# Matched weight (after IDF) needed before the answer is trusted at all: one
+# strong keyword clears it, a single weak or generic one ("fever", "swelling")
+# does not
+MIN_EVIDENCE = 7.5
+PEDIATRIC_AGE_LIMIT = 18
+
+# Hand-tuned evidence per specialty; phrases of up to two words
+KEYWORDS = {
+    "Cardiology": {
+        "chest pain": 3.0, "chest tightness": 3.0, "palpitations": 3.0, "heart": 2.0,
+        "heartbeat": 2.5, "irregular heartbeat": 3.0, "blood pressure": 2.5, "hypertension": 2.5,
+        "shortness": 1.5, "breath": 1.0, "breathless": 1.5, "swollen ankles": 2.0, "chest": 1.5,
+        "angina": 3.0, "cholesterol": 2.0, "fainting": 1.0, "racing": 1.5,
+    },
+    "Neurology": {
+        "headache": 2.5, "migraine": 3.0, "seizure": 3.0, "seizures": 3.0, "dizziness": 1.5,
+        "dizzy": 1.5, "numbness": 2.5, "tingling": 2.0, "memory": 2.5, "confusion": 2.0,
+        "tremor": 3.0, "stroke": 3.0, "slurred speech": 3.0, "vertigo": 2.0, "paralysis": 3.0,
+        "blurred vision": 1.5, "fainting": 1.5, "epilepsy": 3.0, "nerve": 2.0,
+    },
+    "Dermatology": {
+        "rash": 3.0, "skin": 2.5, "itching": 2.5, "itchy": 2.5, "acne": 3.0, "eczema": 3.0,
+        "psoriasis": 3.0, "mole": 3.0, "hives": 3.0, "blisters": 2.5, "pimples": 3.0,
+        "hair loss": 3.0, "dandruff": 2.5, "dry skin": 3.0, "redness": 1.5, "warts": 3.0,
+        "nail": 2.0, "sunburn": 2.5,
+    },
+    "Orthopedics": {
+        "joint pain": 3.0, "back pain": 3.0, "knee": 2.5, "fracture": 3.0, "sprain": 3.0,
+        "shoulder": 2.5, "hip": 2.5, "bone": 2.5, "swelling": 1.0, "arthritis": 3.0,
+        "neck pain": 2.5, "ankle": 2.0, "wrist": 2.0, "stiffness": 2.0, "ligament": 3.0,
+        "spine": 2.5, "joint": 2.0, "muscle": 1.5, "injury": 1.5,
+    },
+    "Pediatrics": {
+        "child": 3.0, "baby": 3.0, "infant": 3.0, "toddler": 3.0, "newborn": 3.0, "kid": 3.0,
+        "vaccination": 2.5, "teething": 3.0, "colic": 3.0, "diaper": 3.0, "growth": 1.5,
+        "fever": 1.0, "measles": 2.5, "chickenpox": 2.5,
+    },
+    "Gynecology": {
+        "period": 3.0, "periods": 3.0, "menstrual": 3.0, "pregnancy": 3.0, "pregnant": 3.0,
+        "pelvic pain": 3.0, "vaginal": 3.0, "discharge": 2.0, "menopause": 3.0, "cramps": 2.0,
+        "ovarian": 3.0, "pcos": 3.0, "fertility": 2.5, "breast": 2.0, "uterus": 3.0,
+        "missed period": 3.0, "hot flashes": 2.5,
+    },
+}
+
+
+# Phrase -> row index, and a (phrases x specialties) float32 weight matrix.
+# Weights are scaled by an IDF factor so phrases shared by several
+# specialties count for less than ones that point at a single specialty.
+def _build_model():
+    vocabulary = {}
+    for terms in KEYWORDS.values():
+        for term in terms:
+            vocabulary.setdefault(term, len(vocabulary))
+    weights = np.zeros((len(vocabulary), len(SPECIALTIES)), dtype=np.float32)
+    for col, specialty in enumerate(SPECIALTIES):
+        for term, weight in KEYWORDS[specialty].items():
+            weights[vocabulary[term], col] = weight
+    document_frequency = np.count_nonzero(weights, axis=1)
+    weights *= (1.0 + np.log(len(SPECIALTIES) / document_frequency))[:, None].astype(np.float32)
+    return vocabulary, weights
+
+
+VOCABULARY, WEIGHTS = _build_model()
+TERMS = tuple(VOCABULARY)
+PEDIATRICS = SPECIALTIES.index("Pediatrics")
+GYNECOLOGY = SPECIALTIES.index("Gynecology")
+
+
+class TriageResult:
+    __slots__ = ("specialty", "confidence", "matched")
+
+    def __init__(self, specialty, confidence, matched):
+        self.specialty = specialty
+        self.confidence = confidence
+        self.matched = matched
+
+    @property
+    def confident(self):
+        return self.confidence >= CONFIDENCE_THRESHOLD
+
+
+def _phrases(text):
+    words = text.split()
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+# Scores free-text symptoms against every specialty in one vectorized sum.
+# Children are steered to Pediatrics (their age counts as full evidence),
+# adults are never sent there, and Gynecology is ruled out for male patients.
+# Confidence is the best specialty's share of the score, scaled down when
+# the total evidence is below MIN_EVIDENCE.
+def classify(symptoms, age=None, gender=None):
+    rows = [VOCABULARY[p] for p in _phrases(normalize_symptoms(symptoms)) if p in VOCABULARY]
+    scores = WEIGHTS[rows].sum(axis=0)
+    if age is not None:
+        if age < PEDIATRIC_AGE_LIMIT:
+            scores[PEDIATRICS] += 2.0 * scores.sum() + MIN_EVIDENCE
+        else:
+            scores[PEDIATRICS] = 0.0
+    if gender is not None and gender.lower() == "male":
+        scores[GYNECOLOGY] = 0.0
+    total = float(scores.sum())
+    if total <= 0:
+        return TriageResult(None, 0.0, ())
+    best = int(scores.argmax())
+    confidence = float(scores[best]) / total * min(1.0, total / MIN_EVIDENCE)
+    return TriageResult(SPECIALTIES[best], confidence, tuple(TERMS[r] for r in rows))
@@ -0,0 +1,279 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from ai_streaming import FIRST_CHUNK_TIMEOUT_MS, STREAM_TIMEOUT_SECONDS, StreamResult
+from metrics import REGISTRY
+
+# Gemini quota in requests per minute per API key, and how many of them may
+# go out at once after a quiet spell. Each key's bucket refills at
+# (RPM - BURST) a minute, so no rolling minute ever exceeds its quota.
+QUOTA_RPM = int(os.environ.get("MEDBOOK_GEMINI_RPM", "60"))
+BURST = int(os.environ.get("MEDBOOK_GEMINI_BURST", "5"))
+# Gemini calls running at once (streams in progress)
+WORKERS = int(os.environ.get("MEDBOOK_TRIAGE_WORKERS", "4"))
+# Routine requests waiting beyond this are turned away instead of queued;
+# emergency requests are always accepted
+MAX_QUEUED = int(os.environ.get("MEDBOOK_TRIAGE_MAX_QUEUED", "200"))
+
+PRIORITY_EMERGENCY = 0
+PRIORITY_ROUTINE = 1
+PRIORITY_NAMES = {PRIORITY_EMERGENCY: "emergency", PRIORITY_ROUTINE: "routine"}
+
+
+# Raised by submit() for a routine request when MAX_QUEUED are already waiting
+class QueueFullError(Exception):
+    pass
+
+
+# Token bucket: `rate` tokens a second, at most `capacity` saved up. Any
+# window of t seconds hands out at most capacity + rate * t tokens.
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Takes a token and returns 0, or returns the seconds until one is due
+    def try_acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+# Future for one Gemini call; `parts` grows as the answer streams in, so a
+# session can show the text so far while it polls
+class TriageRequest(Future):
+    def __init__(self, key, api_key, prompt, priority):
+        super().__init__()
+        self.key = key
+        self.api_key = api_key
+        self.prompt = prompt
+        self.priority = priority
+        self.submitted = time.monotonic()
+        self.parts = []
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+
+# Shared queue in front of Gemini for every session of the process. One
+# dispatcher thread hands requests to a pool of `workers` call threads. The
+# quota is per API key, so each key has its own token bucket; when a worker
+# is free the dispatcher picks the most urgent waiting request (emergency
+# before routine, then oldest first) whose key has a token, so one key
+# running out never holds back requests on another. Identical requests
+# (same key and API key) that are still waiting or running share one call
+# and one future; an emergency duplicate lifts the shared request's
+# priority.
+class TriageQueue:
+    def __init__(self, clients, quota_rpm=QUOTA_RPM, burst=BURST, workers=WORKERS, max_queued=MAX_QUEUED,
+                 metrics=REGISTRY, window=60.0):
+        if not 0 < burst < quota_rpm:
+            raise ValueError(f"burst must be between 1 and {quota_rpm - 1}")
+        self.clients = clients
+        self.rate = (quota_rpm - burst) / window
+        self.burst = burst
+        self._buckets = {}
+        self.workers = workers
+        self.max_queued = max_queued
+        self.metrics = metrics
+        self._heap = []
+        self._sequence = itertools.count()
+        self._inflight = {}
+        self._queued = 0
+        self._running = 0
+        self._cond = threading.Condition()
+        self._free_workers = threading.Semaphore(workers)
+        self._pool = None
+        self._dispatcher = None
+        self._stopping = False
+
+    def start(self):
+        with self._cond:
+            if self._dispatcher is not None:
+                return
+            self._stopping = False
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="triage")
+            self._dispatcher = threading.Thread(target=self._dispatch, name="triage-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    # Stops dispatching; requests still waiting are cancelled, running calls finish
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            dispatcher, self._dispatcher = self._dispatcher, None
+            waiting = [request for _, _, request in self._heap if not request.running()]
+            for request in waiting:
+                self._inflight.pop((request.api_key, request.key), None)
+            self._heap = []
+            self._queued = 0
+            self._cond.notify_all()
+        for request in waiting:
+            request.cancel()
+        if dispatcher is not None:
+            dispatcher.join(timeout=5)
+            self._pool.shutdown(wait=False)
+
+    def submit(self, key, api_key, prompt, priority=PRIORITY_ROUTINE):
+        with self._cond:
+            request = self._inflight.get((api_key, key))
+            if request is not None:
+                outcome = "coalesced"
+                if priority < request.priority and not request.running():
+                    request.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._sequence), request))
+            elif priority != PRIORITY_EMERGENCY and self._queued >= self.max_queued:
+                outcome = "rejected"
+            else:
+                outcome = "queued"
+                request = TriageRequest(key, api_key, prompt, priority)
+                self._inflight[(api_key, key)] = request
+                heapq.heappush(self._heap, (priority, next(self._sequence), request))
+                self._queued += 1
+                self._cond.notify()
+            depth = self._queued
+        self.metrics.inc("medbook_triage_requests_total", outcome=outcome, priority=PRIORITY_NAMES[priority])
+        self.metrics.set_gauge("medbook_triage_queue_depth", depth)
+        if request is None:
+            raise QueueFullError(f"{depth} AI requests are already waiting; please try again in a moment")
+        return request
+
+    # Waiting requests that will be dispatched before this one
+    def position(self, request):
+        with self._cond:
+            if request.running() or request.done():
+                return 0
+            waiting = {id(other): other for _, _, other in self._heap if not other.running()}
+            return sum(1 for other in waiting.values()
+                       if (other.priority, other.submitted) < (request.priority, request.submitted))
+
+    def counts(self):
+        with self._cond:
+            return {"queued": self._queued, "running": self._running}
+
+    def _bucket(self, api_key):
+        bucket = self._buckets.get(api_key)
+        if bucket is None:
+            bucket = self._buckets[api_key] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    # Pops the most urgent request that has not started and whose API key has
+    # a token, taking the token. Entries passed over for want of a token go
+    # back on the heap; older entries of a request whose priority was lifted
+    # are dropped. Returns (request, None), or (None, seconds until the first
+    # waiting key gets a token), or (None, None) if nothing is waiting.
+    def _take(self):
+        skipped = []
+        due = {}
+        request = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            priority, _, candidate = entry
+            if priority != candidate.priority or candidate.running() or candidate.done():
+                continue
+            if candidate.api_key not in due:
+                due[candidate.api_key] = self._bucket(candidate.api_key).try_acquire()
+            if not due[candidate.api_key]:
+                request = candidate
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        if request is not None:
+            return request, None
+        return None, min(due.values()) if due else None
+
+    def _dispatch(self):
+        while True:
+            self._free_workers.acquire()
+            with self._cond:
+                while True:
+                    if self._stopping:
+                        self._free_workers.release()
+                        return
+                    request, wait = self._take()
+                    if request is not None:
+                        break
+                    # Woken early by a new request, which may be on a key
+                    # that still has tokens
+                    self._cond.wait(wait)
+                if not request.set_running_or_notify_cancel():
+                    self._free_workers.release()
+                    continue
+                self._queued -= 1
+                self._running += 1
+                depth = self._queued
+            self.metrics.set_gauge("medbook_triage_queue_depth", depth)
+            self.metrics.observe("medbook_triage_wait_seconds", time.monotonic() - request.submitted,
+                                 priority=PRIORITY_NAMES[request.priority])
+            self._pool.submit(self._call, request)
+
+    def _call(self, request):
+        error = None
+        try:
+            for chunk in self.clients.stream(request.api_key, request.prompt):
+                request.parts.append(chunk.text)
+        except Exception as e:
+            error = e
+        with self._cond:
+            self._inflight.pop((request.api_key, request.key), None)
+            self._running -= 1
+        self._free_workers.release()
+        if error is None:
+            request.set_result(request.text)
+        else:
+            request.set_exception(error)
+
+
+# Waits for a queued request while showing its answer as it streams in:
+# on_text gets the text so far whenever it grows, and on_fallback is called
+# once if nothing has arrived after first_chunk_timeout_ms (queue wait
+# included). Errors from the call are re-raised; on the hard timeout the
+# partial text is returned with status "timeout" (the call itself goes on,
+# and sessions asking the same thing share it).
+def wait_for(request, on_text=None, on_fallback=None, first_chunk_timeout_ms=FIRST_CHUNK_TIMEOUT_MS,
+             timeout=STREAM_TIMEOUT_SECONDS, poll_interval=0.05):
+    started = time.perf_counter()
+    deadline = started + timeout
+    first_chunk_deadline = started + first_chunk_timeout_ms / 1000
+    shown = 0
+    first_chunk_ms = None
+    fallback_shown = False
+    status = "ok"
+    while True:
+        try:
+            request.result(timeout=poll_interval)
+            done = True
+        except FutureTimeoutError:
+            done = False
+        received = len(request.parts)
+        if received > shown:
+            shown = received
+            if first_chunk_ms is None:
+                first_chunk_ms = (time.perf_counter() - started) * 1000
+            if on_text is not None:
+                on_text("".join(request.parts[:shown]))
+        if done:
+            break
+        now = time.perf_counter()
+        if now >= deadline:
+            status = "timeout"
+            break
+        if first_chunk_ms is None and not fallback_shown and now >= first_chunk_deadline:
+            if on_fallback is not None:
+                on_fallback()
+            fallback_shown = True
+    total_ms = (time.perf_counter() - started) * 1000
+    return StreamResult("".join(request.parts[:shown]), first_chunk_ms, total_ms, status)